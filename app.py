@@ -1,82 +1,153 @@
 from flask import Flask, redirect, url_for, session, request
-from database import get_connection
-
-# ================= APP =================
-app = Flask(__name__)
-app.secret_key = "chave_secreta"
+from inicializacao import RelatorioInicializacao
+from config import (
+    SESSAO_ARMAZEM, SESSAO_SQLITE_CAMINHO, SESSAO_DURACAO, SESSAO_RENOVAR,
+    SESSAO_CACHE_TAMANHO, SESSAO_CACHE_TTL,
+)
 
 # ================= BLUEPRINTS =================
-from clientes import clientes_bp
-from produtos import produtos_bp
-from pedidos import pedidos_bp
-from dashboard import dashboard_bp
-from usuarios import usuarios_bp
-from empresa import empresa_bp
-
-app.register_blueprint(usuarios_bp)
-app.register_blueprint(clientes_bp)
-app.register_blueprint(produtos_bp)
-app.register_blueprint(pedidos_bp)
-app.register_blueprint(dashboard_bp)
-app.register_blueprint(empresa_bp)
-
-@app.context_processor
-def inject_usuario():
-    return {
-        "usuario": session.get("usuario")
-    }
-
-# ================= CONTEXT PROCESSOR (EMPRESA) =================
-@app.context_processor
-def dados_empresa():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT TOP 1 nome, cnpj, logo
-        FROM empresa
-        WHERE ativo = 1
-    """)
-    empresa = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
-
-    return {
-        "empresa_nome": empresa.nome if empresa else "",
-        "empresa_cnpj": empresa.cnpj if empresa else "",
-        "empresa_logo": empresa.logo if empresa else ""
-    }
-
-# ================= LOGIN OBRIGATÓRIO =================
-@app.before_request
-def proteger_rotas():
-    rotas_livres = (
-        "usuarios.login",
-        "usuarios.alterar_senha",
-        "usuarios.primeiro_usuario",
+# Ordem fixa de registro: (módulo, atributo do blueprint)
+BLUEPRINTS = (
+    ("usuarios", "usuarios_bp"),
+    ("clientes", "clientes_bp"),
+    ("produtos", "produtos_bp"),
+    ("pedidos", "pedidos_bp"),
+    ("dashboard", "dashboard_bp"),
+    ("empresa.empresa", "empresa_bp"),
+    ("monitor", "monitor_bp"),
+    ("tarefas", "tarefas_bp"),
+    ("busca", "busca_bp"),
+)
+
+
+# ================= APP =================
+def create_app(config=None):
+    """
+    Cria e configura a aplicação.
+
+    `config` é um dict opcional que sobrescreve as configurações padrão
+    (ex.: {"SECRET_KEY": ..., "AQUECER_BANCO": True}).
+    """
+    relatorio = RelatorioInicializacao()
+
+    app = Flask(__name__)
+    app.config.from_mapping(
+        SECRET_KEY="chave_secreta",
+        AQUECER_BANCO=False,
+        SESSAO_ARMAZEM=SESSAO_ARMAZEM,
     )
+    if config:
+        app.config.from_mapping(config)
 
-    rota_atual = request.endpoint
+    app.extensions["relatorio_inicializacao"] = relatorio
+    _configurar_sessoes(app)
 
-    if rota_atual is None:
-        return
+    # Os módulos dos blueprints são importados aqui, e não na importação do
+    # app.py; não dá para adiá-los até a primeira requisição de cada um,
+    # porque o Flask não aceita register_blueprint depois que o app atende.
+    # O que é pesado (pyodbc, schema, migrações) fica para a primeira conexão.
+    for modulo, atributo in BLUEPRINTS:
+        blueprint = getattr(relatorio.importar(modulo), atributo)
+        app.register_blueprint(blueprint)
 
-    if rota_atual.startswith("static"):
-        return
+    _registrar_hooks(app, relatorio)
 
-    if rota_atual in rotas_livres:
+    # Por padrão o banco só é preparado na primeira conexão
+    if app.config["AQUECER_BANCO"]:
+        import database
+        database.inicializar()
+
+    relatorio.marcar_app_criado()
+    return app
+
+
+def _configurar_sessoes(app):
+    """Sessões no servidor (cookie só com o id), exceto SESSAO_ARMAZEM=cookie."""
+    armazem = app.config["SESSAO_ARMAZEM"]
+    if armazem == "cookie":
         return
 
-    if "user_id" not in session:
-        return redirect(url_for("usuarios.login"))
+    from sessoes import SessoesServidor, criar_armazem
+
+    app.session_interface = SessoesServidor(
+        criar_armazem(armazem, SESSAO_SQLITE_CAMINHO),
+        duracao=SESSAO_DURACAO,
+        renovar=SESSAO_RENOVAR,
+        cache_tamanho=SESSAO_CACHE_TAMANHO,
+        cache_ttl=SESSAO_CACHE_TTL,
+    )
+
+
+def _registrar_hooks(app, relatorio):
+    from banco.instrumentacao import iniciar_coleta, encerrar_coleta, server_timing
+    from empresa.empresa import empresa_ativa
+    from permissoes import matriz, perfil_da_sessao
+
+    # ================= INSTRUMENTAÇÃO SQL =================
+    @app.before_request
+    def iniciar_coleta_sql():
+        iniciar_coleta()
+
+    @app.after_request
+    def cabecalho_server_timing(response):
+        coleta = encerrar_coleta()
+        if coleta is not None:
+            response.headers["Server-Timing"] = server_timing(coleta)
+
+        if relatorio.marcar_primeira_requisicao():
+            app.logger.info("Inicialização: %s", relatorio.resumo())
+        return response
+
+    @app.context_processor
+    def inject_usuario():
+        perfil = perfil_da_sessao() if "user_id" in session else None
+        return {
+            "usuario": session.get("usuario"),
+            # Telas do menu, vindas da matriz de permissões em memória
+            "telas_usuario": matriz.telas_do_perfil(perfil) if perfil else frozenset()
+        }
+
+    # ================= CONTEXT PROCESSOR (EMPRESA) =================
+    @app.context_processor
+    def dados_empresa():
+        # Vem do cache em memória; invalidado quando o painel da empresa salva
+        empresa = empresa_ativa()
+
+        return {
+            "empresa_nome": empresa["nome"],
+            "empresa_cnpj": empresa["cnpj"],
+            "empresa_logo": empresa["logo"]
+        }
+
+    # ================= LOGIN OBRIGATÓRIO =================
+    @app.before_request
+    def proteger_rotas():
+        rotas_livres = (
+            "usuarios.login",
+            "usuarios.primeiro_usuario",
+        )
+
+        rota_atual = request.endpoint
+
+        if rota_atual is None:
+            return
+
+        if rota_atual.startswith("static"):
+            return
+
+        if rota_atual in rotas_livres:
+            return
+
+        if "user_id" not in session:
+            return redirect(url_for("usuarios.login"))
+
+    # ================= PÁGINA INICIAL =================
+    @app.route("/")
+    def index():
+        if "user_id" not in session:
+            return redirect(url_for("usuarios.login"))
+        return redirect(url_for("dashboard.dashboard_home"))
 
-# ================= PÁGINA INICIAL =================
-@app.route("/")
-def index():
-    if "user_id" not in session:
-        return redirect(url_for("usuarios.login"))
-    return redirect(url_for("dashboard.dashboard_home"))
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
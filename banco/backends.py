@@ -0,0 +1,296 @@
+"""
+Backends de banco de dados selecionáveis por config.DB_BACKEND.
+
+- "sqlserver": pyodbc + SQL Server (produção)
+- "sqlite":    arquivo local, para testes de desempenho em qualquer máquina
+
+Os dois entregam conexões com a mesma interface usada pelas rotas
+(cursor().execute com "?", linhas com acesso por índice e por atributo).
+"""
+import datetime
+import decimal
+import os
+import sqlite3
+from functools import lru_cache
+
+from banco.dialeto import traduzir, dividir_lote
+from banco.schema import SCHEMA_SQLITE, DADOS_INICIAIS_SQLITE
+
+
+# ==================== SQL SERVER ====================
+class BackendSqlServer:
+    nome = "sqlserver"
+
+    def __init__(self, server, database, driver, somente_leitura=False):
+        self.server = server
+        self.database = database
+        self.driver = driver
+        self.somente_leitura = somente_leitura
+
+    def string_conexao(self):
+        conexao = (
+            f"DRIVER={{{self.driver}}};"
+            f"SERVER={self.server};"
+            f"DATABASE={self.database};"
+            f"Trusted_Connection=yes;"
+        )
+        if self.somente_leitura:
+            # Direciona o listener do Always On para uma réplica secundária
+            conexao += "ApplicationIntent=ReadOnly;"
+        return conexao
+
+    def conectar(self):
+        import pyodbc
+        return pyodbc.connect(self.string_conexao())
+
+    def ping(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        finally:
+            cursor.close()
+
+    def inicializar(self):
+        # O schema do SQL Server é administrado fora da aplicação
+        pass
+
+
+# ==================== SQLITE ====================
+class BackendSqlite:
+    nome = "sqlite"
+
+    def __init__(self, caminho, somente_leitura=False):
+        self.caminho = caminho
+        self.somente_leitura = somente_leitura
+
+    def conectar(self):
+        destino, uri = self.caminho, False
+        if self.somente_leitura:
+            # Réplica de teste: abre só leitura e falha se o arquivo não existir
+            destino, uri = f"file:{self.caminho}?mode=ro", True
+
+        conn = sqlite3.connect(
+            destino,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            timeout=30,
+            uri=uri,
+        )
+        conn.row_factory = _fabrica_linha
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.caminho != ":memory:" and not self.somente_leitura:
+            conn.execute("PRAGMA journal_mode = WAL")
+        return ConexaoSqlite(conn)
+
+    def ping(self, conn):
+        conn.execute("SELECT 1").fetchone()
+
+    def inicializar(self):
+        """Cria as tabelas (se não existirem) e os perfis padrão."""
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        conn = sqlite3.connect(self.caminho)
+        try:
+            conn.executescript(SCHEMA_SQLITE)
+            conn.executescript(DADOS_INICIAIS_SQLITE)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class ConexaoSqlite:
+    """Conexão sqlite3 que traduz o T-SQL das rotas antes de executar."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return CursorSqlite(self._conn.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        if tipo is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        return False
+
+
+class CursorSqlite:
+    """Cursor com a mesma forma de chamada do pyodbc."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        # Aceito para compatibilidade com pyodbc; sem efeito no SQLite
+        self.fast_executemany = False
+        # Lote com vários comandos: [(description, linhas)] ainda não lidos
+        self._conjuntos = None
+
+    def execute(self, sql, *params):
+        params = _normalizar_parametros(params)
+        if ";" in sql:
+            comandos = dividir_lote(sql)
+            if len(comandos) > 1:
+                return self._executar_lote(comandos, params)
+
+        self._conjuntos = None
+        sql, trocar = traduzir(sql)
+        if trocar:
+            params[-2], params[-1] = params[-1], params[-2]
+        self._cursor.execute(sql, params)
+        return self
+
+    def _executar_lote(self, comandos, params):
+        """Executa cada comando e guarda os resultados para nextset()."""
+        conjuntos = []
+        for comando, quantidade in comandos:
+            parte, params = params[:quantidade], params[quantidade:]
+            sql, trocar = traduzir(comando)
+            if trocar:
+                parte[-2], parte[-1] = parte[-1], parte[-2]
+            self._cursor.execute(sql, parte)
+            if self._cursor.description is not None:
+                conjuntos.append((self._cursor.description, self._cursor.fetchall()))
+        self._conjuntos = conjuntos or [(None, [])]
+        return self
+
+    def executemany(self, sql, seq_params):
+        self._conjuntos = None
+        sql, trocar = traduzir(sql)
+        lotes = []
+        for params in seq_params:
+            params = list(params)
+            if trocar:
+                params[-2], params[-1] = params[-1], params[-2]
+            lotes.append(params)
+        self._cursor.executemany(sql, lotes)
+        return self
+
+    def fetchone(self):
+        if self._conjuntos is not None:
+            linhas = self._conjuntos[0][1]
+            return linhas.pop(0) if linhas else None
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        if self._conjuntos is not None:
+            linhas = self._conjuntos[0][1]
+            self._conjuntos[0] = (self._conjuntos[0][0], [])
+            return linhas
+        return self._cursor.fetchall()
+
+    def fetchmany(self, tamanho=None):
+        if self._conjuntos is not None:
+            tamanho = tamanho or self._cursor.arraysize
+            linhas = self._conjuntos[0][1]
+            self._conjuntos[0] = (self._conjuntos[0][0], linhas[tamanho:])
+            return linhas[:tamanho]
+        if tamanho is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(tamanho)
+
+    def nextset(self):
+        if self._conjuntos is None or len(self._conjuntos) <= 1:
+            self._conjuntos = None
+            return False
+        self._conjuntos.pop(0)
+        return True
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def description(self):
+        if self._conjuntos is not None:
+            return self._conjuntos[0][0]
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def __iter__(self):
+        if self._conjuntos is not None:
+            return iter(self.fetchall())
+        return iter(self._cursor)
+
+
+def _normalizar_parametros(params):
+    # pyodbc aceita execute(sql, a, b) e execute(sql, [a, b])
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return list(params[0])
+    return list(params)
+
+
+# ---------------- LINHAS (ÍNDICE + ATRIBUTO, COMO pyodbc.Row) ----------------
+@lru_cache(maxsize=256)
+def _classe_linha(colunas):
+    indices = {nome.lower(): i for i, nome in enumerate(colunas)}
+
+    class Linha(tuple):
+        __slots__ = ()
+        cursor_description = colunas
+
+        def __getattr__(self, nome):
+            try:
+                return self[indices[nome.lower()]]
+            except KeyError:
+                raise AttributeError(nome) from None
+
+    return Linha
+
+
+def _fabrica_linha(cursor, row):
+    return _classe_linha(tuple(d[0] for d in cursor.description))(row)
+
+
+# ---------------- CONVERSÕES DE TIPO ----------------
+def _converter_datetime(valor):
+    return datetime.datetime.fromisoformat(valor.decode())
+
+
+def _converter_date(valor):
+    return datetime.date.fromisoformat(valor.decode())
+
+
+sqlite3.register_adapter(decimal.Decimal, float)
+sqlite3.register_adapter(datetime.datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(datetime.date, lambda v: v.isoformat())
+sqlite3.register_converter("DATETIME", _converter_datetime)
+sqlite3.register_converter("DATE", _converter_date)
+
+
+# ==================== FÁBRICA ====================
+def criar_backend(nome, **opcoes):
+    nome = (nome or "sqlserver").lower()
+
+    if nome == "sqlserver":
+        return BackendSqlServer(
+            opcoes["server"], opcoes["database"], opcoes["driver"],
+            somente_leitura=opcoes.get("somente_leitura", False)
+        )
+
+    if nome == "sqlite":
+        return BackendSqlite(
+            opcoes["caminho"],
+            somente_leitura=opcoes.get("somente_leitura", False)
+        )
+
+    raise ValueError(f"Backend de banco desconhecido: {nome}")
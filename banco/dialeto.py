@@ -0,0 +1,287 @@
+"""
+Tradução do SQL escrito para o SQL Server (T-SQL) para o dialeto do SQLite.
+
+As rotas continuam escrevendo T-SQL; o backend SQLite passa cada comando por
+traduzir() antes de executar. Construções suportadas:
+
+- SELECT TOP n ...                      -> ... LIMIT n (no fim do comando
+  ou antes do ")" que fecha a subconsulta)
+- OFFSET ? ROWS FETCH NEXT ? ROWS ONLY  -> LIMIT ? OFFSET ? (parâmetros trocados)
+- OUTPUT INSERTED.a, INSERTED.b         -> RETURNING a, b
+- GETDATE()                             -> datetime('now', 'localtime')
+- CONVERT(date, x) / CONVERT(tipo, x)   -> date(x) / CAST(x AS tipo)
+- FORMAT(x, 'MM/yyyy')                  -> strftime('%m/%Y', x)
+- YEAR(x) / MONTH(x) / DAY(x)           -> CAST(strftime(...) AS INTEGER)
+- DATEADD(SECOND, n, x) (e MINUTE etc.)  -> datetime(x, (n) || ' seconds')
+- ISNULL / LEN / SCOPE_IDENTITY()       -> IFNULL / LENGTH / last_insert_rowid()
+- dicas de tabela WITH (UPDLOCK, ...)   -> removidas (o SQLite já serializa
+  as transações de escrita)
+- prefixo dbo. e literais N'...'
+
+Lotes com vários comandos separados por ";" (lidos com nextset() no
+pyodbc) são divididos por dividir_lote() e executados um a um.
+"""
+import re
+from functools import lru_cache
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_FUNCAO = re.compile(
+    r"\b(GETDATE|CONVERT|FORMAT|YEAR|MONTH|DAY|ISNULL|LEN|SCOPE_IDENTITY|DATEADD)\s*\(",
+    re.IGNORECASE
+)
+_DBO = re.compile(r"\bdbo\.", re.IGNORECASE)
+_UNICODE = re.compile(r"\bN'")
+_TOP = re.compile(r"\bSELECT(\s+DISTINCT)?\s+TOP\s*\(?\s*(\d+)\s*\)?", re.IGNORECASE)
+_OFFSET = re.compile(
+    r"\bOFFSET\s+(\?|\d+)\s+ROWS?\s+FETCH\s+(?:NEXT|FIRST)\s+(\?|\d+)\s+ROWS?\s+ONLY\b",
+    re.IGNORECASE
+)
+_OUTPUT = re.compile(
+    r"\bOUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)", re.IGNORECASE
+)
+_INSERTED = re.compile(r"INSERTED\.(\w+)", re.IGNORECASE)
+_DICAS = re.compile(
+    r"\s*\bWITH\s*\(\s*(?:NOLOCK|UPDLOCK|HOLDLOCK|SERIALIZABLE|ROWLOCK|READPAST|XLOCK)"
+    r"(?:\s*,\s*(?:NOLOCK|UPDLOCK|HOLDLOCK|SERIALIZABLE|ROWLOCK|READPAST|XLOCK))*\s*\)",
+    re.IGNORECASE
+)
+_FORMATO = re.compile(r"yyyy|yy|MM|dd|HH|mm|ss")
+
+_FORMATOS_NET = {
+    "yyyy": "%Y", "yy": "%y", "MM": "%m", "dd": "%d",
+    "HH": "%H", "mm": "%M", "ss": "%S",
+}
+
+_UNIDADES_SQLITE = {
+    "second": "seconds", "ss": "seconds", "s": "seconds",
+    "minute": "minutes", "mi": "minutes", "n": "minutes",
+    "hour": "hours", "hh": "hours",
+    "day": "days", "dd": "days", "d": "days",
+    "month": "months", "mm": "months", "m": "months",
+    "year": "years", "yyyy": "years", "yy": "years",
+}
+
+_TIPOS_SQLITE = {
+    "int": "INTEGER", "bigint": "INTEGER", "bit": "INTEGER",
+    "float": "REAL", "decimal": "REAL", "numeric": "REAL", "money": "REAL",
+    "varchar": "TEXT", "nvarchar": "TEXT", "char": "TEXT", "nchar": "TEXT",
+}
+
+
+@lru_cache(maxsize=512)
+def traduzir(sql):
+    """
+    Retorna (sql_sqlite, trocar_paginacao).
+
+    Quando trocar_paginacao é True, os dois últimos parâmetros (offset, limite)
+    precisam ser invertidos para casar com `LIMIT ? OFFSET ?`.
+    """
+    sql = _fora_de_strings(sql, lambda trecho: _DICAS.sub("", _DBO.sub("", trecho)))
+    sql = _UNICODE.sub("'", sql)
+    sql = _reescrever_funcoes(sql)
+
+    trocar = False
+    m = _OFFSET.search(sql)
+    if m:
+        offset, limite = m.group(1), m.group(2)
+        trocar = offset == "?" and limite == "?"
+        sql = sql[:m.start()] + f"LIMIT {limite} OFFSET {offset}" + sql[m.end():]
+
+    sql = _reescrever_top(sql)
+
+    m = _OUTPUT.search(sql)
+    if m:
+        sql = sql[:m.start()] + sql[m.end():]
+        colunas = ", ".join(_INSERTED.findall(m.group(1)))
+        sql = _anexar(sql, f"RETURNING {colunas}")
+
+    return sql, trocar
+
+
+@lru_cache(maxsize=128)
+def dividir_lote(sql):
+    """
+    Divide um lote T-SQL nos comandos separados por ";" (fora de literais).
+    Retorna tupla de (comando, quantidade de parâmetros "?").
+    """
+    comandos = []
+    atual = []
+    pos = 0
+    for m in list(_STRING.finditer(sql)) + [None]:
+        fim = m.start() if m else len(sql)
+        trechos = sql[pos:fim].split(";")
+        for trecho in trechos[:-1]:
+            atual.append(trecho)
+            comandos.append("".join(atual))
+            atual = []
+        atual.append(trechos[-1])
+        if m:
+            atual.append(m.group(0))
+            pos = m.end()
+    comandos.append("".join(atual))
+
+    return tuple(
+        (comando, _fora_de_strings_contar(comando, "?"))
+        for comando in comandos if comando.strip()
+    )
+
+
+# ---------------- AUXILIARES ----------------
+def _fora_de_strings_contar(sql, caractere):
+    return sum(trecho.count(caractere) for trecho in _STRING.split(sql))
+
+
+def _anexar(sql, clausula):
+    corpo = sql.rstrip()
+    fim = ";" if corpo.endswith(";") else ""
+    return corpo.rstrip(";").rstrip() + f" {clausula}" + fim
+
+
+def _reescrever_top(sql):
+    # Do último TOP para o primeiro: os índices dos anteriores não mudam
+    for m in reversed([m for m in _TOP.finditer(sql) if not _dentro_de_string(sql, m.start())]):
+        abre = _parentese_aberto(sql, m.start())
+        resto = sql[m.end():].lstrip()
+        if abre is None:
+            sql = _anexar(sql[:m.start()] + "SELECT" + (m.group(1) or "") + " " + resto,
+                          f"LIMIT {m.group(2)}")
+            continue
+        fecha = _fechamento(sql, abre)
+        sql = (
+            sql[:m.start()] + "SELECT" + (m.group(1) or "") + " "
+            + sql[m.end():fecha].strip() + f" LIMIT {m.group(2)}" + sql[fecha:]
+        )
+    return sql
+
+
+def _parentese_aberto(sql, indice):
+    """Índice do '(' que envolve `indice` (ignorando literais), ou None."""
+    abertos = []
+    i = 0
+    while i < indice:
+        c = sql[i]
+        if c == "'":
+            i = sql.index("'", i + 1)
+            while i + 1 < len(sql) and sql[i + 1] == "'":
+                i = sql.index("'", i + 2)
+        elif c == "(":
+            abertos.append(i)
+        elif c == ")" and abertos:
+            abertos.pop()
+        i += 1
+    return abertos[-1] if abertos else None
+
+
+def _fora_de_strings(sql, funcao):
+    partes = []
+    pos = 0
+    for m in _STRING.finditer(sql):
+        partes.append(funcao(sql[pos:m.start()]))
+        partes.append(m.group(0))
+        pos = m.end()
+    partes.append(funcao(sql[pos:]))
+    return "".join(partes)
+
+
+def _dentro_de_string(sql, indice):
+    return any(m.start() <= indice < m.end() for m in _STRING.finditer(sql))
+
+
+def _fechamento(sql, abre):
+    """Índice do ')' que fecha o '(' em `abre`, ignorando literais."""
+    nivel = 0
+    i = abre
+    while i < len(sql):
+        c = sql[i]
+        if c == "'":
+            i = sql.index("'", i + 1)
+            while i + 1 < len(sql) and sql[i + 1] == "'":
+                i = sql.index("'", i + 2)
+        elif c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+            if nivel == 0:
+                return i
+        i += 1
+    raise ValueError(f"Parênteses desbalanceados em: {sql!r}")
+
+
+def _argumentos(trecho):
+    """Divide a lista de argumentos nas vírgulas de nível zero."""
+    args = []
+    nivel = 0
+    atual = []
+    em_string = False
+    for c in trecho:
+        if c == "'":
+            em_string = not em_string
+        elif not em_string and c == "(":
+            nivel += 1
+        elif not em_string and c == ")":
+            nivel -= 1
+        elif not em_string and c == "," and nivel == 0:
+            args.append("".join(atual).strip())
+            atual = []
+            continue
+        atual.append(c)
+    if "".join(atual).strip():
+        args.append("".join(atual).strip())
+    return args
+
+
+def _reescrever_funcoes(sql):
+    saida = []
+    pos = 0
+    while True:
+        m = _FUNCAO.search(sql, pos)
+        while m and _dentro_de_string(sql, m.start()):
+            m = _FUNCAO.search(sql, m.end())
+        if not m:
+            saida.append(sql[pos:])
+            return "".join(saida)
+
+        abre = m.end() - 1
+        fecha = _fechamento(sql, abre)
+        args = [_reescrever_funcoes(a) for a in _argumentos(sql[abre + 1:fecha])]
+
+        saida.append(sql[pos:m.start()])
+        saida.append(_funcao_sqlite(m.group(1).upper(), args))
+        pos = fecha + 1
+
+
+def _funcao_sqlite(nome, args):
+    if nome == "GETDATE":
+        return "datetime('now', 'localtime')"
+
+    if nome == "SCOPE_IDENTITY":
+        return "last_insert_rowid()"
+
+    if nome == "ISNULL":
+        return f"IFNULL({', '.join(args)})"
+
+    if nome == "LEN":
+        return f"LENGTH({args[0]})"
+
+    if nome in ("YEAR", "MONTH", "DAY"):
+        formato = {"YEAR": "%Y", "MONTH": "%m", "DAY": "%d"}[nome]
+        return f"CAST(strftime('{formato}', {args[0]}) AS INTEGER)"
+
+    if nome == "DATEADD":
+        unidade = _UNIDADES_SQLITE[args[0].strip().lower()]
+        return f"datetime({args[2]}, ({args[1]}) || ' {unidade}')"
+
+    if nome == "FORMAT":
+        formato = args[1].strip("'")
+        formato = _FORMATO.sub(lambda m: _FORMATOS_NET[m.group(0)], formato)
+        return f"strftime('{formato}', {args[0]})"
+
+    if nome == "CONVERT":
+        tipo = args[0].split("(")[0].strip().lower()
+        if tipo == "date":
+            return f"date({args[1]})"
+        if tipo in ("datetime", "datetime2", "smalldatetime"):
+            return f"datetime({args[1]})"
+        return f"CAST({args[1]} AS {_TIPOS_SQLITE.get(tipo, tipo.upper())})"
+
+    raise ValueError(f"Função sem tradução para SQLite: {nome}")
@@ -0,0 +1,227 @@
+"""
+Instrumentação das consultas SQL.
+
+Todo cursor entregue por database.get_connection() passa por
+CursorInstrumentado, que mede cada comando e registra:
+
+- na coleta da requisição atual (quantidade, tempo, linhas por comando);
+- nas estatísticas globais por comando normalizado (página /monitor/sql);
+- no log rotativo de consultas lentas, acima de config.SQL_LENTO_MS.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+
+from config import (
+    SQL_LENTO_MS, SQL_LENTO_LOG, SQL_LENTO_LOG_BYTES, SQL_LENTO_LOG_BACKUPS,
+)
+
+_coleta_atual = contextvars.ContextVar("coleta_sql", default=None)
+
+_NUMERO = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_ESPACOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalizar_sql(sql):
+    """Remove literais e espaços extras para agrupar comandos iguais."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMERO.sub("?", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+# ==================== COLETA POR REQUISIÇÃO ====================
+class ColetaSql:
+    def __init__(self):
+        self.consultas = []
+        self.inicio = time.perf_counter()
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tempo_total(self):
+        return sum(c["duracao"] for c in self.consultas)
+
+
+def iniciar_coleta():
+    coleta = ColetaSql()
+    _coleta_atual.set(coleta)
+    return coleta
+
+
+def encerrar_coleta():
+    coleta = _coleta_atual.get()
+    _coleta_atual.set(None)
+    return coleta
+
+
+def coleta_atual():
+    return _coleta_atual.get()
+
+
+# ==================== ESTATÍSTICAS GLOBAIS ====================
+class EstatisticasSql:
+    """Agregado por comando normalizado, limitado a `maximo` comandos."""
+
+    def __init__(self, maximo=500):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._dados = {}
+
+    def registrar(self, sql, duracao):
+        with self._lock:
+            item = self._dados.get(sql)
+            if item is None:
+                if len(self._dados) >= self.maximo:
+                    menor = min(self._dados, key=lambda k: self._dados[k]["tempo_total"])
+                    del self._dados[menor]
+                item = self._dados[sql] = {
+                    "sql": sql, "execucoes": 0, "tempo_total": 0.0,
+                    "tempo_max": 0.0, "linhas": 0,
+                }
+            item["execucoes"] += 1
+            item["tempo_total"] += duracao
+            item["tempo_max"] = max(item["tempo_max"], duracao)
+            return item
+
+    def somar_linhas(self, item, linhas):
+        with self._lock:
+            item["linhas"] += linhas
+
+    def piores(self, limite=30):
+        with self._lock:
+            itens = [dict(i) for i in self._dados.values()]
+        itens.sort(key=lambda i: i["tempo_total"], reverse=True)
+        for item in itens:
+            item["tempo_medio"] = item["tempo_total"] / item["execucoes"]
+        return itens[:limite]
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+estatisticas = EstatisticasSql()
+
+
+# ==================== LOG DE CONSULTAS LENTAS ====================
+_log_lento = logging.getLogger("listadecompras.sql_lento")
+_log_lento.propagate = False
+_log_lock = threading.Lock()
+
+
+def _registrar_lenta(sql, params, duracao):
+    if not _log_lento.handlers:
+        with _log_lock:
+            if not _log_lento.handlers:
+                os.makedirs(os.path.dirname(SQL_LENTO_LOG), exist_ok=True)
+                handler = RotatingFileHandler(
+                    SQL_LENTO_LOG,
+                    maxBytes=SQL_LENTO_LOG_BYTES,
+                    backupCount=SQL_LENTO_LOG_BACKUPS,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                _log_lento.addHandler(handler)
+                _log_lento.setLevel(logging.WARNING)
+
+    _log_lento.warning("%.1fms params=%d %s", duracao * 1000, params, sql)
+
+
+# ==================== CURSOR ====================
+class CursorInstrumentado:
+    """Envelope de cursor (pyodbc ou SQLite) que mede cada comando."""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_registro", None)
+
+    def execute(self, sql, *params):
+        qtd = len(params[0]) if len(params) == 1 and isinstance(params[0], (list, tuple)) else len(params)
+        inicio = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        finally:
+            self._medir(sql, qtd, time.perf_counter() - inicio)
+        return self
+
+    def executemany(self, sql, seq_params):
+        seq_params = list(seq_params)
+        inicio = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_params)
+        finally:
+            self._medir(sql, len(seq_params), time.perf_counter() - inicio)
+        return self
+
+    def _medir(self, sql, params, duracao):
+        normalizada = normalizar_sql(sql)
+        linhas = max(getattr(self._cursor, "rowcount", -1) or 0, 0)
+
+        registro = {
+            "sql": normalizada,
+            "params": params,
+            "duracao": duracao,
+            "linhas": linhas,
+            "item": estatisticas.registrar(normalizada, duracao),
+        }
+        if linhas:
+            estatisticas.somar_linhas(registro["item"], linhas)
+        object.__setattr__(self, "_registro", registro)
+
+        coleta = _coleta_atual.get()
+        if coleta is not None:
+            coleta.consultas.append(registro)
+
+        if duracao * 1000 >= SQL_LENTO_MS:
+            _registrar_lenta(normalizada, params, duracao)
+
+    def _contar(self, linhas):
+        registro = self._registro
+        if registro is not None and linhas:
+            registro["linhas"] += linhas
+            estatisticas.somar_linhas(registro["item"], linhas)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._contar(1 if row is not None else 0)
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._contar(len(rows))
+        return rows
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._contar(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._contar(1)
+            yield row
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        # ex.: cursor.fast_executemany = True vai direto para o cursor real
+        setattr(self._cursor, nome, valor)
+
+
+# ==================== CABEÇALHO SERVER-TIMING ====================
+def server_timing(coleta):
+    total = (time.perf_counter() - coleta.inicio) * 1000
+    return (
+        f'db;dur={coleta.tempo_total * 1000:.1f};desc="{coleta.total} consultas", '
+        f'app;dur={total:.1f}'
+    )
@@ -0,0 +1,135 @@
+"""
+Migrações versionadas do schema.
+
+Cada migração é um módulo `mNNNN_descricao.py` neste pacote com:
+
+    VERSAO = NNNN
+    DESCRICAO = "..."
+    def aplicar(cursor, backend): ...   # backend = "sqlserver" ou "sqlite"
+    def preencher(conn, backend): ...   # opcional: cópia de dados em lotes
+
+As migrações rodam em ordem de versão, cada uma na sua transação, e a
+versão aplicada fica registrada na tabela SchemaVersao. Os scripts devem
+ser idempotentes (podem rodar de novo sobre um banco já migrado).
+
+preencher() roda depois do commit de aplicar() e antes de a versão ser
+registrada; faz commit a cada lote, para tabelas grandes não virarem uma
+transação só. Se for interrompida, a migração roda de novo na próxima vez
+e preencher() deve continuar de onde parou (pulando o que já foi copiado).
+
+Uso pela linha de comando:
+
+    python -m banco.migracoes            # aplica as pendentes
+    python -m banco.migracoes --status   # lista aplicadas e pendentes
+"""
+import importlib
+import pkgutil
+import re
+
+_MODULO = re.compile(r"^m(\d{4})_\w+$")
+
+_TABELA_VERSAO = {
+    "sqlserver": """
+        IF OBJECT_ID('SchemaVersao', 'U') IS NULL
+        CREATE TABLE SchemaVersao (
+            versao      INT NOT NULL PRIMARY KEY,
+            descricao   NVARCHAR(200) NOT NULL,
+            aplicada_em DATETIME NOT NULL DEFAULT GETDATE()
+        )
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS SchemaVersao (
+            versao      INTEGER NOT NULL PRIMARY KEY,
+            descricao   TEXT NOT NULL,
+            aplicada_em DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """,
+}
+
+
+# ==================== DESCOBERTA ====================
+def listar_migracoes():
+    """Módulos de migração do pacote, em ordem de versão."""
+    migracoes = []
+    for info in pkgutil.iter_modules(__path__):
+        if not _MODULO.match(info.name):
+            continue
+        modulo = importlib.import_module(f"{__name__}.{info.name}")
+        migracoes.append(modulo)
+
+    migracoes.sort(key=lambda m: m.VERSAO)
+
+    versoes = [m.VERSAO for m in migracoes]
+    if len(versoes) != len(set(versoes)):
+        raise RuntimeError(f"Versões de migração duplicadas: {versoes}")
+
+    return migracoes
+
+
+def versoes_aplicadas(cursor):
+    cursor.execute("SELECT versao FROM SchemaVersao")
+    return {int(row[0]) for row in cursor.fetchall()}
+
+
+# ==================== EXECUÇÃO ====================
+def aplicar_migracoes(conn, backend, log=None):
+    """
+    Aplica as migrações pendentes. Retorna a lista de versões aplicadas.
+    """
+    cursor = conn.cursor()
+    cursor.execute(_TABELA_VERSAO[backend])
+    conn.commit()
+
+    aplicadas = versoes_aplicadas(cursor)
+    novas = []
+
+    for migracao in listar_migracoes():
+        if migracao.VERSAO in aplicadas:
+            continue
+
+        if log:
+            log(f"Aplicando migração {migracao.VERSAO:04d}: {migracao.DESCRICAO}")
+
+        try:
+            migracao.aplicar(cursor, backend)
+            if hasattr(migracao, "preencher"):
+                conn.commit()
+                migracao.preencher(conn, backend)
+            cursor.execute(
+                "INSERT INTO SchemaVersao (versao, descricao) VALUES (?, ?)",
+                (migracao.VERSAO, migracao.DESCRICAO)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        novas.append(migracao.VERSAO)
+
+    return novas
+
+
+# ==================== AUXILIARES PARA OS SCRIPTS ====================
+def criar_indice(cursor, backend, nome, tabela, colunas, incluir=()):
+    """
+    Cria um índice se ele ainda não existir.
+
+    `incluir` vira INCLUDE (...) no SQL Server (índice de cobertura); no
+    SQLite, que não tem INCLUDE, as colunas entram no fim da chave.
+    """
+    if backend == "sqlserver":
+        sql = f"CREATE INDEX {nome} ON {tabela} ({', '.join(colunas)})"
+        if incluir:
+            sql += f" INCLUDE ({', '.join(incluir)})"
+        cursor.execute(f"""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = '{nome}' AND object_id = OBJECT_ID('{tabela}')
+            )
+            {sql}
+        """)
+    else:
+        chave = list(colunas) + [c for c in incluir if c not in colunas]
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({', '.join(chave)})"
+        )
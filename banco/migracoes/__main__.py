@@ -0,0 +1,31 @@
+import sys
+
+from banco.migracoes import aplicar_migracoes, listar_migracoes, versoes_aplicadas
+from database import backend
+
+
+def main(argv):
+    backend.inicializar()
+    conn = backend.conectar()
+    try:
+        if "--status" in argv:
+            cursor = conn.cursor()
+            try:
+                aplicadas = versoes_aplicadas(cursor)
+            except Exception:
+                aplicadas = set()
+
+            for migracao in listar_migracoes():
+                marca = "x" if migracao.VERSAO in aplicadas else " "
+                print(f"[{marca}] {migracao.VERSAO:04d} {migracao.DESCRICAO}")
+            return 0
+
+        novas = aplicar_migracoes(conn, backend.nome, log=print)
+        print(f"{len(novas)} migração(ões) aplicada(s).")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
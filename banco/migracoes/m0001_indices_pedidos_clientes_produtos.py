@@ -0,0 +1,27 @@
+"""
+Índices para os filtros de data de Pedidos (lista e dashboard) e para as
+buscas da importação de CSV (Clientes.email e Produtos.nome).
+"""
+from banco.migracoes import criar_indice
+
+VERSAO = 1
+DESCRICAO = "Índices de Pedidos(data), Clientes(email) e Produtos(nome)"
+
+
+def aplicar(cursor, backend):
+    # Filtros por período: pedidos_lista e dashboard (SUM/COUNT por data)
+    criar_indice(cursor, backend, "IX_Pedidos_data", "Pedidos",
+                 ["data"], incluir=["total", "pagamento", "cliente_id"])
+
+    # Filtro por cliente + período e "cliente que mais compra"
+    criar_indice(cursor, backend, "IX_Pedidos_cliente_data", "Pedidos",
+                 ["cliente_id", "data"], incluir=["total"])
+
+    # Filtro por forma de pagamento + período
+    criar_indice(cursor, backend, "IX_Pedidos_pagamento_data", "Pedidos",
+                 ["pagamento", "data"], incluir=["total"])
+
+    # Importação de CSV: upsert por email / nome
+    criar_indice(cursor, backend, "IX_Clientes_email", "Clientes", ["email"])
+    criar_indice(cursor, backend, "IX_Produtos_nome", "Produtos",
+                 ["nome"], incluir=["preco"])
@@ -0,0 +1,31 @@
+"""
+Carimbo de versão da matriz Perfis/PerfilTelas.
+
+Cada alteração de permissões incrementa PermissoesVersao.versao; os
+workers comparam o carimbo para saber quando recarregar a matriz em memória.
+"""
+
+VERSAO = 2
+DESCRICAO = "Tabela PermissoesVersao (carimbo da matriz de permissões)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('PermissoesVersao', 'U') IS NULL
+            CREATE TABLE PermissoesVersao (
+                id      INT NOT NULL PRIMARY KEY,
+                versao  INT NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS PermissoesVersao (
+                id      INTEGER NOT NULL PRIMARY KEY,
+                versao  INTEGER NOT NULL
+            )
+        """)
+
+    cursor.execute("SELECT COUNT(*) FROM PermissoesVersao WHERE id = 1")
+    if not cursor.fetchone()[0]:
+        cursor.execute("INSERT INTO PermissoesVersao (id, versao) VALUES (1, 1)")
@@ -0,0 +1,103 @@
+"""
+Itens dos pedidos em tabela própria (PedidoItens).
+
+Até aqui os itens ficavam só no JSON de Pedidos.produtos. A migração cria
+a tabela com índices por pedido e por produto e copia os pedidos
+existentes em lotes (keyset por Pedidos.id), com commit por lote e
+pulando os que já têm itens (uma cópia interrompida continua de onde parou).
+Pedidos.produtos continua sendo gravado durante a transição.
+"""
+import json
+
+from banco.migracoes import criar_indice
+
+VERSAO = 3
+DESCRICAO = "Tabela PedidoItens com cópia dos itens de Pedidos.produtos"
+
+LOTE = 500
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('PedidoItens', 'U') IS NULL
+            CREATE TABLE PedidoItens (
+                id          INT IDENTITY(1,1) PRIMARY KEY,
+                pedido_id   INT NOT NULL REFERENCES Pedidos(id) ON DELETE CASCADE,
+                produto_id  INT NULL,
+                nome        NVARCHAR(200) NOT NULL,
+                quantidade  INT NOT NULL,
+                preco       DECIMAL(12, 2) NOT NULL,
+                subtotal    DECIMAL(12, 2) NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS PedidoItens (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                pedido_id   INTEGER NOT NULL REFERENCES Pedidos(id) ON DELETE CASCADE,
+                produto_id  INTEGER,
+                nome        TEXT NOT NULL,
+                quantidade  INTEGER NOT NULL,
+                preco       REAL NOT NULL,
+                subtotal    REAL NOT NULL
+            )
+        """)
+
+    # Itens de um pedido (lista, edição, recibo)
+    criar_indice(cursor, backend, "IX_PedidoItens_pedido", "PedidoItens", ["pedido_id"])
+
+    # Relatórios por produto (pedido livre tem produto_id NULL, agrupa por nome)
+    criar_indice(cursor, backend, "IX_PedidoItens_produto", "PedidoItens",
+                 ["produto_id"], incluir=["quantidade", "subtotal"])
+    criar_indice(cursor, backend, "IX_PedidoItens_nome", "PedidoItens",
+                 ["nome"], incluir=["quantidade", "preco"])
+
+
+def preencher(conn, backend):
+    """Copia Pedidos.produtos -> PedidoItens em lotes de LOTE pedidos."""
+    cursor = conn.cursor()
+    ultimo = 0
+    while True:
+        cursor.execute(f"""
+            SELECT TOP {LOTE} p.id, p.produtos
+            FROM Pedidos p
+            WHERE p.id > ?
+              AND NOT EXISTS (SELECT 1 FROM PedidoItens i WHERE i.pedido_id = p.id)
+            ORDER BY p.id
+        """, (ultimo,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        linhas = []
+        for pedido_id, produtos in rows:
+            try:
+                itens = json.loads(produtos or "[]")
+            except ValueError:
+                continue
+
+            for item in itens:
+                nome = (item.get("nome") or "").strip()
+                if not nome:
+                    continue
+                quantidade = int(item.get("quantidade") or 0)
+                preco = float(item.get("preco") or 0)
+                linhas.append((
+                    pedido_id,
+                    item.get("id"),
+                    nome,
+                    quantidade,
+                    preco,
+                    float(item.get("subtotal") or quantidade * preco),
+                ))
+
+        if linhas:
+            cursor.executemany("""
+                INSERT INTO PedidoItens
+                (pedido_id, produto_id, nome, quantidade, preco, subtotal)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, linhas)
+        conn.commit()
+
+        ultimo = rows[-1][0]
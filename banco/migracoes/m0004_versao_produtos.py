@@ -0,0 +1,31 @@
+"""
+Carimbo de versão do cadastro de produtos.
+
+Cada alteração em Produtos incrementa ProdutosVersao.versao; os workers
+comparam o carimbo para saber quando recarregar o catálogo em memória.
+"""
+
+VERSAO = 4
+DESCRICAO = "Tabela ProdutosVersao (carimbo do catálogo de produtos)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('ProdutosVersao', 'U') IS NULL
+            CREATE TABLE ProdutosVersao (
+                id      INT NOT NULL PRIMARY KEY,
+                versao  INT NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ProdutosVersao (
+                id      INTEGER NOT NULL PRIMARY KEY,
+                versao  INTEGER NOT NULL
+            )
+        """)
+
+    cursor.execute("SELECT COUNT(*) FROM ProdutosVersao WHERE id = 1")
+    if not cursor.fetchone()[0]:
+        cursor.execute("INSERT INTO ProdutosVersao (id, versao) VALUES (1, 1)")
@@ -0,0 +1,27 @@
+"""
+Referência de importação em Pedidos.
+
+A importação em lote grava o código do pedido na planilha em
+Pedidos.importacao_ref: serve para achar os ids depois do executemany
+(que não devolve OUTPUT por linha) e para não importar o mesmo pedido
+duas vezes.
+"""
+from banco.migracoes import criar_indice
+
+VERSAO = 5
+DESCRICAO = "Coluna Pedidos.importacao_ref para a importação em lote"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF COL_LENGTH('Pedidos', 'importacao_ref') IS NULL
+            ALTER TABLE Pedidos ADD importacao_ref NVARCHAR(64) NULL
+        """)
+    else:
+        cursor.execute("PRAGMA table_info(Pedidos)")
+        colunas = {row[1] for row in cursor.fetchall()}
+        if "importacao_ref" not in colunas:
+            cursor.execute("ALTER TABLE Pedidos ADD COLUMN importacao_ref TEXT")
+
+    criar_indice(cursor, backend, "IX_Pedidos_importacao_ref", "Pedidos", ["importacao_ref"])
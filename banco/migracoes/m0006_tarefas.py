@@ -0,0 +1,54 @@
+"""
+Tabela Tarefas: tarefas em segundo plano (importações e recálculos).
+
+Guarda tipo, situação, progresso e o resumo do resultado (JSON) de cada
+tarefa, para a tela de acompanhamento e para limitar quantas tarefas
+pesadas rodam ao mesmo tempo entre todos os workers.
+"""
+from banco.migracoes import criar_indice
+
+VERSAO = 6
+DESCRICAO = "Tabela Tarefas (tarefas em segundo plano)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('Tarefas', 'U') IS NULL
+            CREATE TABLE Tarefas (
+                id            INT IDENTITY(1,1) PRIMARY KEY,
+                tipo          NVARCHAR(50) NOT NULL,
+                descricao     NVARCHAR(200) NULL,
+                situacao      NVARCHAR(20) NOT NULL,
+                usuario_id    INT NULL,
+                processo      INT NULL,
+                feito         INT NOT NULL DEFAULT 0,
+                total         INT NULL,
+                resultado     NVARCHAR(MAX) NULL,
+                erro          NVARCHAR(MAX) NULL,
+                criada_em     DATETIME NOT NULL DEFAULT GETDATE(),
+                iniciada_em   DATETIME NULL,
+                concluida_em  DATETIME NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Tarefas (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo          TEXT NOT NULL,
+                descricao     TEXT,
+                situacao      TEXT NOT NULL,
+                usuario_id    INTEGER,
+                processo      INTEGER,
+                feito         INTEGER NOT NULL DEFAULT 0,
+                total         INTEGER,
+                resultado     TEXT,
+                erro          TEXT,
+                criada_em     DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+                iniciada_em   DATETIME,
+                concluida_em  DATETIME
+            )
+        """)
+
+    # Contagem das tarefas em execução (limite global) e lista por situação
+    criar_indice(cursor, backend, "IX_Tarefas_situacao", "Tarefas", ["situacao"])
@@ -0,0 +1,31 @@
+"""
+Carimbo de versão do cadastro de clientes.
+
+Cada alteração em Clientes incrementa ClientesVersao.versao; os workers
+comparam o carimbo para saber quando reconstruir o índice de busca.
+"""
+
+VERSAO = 7
+DESCRICAO = "Tabela ClientesVersao (carimbo do índice de busca de clientes)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('ClientesVersao', 'U') IS NULL
+            CREATE TABLE ClientesVersao (
+                id      INT NOT NULL PRIMARY KEY,
+                versao  INT NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ClientesVersao (
+                id      INTEGER NOT NULL PRIMARY KEY,
+                versao  INTEGER NOT NULL
+            )
+        """)
+
+    cursor.execute("SELECT COUNT(*) FROM ClientesVersao WHERE id = 1")
+    if not cursor.fetchone()[0]:
+        cursor.execute("INSERT INTO ClientesVersao (id, versao) VALUES (1, 1)")
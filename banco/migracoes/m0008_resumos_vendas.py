@@ -0,0 +1,112 @@
+"""
+Resumos de vendas para o dashboard (ver resumos.py).
+
+Cria VendasDia, VendasMesCliente e VendasMesProduto e preenche a partir
+dos pedidos existentes. As rotas de pedido mantêm as tabelas dali em diante.
+
+O preenchimento é SQL da própria migração (não usa resumos.py), para um
+banco novo chegar sempre ao mesmo resultado, mude o que mudar no app.
+"""
+
+VERSAO = 8
+DESCRICAO = "Tabelas de resumo de vendas (dia x pagamento, mês x cliente, mês x produto)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('VendasDia', 'U') IS NULL
+            CREATE TABLE VendasDia (
+                dia         DATE NOT NULL,
+                pagamento   NVARCHAR(50) NOT NULL,
+                pedidos     INT NOT NULL,
+                total       DECIMAL(14, 2) NOT NULL,
+                menor       DECIMAL(12, 2) NULL,
+                PRIMARY KEY (dia, pagamento)
+            )
+        """)
+        cursor.execute("""
+            IF OBJECT_ID('VendasMesCliente', 'U') IS NULL
+            CREATE TABLE VendasMesCliente (
+                mes         DATE NOT NULL,
+                cliente_id  INT NOT NULL,
+                pedidos     INT NOT NULL,
+                total       DECIMAL(14, 2) NOT NULL,
+                PRIMARY KEY (mes, cliente_id)
+            )
+        """)
+        cursor.execute("""
+            IF OBJECT_ID('VendasMesProduto', 'U') IS NULL
+            CREATE TABLE VendasMesProduto (
+                mes         DATE NOT NULL,
+                nome        NVARCHAR(200) NOT NULL,
+                quantidade  INT NOT NULL,
+                valor       DECIMAL(14, 2) NOT NULL,
+                PRIMARY KEY (mes, nome)
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS VendasDia (
+                dia         DATE NOT NULL,
+                pagamento   TEXT NOT NULL,
+                pedidos     INTEGER NOT NULL,
+                total       REAL NOT NULL,
+                menor       REAL,
+                PRIMARY KEY (dia, pagamento)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS VendasMesCliente (
+                mes         DATE NOT NULL,
+                cliente_id  INTEGER NOT NULL,
+                pedidos     INTEGER NOT NULL,
+                total       REAL NOT NULL,
+                PRIMARY KEY (mes, cliente_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS VendasMesProduto (
+                mes         DATE NOT NULL,
+                nome        TEXT NOT NULL,
+                quantidade  INTEGER NOT NULL,
+                valor       REAL NOT NULL,
+                PRIMARY KEY (mes, nome)
+            )
+        """)
+
+    # Preenche (ou refaz, se a migração for reaplicada) a partir dos pedidos
+    if backend == "sqlserver":
+        dia = "CAST(p.data AS DATE)"
+        mes = "DATEFROMPARTS(YEAR(p.data), MONTH(p.data), 1)"
+        nulo = "ISNULL"
+    else:
+        dia = "date(p.data)"
+        mes = "date(p.data, 'start of month')"
+        nulo = "IFNULL"
+
+    for tabela in ("VendasDia", "VendasMesCliente", "VendasMesProduto"):
+        cursor.execute(f"DELETE FROM {tabela}")
+
+    cursor.execute(f"""
+        INSERT INTO VendasDia (dia, pagamento, pedidos, total, menor)
+        SELECT {dia}, {nulo}(p.pagamento, ''), COUNT(*),
+               ROUND(SUM({nulo}(p.total, 0)), 2), MIN({nulo}(p.total, 0))
+        FROM Pedidos p
+        GROUP BY {dia}, {nulo}(p.pagamento, '')
+    """)
+    cursor.execute(f"""
+        INSERT INTO VendasMesCliente (mes, cliente_id, pedidos, total)
+        SELECT {mes}, p.cliente_id, COUNT(*), ROUND(SUM({nulo}(p.total, 0)), 2)
+        FROM Pedidos p
+        GROUP BY {mes}, p.cliente_id
+    """)
+    cursor.execute(f"""
+        INSERT INTO VendasMesProduto (mes, nome, quantidade, valor)
+        SELECT {mes}, i.nome, SUM({nulo}(i.quantidade, 0)),
+               ROUND(SUM({nulo}(i.quantidade, 0) * i.preco), 2)
+        FROM PedidoItens i
+        INNER JOIN Pedidos p ON p.id = i.pedido_id
+        GROUP BY {mes}, i.nome
+        HAVING SUM({nulo}(i.quantidade, 0)) > 0
+    """)
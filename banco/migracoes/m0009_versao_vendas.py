@@ -0,0 +1,34 @@
+"""
+Carimbo de versão dos resumos de vendas, por mês.
+
+Cada gravação que altera os resumos (resumos.registrar) incrementa a versão
+dos meses afetados; o cache do dashboard compara o carimbo para saber quais
+meses recalcular.
+"""
+
+VERSAO = 9
+DESCRICAO = "Tabela VendasVersao (carimbo por mês do cache do dashboard)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF OBJECT_ID('VendasVersao', 'U') IS NULL
+            CREATE TABLE VendasVersao (
+                mes     DATE NOT NULL PRIMARY KEY,
+                versao  INT NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS VendasVersao (
+                mes     DATE NOT NULL PRIMARY KEY,
+                versao  INTEGER NOT NULL
+            )
+        """)
+
+    cursor.execute("""
+        INSERT INTO VendasVersao (mes, versao)
+        SELECT DISTINCT mes, 1 FROM VendasMesCliente
+        WHERE mes NOT IN (SELECT mes FROM VendasVersao)
+    """)
@@ -0,0 +1,24 @@
+"""
+Sinal de vida das tarefas em segundo plano (Tarefas.atualizado_em).
+
+O worker dono de cada tarefa pendente ou em execução atualiza a coluna
+periodicamente; uma tarefa sem sinal há mais de TAREFAS_SEM_SINAL_S é dada
+como perdida. Substitui a checagem pelo PID em Tarefas.processo, que não
+vale entre máquinas nem no Windows.
+"""
+
+VERSAO = 10
+DESCRICAO = "Coluna Tarefas.atualizado_em (sinal de vida do worker)"
+
+
+def aplicar(cursor, backend):
+    if backend == "sqlserver":
+        cursor.execute("""
+            IF COL_LENGTH('Tarefas', 'atualizado_em') IS NULL
+            ALTER TABLE Tarefas ADD atualizado_em DATETIME NULL
+        """)
+    else:
+        cursor.execute("PRAGMA table_info(Tarefas)")
+        colunas = {row[1] for row in cursor.fetchall()}
+        if "atualizado_em" not in colunas:
+            cursor.execute("ALTER TABLE Tarefas ADD COLUMN atualizado_em DATETIME")
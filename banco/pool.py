@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo limite de checkout."""
+
+
+# ==================== CONEXÃO EMPRESTADA ====================
+class ConexaoPool:
+    """
+    Envelope da conexão emprestada pelo pool.
+
+    Mantém a mesma interface usada pelas rotas (cursor, commit, rollback,
+    close e `with get_connection() as conn`), mas ao fechar ou sair do bloco
+    `with` a conexão volta para o pool em vez de ser encerrada.
+    """
+
+    def __init__(self, pool, entrada):
+        self._pool = pool
+        self._entrada = entrada
+        self._conn = entrada.conn
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        if self._pool.envelope_cursor:
+            return self._pool.envelope_cursor(cursor)
+        return cursor
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._entrada is None:
+            return
+        entrada, self._entrada = self._entrada, None
+        self._pool.devolver(entrada)
+
+    @property
+    def fechada(self):
+        return self._entrada is None
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        # Mesmo comportamento do pyodbc: commit se deu certo, rollback se não.
+        # Falha no commit sobe para quem chamou (nada foi gravado); falha no
+        # rollback durante outra exceção só descarta a conexão.
+        if self._entrada is None:
+            return False
+        try:
+            if tipo is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        except Exception:
+            self._entrada.quebrada = True
+            if tipo is None:
+                raise
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        # Rede de segurança para rotas que esquecem de fechar a conexão
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class _Entrada:
+    __slots__ = ("conn", "criada_em", "usada_em", "quebrada")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.criada_em = time.monotonic()
+        self.usada_em = self.criada_em
+        self.quebrada = False
+
+
+# ==================== POOL ====================
+class PoolConexoes:
+    """
+    Pool limitado de conexões.
+
+    - `tamanho`: máximo de conexões abertas (em uso + ociosas)
+    - `timeout`: segundos aguardando uma conexão livre antes de PoolEsgotado
+    - `reciclar`: idade máxima (s) de uma conexão antes de ser reaberta
+    - `pre_ping`: testa a conexão ociosa antes de entregá-la
+    - `envelope_cursor`: função aplicada a todo cursor criado (instrumentação)
+    """
+
+    def __init__(self, fabrica, tamanho=10, timeout=30.0, reciclar=1800,
+                 pre_ping=True, ping=None, nome="principal", envelope_cursor=None):
+        self.fabrica = fabrica
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self.pre_ping = pre_ping
+        self.ping = ping or _ping_padrao
+        self.nome = nome
+        self.envelope_cursor = envelope_cursor
+
+        self._cond = threading.Condition()
+        self._ociosas = deque()
+        self._abertas = 0
+        self._pid = os.getpid()
+
+        self._criadas = 0
+        self._descartadas = 0
+        self._checkouts = 0
+        self._esperas = 0
+        self._tempo_espera = 0.0
+        self._timeouts = 0
+        self._falhas_ping = 0
+
+    # ---------------- CHECKOUT ----------------
+    def obter(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        entrada = None
+
+        with self._cond:
+            self._verificar_fork()
+
+            if not self._ociosas and self._abertas >= self.tamanho:
+                self._esperas += 1
+                inicio = time.monotonic()
+                limite = inicio + timeout
+
+                while not self._ociosas and self._abertas >= self.tamanho:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._tempo_espera += time.monotonic() - inicio
+                        self._timeouts += 1
+                        raise PoolEsgotado(
+                            f"Pool '{self.nome}' esgotado: {self.tamanho} conexões "
+                            f"em uso após {timeout:.1f}s de espera."
+                        )
+                    self._cond.wait(restante)
+
+                self._tempo_espera += time.monotonic() - inicio
+
+            if self._ociosas:
+                entrada = self._ociosas.pop()
+            else:
+                self._abertas += 1
+            self._checkouts += 1
+
+        try:
+            entrada = self._preparar(entrada)
+        except Exception:
+            with self._cond:
+                self._abertas -= 1
+                self._cond.notify()
+            raise
+
+        return ConexaoPool(self, entrada)
+
+    def _preparar(self, entrada):
+        if entrada is not None:
+            agora = time.monotonic()
+            velha = self.reciclar and agora - entrada.criada_em > self.reciclar
+            if velha:
+                self._fechar(entrada)
+                entrada = None
+            elif self.pre_ping:
+                try:
+                    self.ping(entrada.conn)
+                except Exception:
+                    with self._cond:
+                        self._falhas_ping += 1
+                    self._fechar(entrada)
+                    entrada = None
+
+        if entrada is None:
+            entrada = _Entrada(self.fabrica())
+            with self._cond:
+                self._criadas += 1
+
+        return entrada
+
+    # ---------------- DEVOLUÇÃO ----------------
+    def devolver(self, entrada):
+        if not entrada.quebrada:
+            try:
+                # Garante que nenhuma transação pendente vá para o próximo uso
+                entrada.conn.rollback()
+            except Exception:
+                entrada.quebrada = True
+
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+
+            if entrada.quebrada:
+                self._abertas -= 1
+            else:
+                entrada.usada_em = time.monotonic()
+                self._ociosas.append(entrada)
+            self._cond.notify()
+
+        if entrada.quebrada:
+            self._fechar(entrada)
+
+    def _fechar(self, entrada):
+        try:
+            entrada.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._descartadas += 1
+
+    def _verificar_fork(self):
+        # Conexões herdadas de outro processo não podem ser reutilizadas
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._ociosas.clear()
+            self._abertas = 0
+
+    def fechar_todas(self):
+        with self._cond:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+            self._abertas -= len(ociosas)
+        for entrada in ociosas:
+            self._fechar(entrada)
+
+    # ---------------- MÉTRICAS ----------------
+    def metricas(self):
+        with self._cond:
+            ociosas = len(self._ociosas)
+            return {
+                "nome": self.nome,
+                "tamanho": self.tamanho,
+                "abertas": self._abertas,
+                "em_uso": self._abertas - ociosas,
+                "ociosas": ociosas,
+                "checkouts": self._checkouts,
+                "criadas": self._criadas,
+                "descartadas": self._descartadas,
+                "esperas": self._esperas,
+                "tempo_espera_total": round(self._tempo_espera, 6),
+                "timeouts": self._timeouts,
+                "falhas_ping": self._falhas_ping,
+            }
+
+
+def _ping_padrao(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
@@ -0,0 +1,97 @@
+"""
+Roteamento de leitura/escrita entre o banco principal e a réplica.
+
+- Views marcadas com @somente_leitura pedem conexão da réplica.
+- Se a réplica estiver fora do ar, a conexão vem do principal e a réplica
+  fica em quarentena por `quarentena` segundos antes de nova tentativa.
+- Depois que o usuário grava algo (marcar_escrita), as leituras dele vão
+  para o principal durante `janela_escrita` segundos, para que ele veja o
+  que acabou de salvar mesmo com atraso de replicação.
+"""
+import contextvars
+import threading
+import time
+from functools import wraps
+
+from flask import has_request_context, session
+
+_somente_leitura = contextvars.ContextVar("somente_leitura", default=False)
+
+
+# ==================== ANOTAÇÃO DAS ROTAS ====================
+def somente_leitura(func):
+    """Decorator para views que só leem do banco."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _somente_leitura.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _somente_leitura.reset(token)
+    return wrapper
+
+
+def marcar_escrita():
+    """Abre a janela de leitura no principal para o usuário atual."""
+    if has_request_context():
+        session["ultima_escrita"] = time.time()
+
+
+def _ultima_escrita():
+    if not has_request_context():
+        return 0.0
+    return session.get("ultima_escrita", 0.0)
+
+
+# ==================== ROTEADOR ====================
+class Roteador:
+    def __init__(self, primario, replica=None, janela_escrita=5.0,
+                 quarentena=30.0, timeout_replica=2.0):
+        self.primario = primario
+        self.replica = replica
+        self.janela_escrita = janela_escrita
+        self.quarentena = quarentena
+        self.timeout_replica = timeout_replica
+
+        self._lock = threading.Lock()
+        self._replica_fora_ate = 0.0
+        self._leituras_replica = 0
+        self._leituras_primario = 0
+        self._fallbacks = 0
+
+    def obter(self):
+        if self.replica is not None and _somente_leitura.get():
+            if time.time() - _ultima_escrita() > self.janela_escrita:
+                conn = self._obter_replica()
+                if conn is not None:
+                    return conn
+            with self._lock:
+                self._leituras_primario += 1
+
+        return self.primario.obter()
+
+    def _obter_replica(self):
+        if time.monotonic() < self._replica_fora_ate:
+            return None
+
+        try:
+            conn = self.replica.obter(timeout=self.timeout_replica)
+        except Exception:
+            with self._lock:
+                self._fallbacks += 1
+                self._replica_fora_ate = time.monotonic() + self.quarentena
+            return None
+
+        with self._lock:
+            self._leituras_replica += 1
+        return conn
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "replica_configurada": self.replica is not None,
+                "replica_disponivel": time.monotonic() >= self._replica_fora_ate,
+                "leituras_replica": self._leituras_replica,
+                "leituras_primario": self._leituras_primario,
+                "fallbacks": self._fallbacks,
+            }
@@ -0,0 +1,86 @@
+"""
+Schema do banco local (SQLite), espelhando as tabelas do SQL Server.
+"""
+
+SCHEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS Perfis (
+    id      INTEGER PRIMARY KEY,
+    nome    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS PerfilTelas (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    perfil_id   INTEGER NOT NULL REFERENCES Perfis(id),
+    tela_nome   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Usuarios (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome        TEXT NOT NULL,
+    email       TEXT NOT NULL UNIQUE,
+    senha_hash  TEXT NOT NULL,
+    ativo       INTEGER NOT NULL DEFAULT 1,
+    perfil_id   INTEGER NOT NULL REFERENCES Perfis(id)
+);
+
+CREATE TABLE IF NOT EXISTS Clientes (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome        TEXT NOT NULL,
+    email       TEXT,
+    telefone    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS Produtos (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome    TEXT NOT NULL,
+    preco   REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Pedidos (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    cliente_id  INTEGER NOT NULL REFERENCES Clientes(id),
+    data        DATETIME NOT NULL,
+    pagamento   TEXT,
+    status      TEXT,
+    produtos    TEXT,
+    total_bruto REAL,
+    desconto    REAL,
+    total       REAL
+);
+
+CREATE TABLE IF NOT EXISTS empresa (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome        TEXT,
+    cnpj        TEXT,
+    endereco    TEXT,
+    telefone    TEXT,
+    logo        TEXT,
+    ativo       INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+# Perfis fixos usados por permissoes.tela_necessaria
+DADOS_INICIAIS_SQLITE = """
+INSERT OR IGNORE INTO Perfis (id, nome) VALUES
+    (1, 'Admin'),
+    (2, 'Usuário'),
+    (3, 'Usuário Avançado');
+
+INSERT INTO PerfilTelas (perfil_id, tela_nome)
+SELECT p.perfil_id, p.tela_nome
+FROM (
+    SELECT 1 AS perfil_id, 'dashboard' AS tela_nome UNION ALL
+    SELECT 1, 'clientes' UNION ALL
+    SELECT 1, 'produtos' UNION ALL
+    SELECT 1, 'pedidos' UNION ALL
+    SELECT 1, 'usuarios' UNION ALL
+    SELECT 1, 'empresa' UNION ALL
+    SELECT 2, 'pedidos' UNION ALL
+    SELECT 3, 'dashboard' UNION ALL
+    SELECT 3, 'clientes' UNION ALL
+    SELECT 3, 'produtos' UNION ALL
+    SELECT 3, 'pedidos' UNION ALL
+    SELECT 3, 'empresa'
+) p
+WHERE NOT EXISTS (SELECT 1 FROM PerfilTelas);
+"""
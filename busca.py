@@ -0,0 +1,263 @@
+"""
+Busca de clientes e produtos para os campos de autocompletar.
+
+Os formulários de pedido não embutem mais a tabela inteira em <option>;
+consultam /busca/clientes?q=... e /busca/produtos?q=... enquanto o usuário
+digita. As respostas saem de um índice em memória por worker:
+
+- nomes "dobrados" (minúsculas, sem acento), cada palavra numa lista
+  ordenada; cada palavra digitada é procurada como prefixo por bisect
+- com menos resultados que o limite, completa com busca por trecho
+  (a partir de 3 letras) com str.find sobre os nomes concatenados
+- o índice de clientes é reconstruído quando o carimbo ClientesVersao muda;
+  o de produtos acompanha o catálogo (ProdutosVersao)
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from flask import Blueprint, request, jsonify
+
+from catalogo import catalogo
+from config import BUSCA_VERIFICAR_S, BUSCA_LIMITE
+from database import get_write_connection
+from permissoes import tela_necessaria
+
+busca_bp = Blueprint("busca", __name__, url_prefix="/busca")
+
+Cliente = namedtuple("Cliente", "id nome email")
+
+# Busca por trecho só a partir deste tamanho (trechos curtos casam com tudo)
+TRECHO_MINIMO = 3
+# Máximo de nomes examinados na busca por trecho (limita o pior caso)
+TRECHO_CANDIDATOS = 1000
+
+
+def dobrar(texto):
+    """'  João Ávila' -> 'joao avila' (minúsculas, sem acento)."""
+    texto = unicodedata.normalize("NFKD", (texto or "").strip().lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _palavras(dobrado):
+    # O email também conta: "ana.souza@x.com" -> ana, souza, x, com
+    return dobrado.replace("@", " ").replace(".", " ").split()
+
+
+# ==================== ÍNDICE ====================
+class IndicePrefixo:
+    """
+    Índice imutável de registros por nome. `texto(registro)` é o que se
+    pesquisa (nome e, para clientes, o email); a ordem é a da lista recebida.
+    """
+
+    def __init__(self, registros, texto):
+        self.registros = list(registros)
+        self._dobrados = [dobrar(texto(r)) for r in self.registros]
+
+        # Palavras ordenadas, com a posição do registro em lista paralela
+        pares = sorted(
+            (palavra, posicao)
+            for posicao, dobrado in enumerate(self._dobrados)
+            for palavra in set(_palavras(dobrado))
+        )
+        self._palavras = [palavra for palavra, _ in pares]
+        self._posicoes = [posicao for _, posicao in pares]
+
+        # Todos os nomes num texto só, para a busca por trecho usar str.find
+        self._texto = "\n".join(self._dobrados)
+        self._inicios = []
+        inicio = 0
+        for dobrado in self._dobrados:
+            self._inicios.append(inicio)
+            inicio += len(dobrado) + 1
+
+    def __len__(self):
+        return len(self.registros)
+
+    def _por_prefixo(self, chave):
+        i = bisect_left(self._palavras, chave)
+        j = bisect_left(self._palavras, chave + "\uffff", i)
+        return set(self._posicoes[i:j])
+
+    def _por_trecho(self, chave):
+        inicio = self._texto.find(chave)
+        while inicio != -1:
+            posicao = bisect_right(self._inicios, inicio) - 1
+            yield posicao
+            # Continua a partir do próximo registro
+            proximo = self._inicios[posicao + 1] if posicao + 1 < len(self._inicios) else len(self._texto)
+            inicio = self._texto.find(chave, proximo)
+
+    def buscar(self, termo, limite=BUSCA_LIMITE):
+        termos = _palavras(dobrar(termo))
+        if not termos:
+            return self.registros[:limite]
+
+        # 1) cada palavra do termo é início de alguma palavra do nome
+        conjuntos = sorted((self._por_prefixo(t) for t in termos), key=len)
+        achados = sorted(conjuntos[0].intersection(*conjuntos[1:]))[:limite]
+
+        # 2) completa com nomes que contêm os trechos em qualquer lugar,
+        #    procurando o trecho mais longo (mais seletivo)
+        chave = max(termos, key=len)
+        outras = [t for t in termos if t is not chave]
+
+        def casa(posicao):
+            return all(t in self._dobrados[posicao] for t in outras)
+
+        if len(achados) < limite and len(chave) >= TRECHO_MINIMO:
+            ja = set(achados)
+            for examinados, posicao in enumerate(self._por_trecho(chave)):
+                if examinados >= TRECHO_CANDIDATOS:
+                    break
+                if posicao not in ja and casa(posicao):
+                    achados.append(posicao)
+                    if len(achados) >= limite:
+                        break
+
+        return [self.registros[p] for p in achados]
+
+
+# ==================== CLIENTES ====================
+class IndiceClientes:
+    """
+    Clientes (id, nome, email) em memória, indexados para busca.
+
+    Reconstruído quando o carimbo ClientesVersao muda (verificado no máximo
+    a cada `intervalo` segundos, ou na hora depois de invalidar()).
+    """
+
+    def __init__(self, intervalo=5.0):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # (índice, id -> Cliente); trocado de uma vez
+        self._estado = (IndicePrefixo([], lambda c: ""), {})
+        self._versao = None
+        self._verificado_em = 0.0
+        self.cargas = 0
+        self.buscas = 0
+
+    def _atualizar(self):
+        if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+                return
+
+            with get_write_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT versao FROM ClientesVersao WHERE id = 1")
+                row = cursor.fetchone()
+                versao = row[0] if row else 0
+
+                if versao != self._versao:
+                    self._carregar(cursor)
+                    self._versao = versao
+
+            self._verificado_em = time.monotonic()
+
+    def _carregar(self, cursor):
+        cursor.execute("SELECT id, nome, email FROM Clientes ORDER BY nome")
+        lista = [Cliente(int(r[0]), r[1] or "", r[2] or "") for r in cursor.fetchall()]
+        indice = IndicePrefixo(lista, lambda c: f"{c.nome} {c.email}")
+        self._estado = (indice, {c.id: c for c in lista})
+        self.cargas += 1
+
+    def invalidar(self):
+        """Força a verificação do carimbo na próxima consulta."""
+        self._verificado_em = 0.0
+
+    def buscar(self, termo, limite=BUSCA_LIMITE):
+        self._atualizar()
+        self.buscas += 1
+        return self._estado[0].buscar(termo, limite)
+
+    def obter(self, cliente_id):
+        """Cliente pelo id (para preencher o campo já selecionado), ou None."""
+        self._atualizar()
+        try:
+            return self._estado[1].get(int(cliente_id))
+        except (TypeError, ValueError):
+            return None
+
+    def metricas(self):
+        return {
+            "versao": self._versao,
+            "clientes": len(self._estado[0]),
+            "cargas": self.cargas,
+            "buscas": self.buscas,
+        }
+
+
+# ==================== PRODUTOS ====================
+class IndiceProdutos:
+    """Índice de busca sobre o catálogo; reconstruído quando o catálogo recarrega."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lista = None
+        self._indice = IndicePrefixo([], lambda p: "")
+        self.cargas = 0
+        self.buscas = 0
+
+    def buscar(self, termo, limite=BUSCA_LIMITE):
+        lista = catalogo.listar()
+        if lista is not self._lista:
+            with self._lock:
+                if lista is not self._lista:
+                    self._indice = IndicePrefixo(lista, lambda p: p.nome)
+                    self._lista = lista
+                    self.cargas += 1
+        self.buscas += 1
+        return self._indice.buscar(termo, limite)
+
+    def metricas(self):
+        return {
+            "produtos": len(self._indice),
+            "cargas": self.cargas,
+            "buscas": self.buscas,
+        }
+
+
+indice_clientes = IndiceClientes(BUSCA_VERIFICAR_S)
+indice_produtos = IndiceProdutos()
+
+
+def incrementar_versao_clientes(cursor):
+    """
+    Incrementa o carimbo dos clientes. Chamar na mesma transação que altera
+    Clientes; depois do commit chamar indice_clientes.invalidar().
+    """
+    cursor.execute("UPDATE ClientesVersao SET versao = versao + 1 WHERE id = 1")
+
+
+# =====================================================
+# ROTAS (JSON)
+# =====================================================
+def _limite():
+    try:
+        return max(1, min(int(request.args.get("limite", BUSCA_LIMITE)), 100))
+    except ValueError:
+        return BUSCA_LIMITE
+
+
+@busca_bp.route("/clientes")
+@tela_necessaria("Pedidos")
+def busca_clientes():
+    resultados = indice_clientes.buscar(request.args.get("q", ""), _limite())
+    return jsonify([
+        {"id": c.id, "nome": c.nome, "email": c.email} for c in resultados
+    ])
+
+
+@busca_bp.route("/produtos")
+@tela_necessaria("Pedidos")
+def busca_produtos():
+    resultados = indice_produtos.buscar(request.args.get("q", ""), _limite())
+    return jsonify([
+        {"id": p.id, "nome": p.nome, "preco": p.preco} for p in resultados
+    ])
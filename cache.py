@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheValor:
+    """
+    Guarda um único valor carregado sob demanda.
+
+    - `carregar`: função sem argumentos que busca o valor (ex.: no banco)
+    - `ttl`: segundos até recarregar mesmo sem invalidação; cobre o caso de
+      vários workers, em que só o worker que gravou recebe o invalidar()
+    """
+
+    def __init__(self, carregar, ttl=60):
+        self.carregar = carregar
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._estado = None  # (valor, carregado_em)
+        self.acertos = 0
+        self.falhas = 0
+
+    def _valido(self, estado):
+        return estado is not None and time.monotonic() - estado[1] < self.ttl
+
+    def obter(self):
+        estado = self._estado
+        if self._valido(estado):
+            self.acertos += 1
+            return estado[0]
+
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            estado = self._estado
+            if not self._valido(estado):
+                self.falhas += 1
+                estado = self._estado = (self.carregar(), time.monotonic())
+            return estado[0]
+
+    def invalidar(self):
+        with self._lock:
+            self._estado = None
+
+
+class CacheChaves:
+    """
+    Valores por chave, carregados sob demanda com `carregar(chave)`.
+
+    - `obter(chave, ttl)`: sem valor, carrega na hora; com valor vencido
+      (mais velho que `ttl` segundos) devolve o valor velho e recarrega em
+      segundo plano (stale-while-revalidate); `ttl=None` não vence nunca
+    - `descartar(predicado)`: remove as entradas em que predicado(chave, valor)
+      é verdadeiro; a próxima consulta carrega de novo
+    - no máximo `tamanho` chaves; as menos usadas saem primeiro
+    """
+
+    def __init__(self, carregar, tamanho=128):
+        self.carregar = carregar
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # chave -> (valor, carregado_em, ttl)
+        self._cargas = {}               # chave -> Lock da carga em andamento
+        self._atualizando = set()
+        self.acertos = 0
+        self.vencidos = 0
+        self.falhas = 0
+        self.erros = 0
+
+    def obter(self, chave, ttl=None):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                valor, carregado_em, _ = entrada
+                if ttl is None or time.monotonic() - carregado_em < ttl:
+                    self.acertos += 1
+                    return valor
+
+                self.vencidos += 1
+                if chave not in self._atualizando:
+                    self._atualizando.add(chave)
+                    threading.Thread(
+                        target=self._atualizar, args=(chave, ttl),
+                        name="cache-atualizar", daemon=True,
+                    ).start()
+                return valor
+
+            trava = self._cargas.setdefault(chave, threading.Lock())
+
+        # Uma carga por chave; quem chega depois espera e aproveita o resultado
+        with trava:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+                if entrada is not None:
+                    self.acertos += 1
+                    return entrada[0]
+                self.falhas += 1
+
+            try:
+                valor = self.carregar(chave)
+                self._guardar(chave, valor, ttl)
+            finally:
+                with self._lock:
+                    self._cargas.pop(chave, None)
+            return valor
+
+    def _atualizar(self, chave, ttl):
+        try:
+            self._guardar(chave, self.carregar(chave), ttl)
+        except Exception:
+            # Continua servindo o valor velho; tenta de novo na próxima consulta
+            self.erros += 1
+        finally:
+            with self._lock:
+                self._atualizando.discard(chave)
+
+    def _guardar(self, chave, valor, ttl):
+        with self._lock:
+            self._entradas[chave] = (valor, time.monotonic(), ttl)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho:
+                self._entradas.popitem(last=False)
+
+    def descartar(self, predicado=None):
+        """Remove as entradas que satisfazem `predicado` (todas, se None)."""
+        with self._lock:
+            for chave, (valor, _, _) in list(self._entradas.items()):
+                if predicado is None or predicado(chave, valor):
+                    del self._entradas[chave]
+
+    def metricas(self):
+        return {
+            "entradas": len(self._entradas),
+            "tamanho": self.tamanho,
+            "acertos": self.acertos,
+            "vencidos": self.vencidos,
+            "falhas": self.falhas,
+            "atualizando": len(self._atualizando),
+            "erros": self.erros,
+        }
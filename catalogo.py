@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import namedtuple
+
+from config import PRODUTOS_VERIFICAR_S
+from database import get_write_connection
+
+Produto = namedtuple("Produto", "id nome preco")
+
+# Limite de parâmetros por IN (o SQL Server aceita até 2100 por comando)
+LOTE_IN = 500
+
+
+# ==================== CATÁLOGO DE PRODUTOS ====================
+class CatalogoProdutos:
+    """
+    Cadastro de produtos (id -> nome, preço) em memória.
+
+    Recarregado quando o carimbo ProdutosVersao muda (verificado no máximo
+    a cada `intervalo` segundos, ou na hora depois de invalidar()). Ids que
+    não estão no catálogo são buscados de uma vez, com um único IN.
+    """
+
+    def __init__(self, intervalo=5.0):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # (lista ordenada por nome, id -> Produto); trocado de uma vez
+        self._estado = ([], {})
+        self._versao = None
+        self._verificado_em = 0.0
+        self.cargas = 0
+        self.acertos = 0
+        self.buscas_banco = 0
+
+    # ---------------- CARGA ----------------
+    def _atualizar(self):
+        if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+                return
+
+            with get_write_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT versao FROM ProdutosVersao WHERE id = 1")
+                row = cursor.fetchone()
+                versao = row[0] if row else 0
+
+                if versao != self._versao:
+                    self._carregar(cursor)
+                    self._versao = versao
+
+            self._verificado_em = time.monotonic()
+
+    def _carregar(self, cursor):
+        cursor.execute("SELECT id, nome, preco FROM Produtos ORDER BY nome")
+        lista = [Produto(int(r[0]), r[1], float(r[2] or 0)) for r in cursor.fetchall()]
+        self._estado = (lista, {p.id: p for p in lista})
+        self.cargas += 1
+
+    def invalidar(self):
+        """Força a verificação do carimbo na próxima consulta."""
+        self._verificado_em = 0.0
+
+    # ---------------- CONSULTAS ----------------
+    def listar(self):
+        """Todos os produtos, em ordem de nome (para os selects dos formulários)."""
+        self._atualizar()
+        return self._estado[0]
+
+    def buscar(self, cursor, ids):
+        """
+        {id: Produto} para os ids pedidos (ids inexistentes ficam de fora).
+        Os que faltam no catálogo vêm do banco numa consulta por lote.
+        """
+        self._atualizar()
+        por_id = self._estado[1]
+
+        encontrados = {}
+        faltando = []
+        for pid in ids:
+            try:
+                pid = int(pid)
+            except (TypeError, ValueError):
+                continue
+            produto = por_id.get(pid)
+            if produto:
+                encontrados[pid] = produto
+            elif pid not in faltando:
+                faltando.append(pid)
+
+        self.acertos += len(encontrados)
+
+        for i in range(0, len(faltando), LOTE_IN):
+            lote = faltando[i:i + LOTE_IN]
+            cursor.execute(
+                f"SELECT id, nome, preco FROM Produtos WHERE id IN ({', '.join('?' * len(lote))})",
+                lote
+            )
+            self.buscas_banco += 1
+            for r in cursor.fetchall():
+                encontrados[int(r[0])] = Produto(int(r[0]), r[1], float(r[2] or 0))
+
+        return encontrados
+
+    def metricas(self):
+        return {
+            "versao": self._versao,
+            "produtos": len(self._estado[0]),
+            "cargas": self.cargas,
+            "acertos": self.acertos,
+            "buscas_banco": self.buscas_banco,
+        }
+
+
+catalogo = CatalogoProdutos(PRODUTOS_VERIFICAR_S)
+
+
+def incrementar_versao(cursor):
+    """
+    Incrementa o carimbo do catálogo. Chamar na mesma transação que altera
+    Produtos; depois do commit chamar catalogo.invalidar().
+    """
+    cursor.execute("UPDATE ProdutosVersao SET versao = versao + 1 WHERE id = 1")
@@ -1,14 +1,18 @@
 import csv
 import io
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_connection
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from busca import indice_clientes, incrementar_versao_clientes
+from database import get_connection, somente_leitura, marcar_escrita
 from permissoes import tela_necessaria
+from recibos import recibos
+from tarefas import executor, tipo_tarefa
 
 clientes_bp = Blueprint("clientes", __name__, url_prefix="/clientes")
 
 # ================= LISTAR =================
 @clientes_bp.route("/")
 @tela_necessaria("Clientes")
+@somente_leitura
 def clientes_lista():
     pagina = request.args.get("page", 1, type=int)
     por_pagina = 10
@@ -84,7 +88,10 @@ def clientes_novo():
                 "INSERT INTO Clientes (nome, email, telefone) VALUES (?, ?, ?)",
                 (nome, email, telefone)
             )
+            incrementar_versao_clientes(cursor)
             conn.commit()
+            marcar_escrita()
+            indice_clientes.invalidar()
 
         flash("Cliente criado com sucesso!", "success")
         return redirect(url_for("clientes.clientes_lista"))
@@ -107,7 +114,13 @@ def clientes_editar(id):
                 "UPDATE Clientes SET nome=?, email=?, telefone=? WHERE id=?",
                 (nome, email, telefone, id)
             )
+            incrementar_versao_clientes(cursor)
             conn.commit()
+            marcar_escrita()
+            indice_clientes.invalidar()
+
+            # O nome do cliente aparece nos recibos já renderizados
+            recibos.invalidar_cliente(id)
 
             flash("Cliente atualizado com sucesso!", "success")
             return redirect(url_for("clientes.clientes_lista"))
@@ -127,7 +140,10 @@ def clientes_excluir(id):
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM Clientes WHERE id=?", (id,))
+        incrementar_versao_clientes(cursor)
         conn.commit()
+        marcar_escrita()
+        indice_clientes.invalidar()
 
     flash("Cliente excluído com sucesso!", "success")
     return redirect(url_for("clientes.clientes_lista"))
@@ -135,7 +151,61 @@ def clientes_excluir(id):
 # ==========================================
 # IMPORTAR CLIENTES VIA CSV (UPSERT)
 # ==========================================
+@tipo_tarefa("importar_clientes", "Importação de clientes", voltar="clientes.clientes_lista")
+def importar_clientes_csv(conn, texto, progresso):
+    """Tarefa em segundo plano: upsert dos clientes do CSV (por email)."""
+    linhas = list(csv.DictReader(io.StringIO(texto), delimiter=";"))
+    cursor = conn.cursor()
+
+    inseridos = 0
+    atualizados = 0
+
+    for numero, linha in enumerate(linhas, start=1):
+        progresso(numero, len(linhas))
+
+        nome = (linha.get("nome") or "").strip()
+        email = (linha.get("email") or "").strip().lower()
+        telefone = (linha.get("telefone") or "").strip()
+
+        if not nome or not email:
+            continue
+
+        # 🔎 Verifica se cliente já existe (por email)
+        cursor.execute(
+            "SELECT id FROM clientes WHERE email = ?",
+            (email,)
+        )
+        cliente = cursor.fetchone()
+
+        if cliente:
+            # ✏️ Atualiza cliente existente
+            cursor.execute("""
+                UPDATE clientes
+                SET nome = ?, telefone = ?
+                WHERE id = ?
+            """, (nome, telefone, cliente.id))
+
+            atualizados += 1
+        else:
+            # ➕ Insere novo cliente
+            cursor.execute("""
+                INSERT INTO clientes (nome, email, telefone)
+                VALUES (?, ?, ?)
+            """, (nome, email, telefone))
+
+            inseridos += 1
+
+    incrementar_versao_clientes(cursor)
+    conn.commit()
+    indice_clientes.invalidar()
+    if atualizados:
+        recibos.limpar()
+
+    return {"linhas": len(linhas), "inseridos": inseridos, "atualizados": atualizados}
+
+
 @clientes_bp.route("/importar", methods=["GET", "POST"])
+@tela_necessaria("Clientes")
 def importar_csv():
     if request.method == "POST":
         arquivo = request.files.get("arquivo")
@@ -150,61 +220,15 @@ def importar_csv():
 
         try:
             # 🔹 Corrige acentuação do Excel (UTF-8 com BOM)
-            stream = io.StringIO(
-                arquivo.stream.read().decode("utf-8-sig")
-            )
-            leitor = csv.DictReader(stream, delimiter=";")
+            texto = arquivo.stream.read().decode("utf-8-sig")
 
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            inseridos = 0
-            atualizados = 0
-
-            for linha in leitor:
-                nome = (linha.get("nome") or "").strip()
-                email = (linha.get("email") or "").strip().lower()
-                telefone = (linha.get("telefone") or "").strip()
-
-                if not nome or not email:
-                    continue
-
-                # 🔎 Verifica se cliente já existe (por email)
-                cursor.execute(
-                    "SELECT id FROM clientes WHERE email = ?",
-                    (email,)
-                )
-                cliente = cursor.fetchone()
-
-                if cliente:
-                    # ✏️ Atualiza cliente existente
-                    cursor.execute("""
-                        UPDATE clientes
-                        SET nome = ?, telefone = ?
-                        WHERE id = ?
-                    """, (nome, telefone, cliente.id))
-
-                    atualizados += 1
-                else:
-                    # ➕ Insere novo cliente
-                    cursor.execute("""
-                        INSERT INTO clientes (nome, email, telefone)
-                        VALUES (?, ?, ?)
-                    """, (nome, email, telefone))
-
-                    inseridos += 1
-
-            conn.commit()
-            conn.close()
-
-            flash(
-                f"Importação concluída: "
-                f"{inseridos} novos, {atualizados} atualizados.",
-                "success"
+            # Processada em segundo plano; a tela da tarefa mostra o progresso
+            tarefa_id = executor.enviar(
+                "importar_clientes", texto, usuario_id=session.get("user_id")
             )
-            return redirect(url_for("clientes.clientes_lista"))
+            return redirect(url_for("tarefas.tarefa_detalhe", id=tarefa_id))
 
         except Exception as e:
             flash(f"Erro ao importar CSV: {str(e)}", "danger")
 
-    return render_template("clientes_importar_csv.html")
\ No newline at end of file
+    return render_template("clientes_importar_csv.html")
@@ -0,0 +1,121 @@
+"""
+Codificação dos itens gravados em Pedidos.produtos.
+
+A biblioteca JSON é escolhida na importação (CODEC_JSON): "auto" usa
+orjson ou ujson se estiverem instalados e cai no json da biblioteca padrão.
+O texto gravado é sempre JSON (lista de objetos, igual ao legado).
+
+Pedidos.produtos é só gravado, durante a transição para PedidoItens: as
+telas, o recibo e o dashboard leem PedidoItens e os resumos de vendas, e a
+migração m0003 lê o JSON legado. Por isso não há formato binário nem
+decodificação aqui.
+
+Benchmark de codificação com pedidos realistas:
+
+    python -m codec [quantidade de pedidos]
+"""
+import json
+import random
+import sys
+import time
+
+from config import CODEC_JSON
+
+
+# ==================== BIBLIOTECAS JSON ====================
+def _json_padrao():
+    return (
+        "json",
+        lambda valor: json.dumps(valor, ensure_ascii=False, separators=(",", ":")),
+        json.loads,
+    )
+
+
+def _orjson():
+    import orjson
+    return "orjson", lambda valor: orjson.dumps(valor).decode("utf-8"), orjson.loads
+
+
+def _ujson():
+    import ujson
+    return "ujson", lambda valor: ujson.dumps(valor, ensure_ascii=False), ujson.loads
+
+
+_BIBLIOTECAS = {"orjson": _orjson, "ujson": _ujson, "json": _json_padrao}
+
+
+def escolher_biblioteca(nome="auto"):
+    """(nome, dumps, loads) da biblioteca pedida; "auto" = a mais rápida instalada."""
+    if nome != "auto":
+        return _BIBLIOTECAS[nome]()
+    for candidata in ("orjson", "ujson"):
+        try:
+            return _BIBLIOTECAS[candidata]()
+        except ImportError:
+            continue
+    return _json_padrao()
+
+
+BIBLIOTECA, _dumps, _loads = escolher_biblioteca(CODEC_JSON)
+
+
+# ==================== CODIFICAÇÃO ====================
+def codificar(itens):
+    """Lista de itens (dicts) -> JSON para Pedidos.produtos."""
+    return _dumps(itens)
+
+
+# ==================== BENCHMARK ====================
+_NOMES = ["Arroz 5kg", "Feijão carioca", "Açúcar refinado", "Café torrado",
+          "Óleo de soja", "Macarrão espaguete", "Leite integral", "Pão francês"]
+
+
+def _pedidos_exemplo(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    pedidos = []
+    for _ in range(quantidade):
+        itens = []
+        for _ in range(aleatorio.choice([1, 2, 3, 5, 8, 12, 20, 40])):
+            qtd = aleatorio.randint(1, 10)
+            preco = round(aleatorio.uniform(1, 80), 2)
+            itens.append({
+                "id": aleatorio.choice([None, aleatorio.randint(1, 5000)]),
+                "nome": aleatorio.choice(_NOMES),
+                "quantidade": qtd,
+                "preco": preco,
+                "subtotal": round(qtd * preco, 2),
+            })
+        pedidos.append(itens)
+    return pedidos
+
+
+def benchmark(quantidade=20000, log=print):
+    """Pedidos codificados por segundo em cada biblioteca instalada."""
+    pedidos = _pedidos_exemplo(quantidade)
+    resultados = []
+
+    for nome in _BIBLIOTECAS:
+        try:
+            _, dumps, loads = escolher_biblioteca(nome)
+        except ImportError:
+            log(f"{nome:8} não instalado")
+            continue
+
+        inicio = time.perf_counter()
+        textos = [dumps(itens) for itens in pedidos]
+        segundos = time.perf_counter() - inicio
+
+        # Confere que o texto continua sendo o JSON legado
+        assert json.loads(textos[0]) == loads(textos[0]) == pedidos[0]
+        tamanho = sum(len(t.encode("utf-8")) for t in textos) / len(textos)
+
+        resultados.append((nome, quantidade / segundos, tamanho))
+        log(f"{nome:8} {quantidade / segundos:>10.0f} pedidos/s "
+            f"{tamanho:>8.0f} bytes/pedido")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    print(f"Em uso: {BIBLIOTECA}")
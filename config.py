@@ -2,4 +2,128 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-UPLOAD_EMPRESA = os.path.join(BASE_DIR, "static", "uploads", "empresa")
\ No newline at end of file
+UPLOAD_EMPRESA = os.path.join(BASE_DIR, "static", "uploads", "empresa")
+
+# ================= BANCO DE DADOS =================
+# "sqlserver" (produção) ou "sqlite" (arquivo local para testes/benchmarks)
+DB_BACKEND = os.environ.get("DB_BACKEND", "sqlserver")
+SQLITE_CAMINHO = os.environ.get(
+    "SQLITE_CAMINHO", os.path.join(BASE_DIR, "listadecompras.db")
+)
+
+# Migrações (banco/migracoes) na inicialização: padrão só no SQLite;
+# no SQL Server rodar "python -m banco.migracoes" com usuário que tenha DDL
+MIGRACOES_AUTOMATICAS = os.environ.get(
+    "MIGRACOES_AUTOMATICAS", "1" if DB_BACKEND == "sqlite" else "0"
+) == "1"
+
+# SQL Server
+DB_SERVER = os.environ.get("DB_SERVER", r"DESKTOP-URUJPEC\SQLEXPRESS")
+DB_DATABASE = os.environ.get("DB_DATABASE", "listadecompras")
+DB_DRIVER = os.environ.get("DB_DRIVER", "ODBC Driver 17 for SQL Server")
+
+# ================= RÉPLICA DE LEITURA (OPCIONAL) =================
+# Vazio = sem réplica; todas as leituras vão para o banco principal
+DB_REPLICA_SERVER = os.environ.get("DB_REPLICA_SERVER", "")
+SQLITE_REPLICA_CAMINHO = os.environ.get("SQLITE_REPLICA_CAMINHO", "")
+JANELA_LEITURA_APOS_ESCRITA = float(os.environ.get("JANELA_LEITURA_APOS_ESCRITA", 5))  # segundos
+REPLICA_QUARENTENA = float(os.environ.get("REPLICA_QUARENTENA", 30))                   # segundos
+
+# ================= POOL DE CONEXÕES =================
+POOL_TAMANHO = int(os.environ.get("POOL_TAMANHO", 10))
+POOL_TIMEOUT = float(os.environ.get("POOL_TIMEOUT", 30))       # segundos
+POOL_RECICLAR = int(os.environ.get("POOL_RECICLAR", 1800))     # segundos
+POOL_PRE_PING = os.environ.get("POOL_PRE_PING", "1") == "1"
+
+# ================= SERVIDOR DE PRODUÇÃO (servidor.py) =================
+SERVIDOR_HOST = os.environ.get("SERVIDOR_HOST", "0.0.0.0")
+SERVIDOR_PORTA = int(os.environ.get("SERVIDOR_PORTA", 8000))
+SERVIDOR_WORKERS = int(os.environ.get("SERVIDOR_WORKERS", os.cpu_count() or 2))
+SERVIDOR_MAX_REQUISICOES = int(os.environ.get("SERVIDOR_MAX_REQUISICOES", 1000))  # 0 = sem reciclagem
+SERVIDOR_CONEXOES_AQUECIDAS = int(os.environ.get("SERVIDOR_CONEXOES_AQUECIDAS", 2))
+SERVIDOR_INTERVALO_RELATORIO = float(os.environ.get("SERVIDOR_INTERVALO_RELATORIO", 60))  # segundos
+# Ao sair (reciclagem ou SIGTERM), quanto o worker espera as tarefas em execução
+SERVIDOR_ESPERA_TAREFAS = float(os.environ.get("SERVIDOR_ESPERA_TAREFAS", 60))  # segundos
+
+# ================= PERMISSÕES =================
+# Intervalo máximo para perceber alterações feitas em outro worker
+PERMISSOES_VERIFICAR_S = float(os.environ.get("PERMISSOES_VERIFICAR_S", 5))  # segundos
+
+# ================= SENHAS =================
+# Custo alvo dos hashes; hashes diferentes do alvo são refeitos no login
+SENHA_ALGORITMO = os.environ.get("SENHA_ALGORITMO", "pbkdf2")   # pbkdf2 | scrypt
+SENHA_PBKDF2_ITERACOES = int(os.environ.get("SENHA_PBKDF2_ITERACOES", 600000))
+SENHA_SCRYPT_N = int(os.environ.get("SENHA_SCRYPT_N", 32768))
+SENHA_SCRYPT_R = int(os.environ.get("SENHA_SCRYPT_R", 8))
+SENHA_SCRYPT_P = int(os.environ.get("SENHA_SCRYPT_P", 1))
+# Executor de hash: threads simultâneas, vagas na fila e espera máxima
+SENHA_THREADS = int(os.environ.get("SENHA_THREADS", 2))
+SENHA_FILA = int(os.environ.get("SENHA_FILA", 16))
+SENHA_FILA_TIMEOUT = float(os.environ.get("SENHA_FILA_TIMEOUT", 5))   # segundos
+
+# ================= SESSÕES =================
+# sqlite (arquivo local compartilhado pelos workers) | memoria | cookie (padrão do Flask)
+SESSAO_ARMAZEM = os.environ.get("SESSAO_ARMAZEM", "sqlite")
+SESSAO_SQLITE_CAMINHO = os.environ.get(
+    "SESSAO_SQLITE_CAMINHO", os.path.join(BASE_DIR, "sessoes.db")
+)
+SESSAO_DURACAO = int(os.environ.get("SESSAO_DURACAO", 8 * 3600))     # segundos sem uso
+SESSAO_RENOVAR = int(os.environ.get("SESSAO_RENOVAR", 60))           # segundos
+SESSAO_CACHE_TAMANHO = int(os.environ.get("SESSAO_CACHE_TAMANHO", 5000))
+SESSAO_CACHE_TTL = float(os.environ.get("SESSAO_CACHE_TTL", 5))      # segundos
+
+# ================= PEDIDOS =================
+PEDIDOS_POR_PAGINA = int(os.environ.get("PEDIDOS_POR_PAGINA", 50))
+# Linhas lidas do cursor por vez na exportação CSV (fetchmany)
+EXPORTAR_LOTE = int(os.environ.get("EXPORTAR_LOTE", 1000))
+# Pedidos gravados por transação na importação em lote
+IMPORTAR_LOTE = int(os.environ.get("IMPORTAR_LOTE", 200))
+
+# ================= ITENS DOS PEDIDOS (Pedidos.produtos) =================
+# Biblioteca JSON: auto (orjson/ujson se instalados) | orjson | ujson | json
+CODEC_JSON = os.environ.get("CODEC_JSON", "auto")
+
+# ================= RECIBOS =================
+# Recibos renderizados: pasta compartilhada pelos workers + LRU por worker
+RECIBOS_PASTA = os.environ.get("RECIBOS_PASTA", os.path.join(BASE_DIR, "cache", "recibos"))
+RECIBOS_CACHE_TAMANHO = int(os.environ.get("RECIBOS_CACHE_TAMANHO", 500))
+
+# ================= PRODUTOS =================
+# Intervalo máximo para perceber alterações do catálogo feitas em outro worker
+PRODUTOS_VERIFICAR_S = float(os.environ.get("PRODUTOS_VERIFICAR_S", 5))  # segundos
+
+# ================= DASHBOARD =================
+DASHBOARD_TOP_PRODUTOS = int(os.environ.get("DASHBOARD_TOP_PRODUTOS", 5))
+# Fatias do gráfico de produtos; o restante vira uma fatia "Outros"
+DASHBOARD_FATIAS = int(os.environ.get("DASHBOARD_FATIAS", 8))
+# Cache do dashboard: meses fechados ficam até a versão do mês mudar; o mês
+# corrente e o período todo são recalculados em segundo plano após o TTL
+DASHBOARD_CACHE_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", 60))  # segundos
+DASHBOARD_CACHE_TAMANHO = int(os.environ.get("DASHBOARD_CACHE_TAMANHO", 64))
+# Intervalo máximo para perceber gravações de pedido feitas em outro worker
+DASHBOARD_VERIFICAR_S = float(os.environ.get("DASHBOARD_VERIFICAR_S", 5))  # segundos
+
+# ================= BUSCA (AUTOCOMPLETAR) =================
+# Índice de clientes e produtos em memória para os campos de busca
+BUSCA_VERIFICAR_S = float(os.environ.get("BUSCA_VERIFICAR_S", 5))  # segundos
+BUSCA_LIMITE = int(os.environ.get("BUSCA_LIMITE", 20))             # resultados por consulta
+
+# ================= TAREFAS EM SEGUNDO PLANO =================
+# Máximo de tarefas pesadas rodando ao mesmo tempo (por worker e no total)
+TAREFAS_SIMULTANEAS = int(os.environ.get("TAREFAS_SIMULTANEAS", 1))
+TAREFAS_ESPERA = float(os.environ.get("TAREFAS_ESPERA", 1))   # segundos entre tentativas de vaga
+# O worker dono renova Tarefas.atualizado_em a cada TAREFAS_SINAL_S; sem
+# sinal há mais de TAREFAS_SEM_SINAL_S a tarefa é marcada como erro
+TAREFAS_SINAL_S = float(os.environ.get("TAREFAS_SINAL_S", 10))            # segundos
+TAREFAS_SEM_SINAL_S = float(os.environ.get("TAREFAS_SEM_SINAL_S", 120))   # segundos
+
+# ================= CACHE =================
+EMPRESA_CACHE_TTL = float(os.environ.get("EMPRESA_CACHE_TTL", 300))   # segundos
+
+# ================= MONITORAMENTO SQL =================
+SQL_LENTO_MS = float(os.environ.get("SQL_LENTO_MS", 200))      # milissegundos
+SQL_LENTO_LOG = os.environ.get(
+    "SQL_LENTO_LOG", os.path.join(BASE_DIR, "logs", "sql_lento.log")
+)
+SQL_LENTO_LOG_BYTES = 5 * 1024 * 1024
+SQL_LENTO_LOG_BACKUPS = 5
@@ -1,11 +1,259 @@
+"""
+Dashboard (página inicial depois do login).
+
+Os números saem dos resumos de vendas (resumos.py) e ficam num cache por
+worker, em duas partes:
+
+- parte do período, por mês escolhido: meses fechados ficam até a versão do
+  mês (VendasVersao) mudar; o mês corrente e o período todo vencem após
+  DASHBOARD_CACHE_TTL e são recalculados em segundo plano, servindo o valor
+  anterior enquanto isso
+- parte geral (cadastros e pedidos por mês): igual ao período todo
+
+O carimbo é lido no mesmo lote das consultas. A cada DASHBOARD_VERIFICAR_S
+segundos (ou logo depois de cache_dashboard.invalidar(), chamado pelas rotas
+que gravam pedidos) as versões são relidas e as entradas desatualizadas saem.
+"""
+import threading
+import time
+from datetime import date
+
 from flask import Blueprint, render_template, request, session, flash, redirect, url_for
-from database import get_connection
-import json
+
+from cache import CacheChaves
+from config import (
+    DASHBOARD_TOP_PRODUTOS, DASHBOARD_FATIAS, DASHBOARD_CACHE_TTL,
+    DASHBOARD_CACHE_TAMANHO, DASHBOARD_VERIFICAR_S,
+)
+from database import get_connection, get_write_connection, somente_leitura, consultar_lote
 
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
 
+# Sem mês escolhido: intervalo que cobre qualquer data
+TODO_PERIODO = (date(1900, 1, 1), date(9999, 12, 1))
+
+# Consultas do período escolhido, enviadas num único lote.
+# Só leem os resumos (resumos.py), mantidos a cada gravação de pedido.
+CONSULTAS_PERIODO = (
+    # Carimbo: soma das versões dos meses do período
+    """
+        SELECT ISNULL(SUM(versao), 0) FROM VendasVersao
+        WHERE mes >= ? AND mes < ?
+    """,
+    # Total de pedidos e faturamento
+    """
+        SELECT SUM(pedidos), SUM(total) FROM VendasDia
+        WHERE dia >= ? AND dia < ?
+    """,
+    # Compra mais barata
+    """
+        SELECT TOP 1 menor, FORMAT(dia, 'MM/yyyy')
+        FROM VendasDia
+        WHERE dia >= ? AND dia < ?
+        ORDER BY menor ASC
+    """,
+    # Cliente que mais compra
+    """
+        SELECT TOP 1 c.nome, SUM(v.pedidos) AS total_compras, SUM(v.total) AS valor_total
+        FROM VendasMesCliente v
+        INNER JOIN Clientes c ON c.id = v.cliente_id
+        WHERE v.mes >= ? AND v.mes < ?
+        GROUP BY v.cliente_id, c.nome
+        ORDER BY SUM(v.total) DESC
+    """,
+    # Top produtos (pedido livre não tem produto_id: agrupa pelo nome do item).
+    # Só as primeiras linhas saem do banco; o resto do gráfico vem somado
+    f"""
+        SELECT TOP {DASHBOARD_TOP_PRODUTOS} nome, SUM(quantidade), SUM(valor)
+        FROM VendasMesProduto
+        WHERE mes >= ? AND mes < ?
+        GROUP BY nome
+        ORDER BY SUM(quantidade) DESC, nome
+    """,
+    # Gráfico de produtos: maiores valores + total para a fatia "Outros"
+    f"""
+        SELECT TOP {DASHBOARD_FATIAS} nome, SUM(valor)
+        FROM VendasMesProduto
+        WHERE mes >= ? AND mes < ?
+        GROUP BY nome
+        ORDER BY SUM(valor) DESC, nome
+    """,
+    """
+        SELECT SUM(valor), COUNT(DISTINCT nome) FROM VendasMesProduto
+        WHERE mes >= ? AND mes < ?
+    """,
+    # Formas de pagamento
+    """
+        SELECT pagamento, SUM(total)
+        FROM VendasDia
+        WHERE dia >= ? AND dia < ?
+        GROUP BY pagamento
+    """,
+)
+
+# Consultas que não dependem do mês escolhido
+CONSULTAS_GERAIS = (
+    "SELECT ISNULL(SUM(versao), 0) FROM VendasVersao",
+    # Produtos e clientes cadastrados
+    "SELECT COUNT(*) FROM Produtos",
+    "SELECT COUNT(*) FROM Clientes",
+    # Pedidos por mês (sempre todos os meses)
+    """
+        SELECT FORMAT(dia, 'MM/yyyy'), SUM(total)
+        FROM VendasDia
+        GROUP BY FORMAT(dia, 'MM/yyyy')
+        ORDER BY MIN(dia)
+    """,
+)
+
+
+# ==================== CACHE ====================
+def _como_data(valor):
+    # pyodbc devolve date; o SQLite, texto 'AAAA-MM-DD'
+    return valor if isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+
+class CacheDashboard:
+    """
+    Contexto do dashboard por período (ver o docstring do módulo).
+
+    Chaves do cache: o período (início, fim) ou "geral"; cada valor guarda o
+    carimbo lido junto com as consultas.
+    """
+
+    def __init__(self, ttl, tamanho, intervalo):
+        self.ttl = ttl
+        self.intervalo = intervalo
+        self._cache = CacheChaves(self._calcular, tamanho)
+        self._lock = threading.Lock()
+        self._verificado_em = 0.0
+        self.verificacoes = 0
+
+    # ---------------- VERSÕES ----------------
+    def _verificar(self):
+        if time.monotonic() - self._verificado_em < self.intervalo:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._verificado_em < self.intervalo:
+                return
+
+            with get_write_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT mes, versao FROM VendasVersao")
+                versoes = [(_como_data(r[0]), int(r[1])) for r in cursor.fetchall()]
+
+            def carimbo(chave):
+                if chave == "geral":
+                    return sum(v for _, v in versoes)
+                inicio, fim = chave
+                return sum(v for mes, v in versoes if inicio <= mes < fim)
+
+            self._cache.descartar(lambda chave, valor: valor["carimbo"] != carimbo(chave))
+            self._verificado_em = time.monotonic()
+            self.verificacoes += 1
+
+    def invalidar(self):
+        """Força a releitura das versões na próxima consulta."""
+        self._verificado_em = 0.0
+
+    # ---------------- CÁLCULO ----------------
+    @somente_leitura
+    def _calcular(self, chave):
+        if chave == "geral":
+            return self._calcular_geral()
+        return self._calcular_periodo(chave)
+
+    def _calcular_geral(self):
+        with get_connection() as conn:
+            (
+                carimbo, produtos_cadastrados, clientes_cadastrados, meses
+            ) = consultar_lote(conn.cursor(), [(sql, ()) for sql in CONSULTAS_GERAIS])
+
+        return {
+            "carimbo": int(carimbo[0][0] or 0),
+            "contexto": {
+                "total_produtos": int(produtos_cadastrados[0][0] or 0),
+                "total_clientes": int(clientes_cadastrados[0][0] or 0),
+                "pedidos_mes": [(str(r[0]), float(r[1] or 0)) for r in meses],
+            },
+        }
+
+    def _calcular_periodo(self, periodo):
+        with get_connection() as conn:
+            (
+                carimbo, totais, mais_barata, clientes_top, produtos_rows,
+                fatias_rows, produtos_total, pagamentos_rows
+            ) = consultar_lote(conn.cursor(), [(sql, periodo) for sql in CONSULTAS_PERIODO])
+
+        # ---------------- TOTAL PEDIDOS / FATURAMENTO ----------------
+        total_pedidos = int(totais[0][0] or 0)
+        faturamento_mes = float(totais[0][1] or 0)
+
+        # ---------------- COMPRA MAIS BARATA ----------------
+        row = mais_barata[0] if mais_barata else None
+        compra_mais_barata = {
+            "valor": float(row[0]) if row else 0.0,
+            "mes": row[1] if row else "-"
+        }
+
+        # ---------------- CLIENTE QUE MAIS COMPRA ----------------
+        row = clientes_top[0] if clientes_top else None
+        cliente_top = {
+            "nome": row[0] if row else "-",
+            "compras": int(row[1]) if row else 0,
+            "valor": float(row[2]) if row else 0.0
+        }
+
+        # ---------------- TOP PRODUTOS ----------------
+        top_produtos = [(r[0], int(r[1] or 0), float(r[2] or 0)) for r in produtos_rows]
+
+        # ---------------- PRODUTOS (PIE) ----------------
+        pedidos_dia = [(r[0], float(r[1] or 0)) for r in fatias_rows]
+        valor_total, nomes = produtos_total[0]
+        if int(nomes or 0) > len(pedidos_dia):
+            outros = float(valor_total or 0) - sum(valor for _, valor in pedidos_dia)
+            pedidos_dia.append(("Outros", round(outros, 2)))
+
+        # ---------------- FORMAS DE PAGAMENTO ----------------
+        pagamentos = [(str(r[0]), float(r[1] or 0)) for r in pagamentos_rows]
+
+        return {
+            "carimbo": int(carimbo[0][0] or 0),
+            "contexto": {
+                "total_pedidos": total_pedidos,
+                "faturamento_mes": faturamento_mes,
+                "compra_mais_barata": compra_mais_barata,
+                "cliente_top": cliente_top,
+                "top_produtos": top_produtos,
+                "pedidos_dia": pedidos_dia,
+                "pagamentos": pagamentos,
+            },
+        }
+
+    # ---------------- CONSULTA ----------------
+    def obter(self, periodo):
+        """Contexto do template para o período [início, fim)."""
+        self._verificar()
+
+        # Mês já fechado não vence: só sai quando a versão dele muda
+        fechado = periodo[1] <= date.today().replace(day=1)
+        parte = self._cache.obter(periodo, None if fechado else self.ttl)
+        geral = self._cache.obter("geral", self.ttl)
+        return {**geral["contexto"], **parte["contexto"]}
+
+    def metricas(self):
+        return {**self._cache.metricas(), "verificacoes": self.verificacoes}
+
+
+cache_dashboard = CacheDashboard(
+    DASHBOARD_CACHE_TTL, DASHBOARD_CACHE_TAMANHO, DASHBOARD_VERIFICAR_S
+)
+
+
 # ==================== DASHBOARD ====================
 @dashboard_bp.route("/")
+@somente_leitura
 def dashboard_home():
 
     # 🔒 APENAS VERIFICA SE ESTÁ LOGADO
@@ -14,128 +262,23 @@ def dashboard_home():
         return redirect(url_for("usuarios.login"))
 
     mes = request.args.get("mes")  # YYYY-MM
-    conn = get_connection()
-    cursor = conn.cursor()
 
     # ---------------- FILTRO DATA ----------------
-    ano = mes_num = None
+    # Intervalo semiaberto [1º dia do mês, 1º dia do mês seguinte); sem mês,
+    # o intervalo cobre tudo, para o texto do lote (e o plano) ser sempre o mesmo
+    periodo = TODO_PERIODO
     if mes:
         try:
             ano, mes_num = map(int, mes.split("-"))
+            periodo = (
+                date(ano, mes_num, 1),
+                date(ano + mes_num // 12, mes_num % 12 + 1, 1)
+            )
         except ValueError:
             mes = None
 
-    def filtro(col):
-        if ano and mes_num:
-            return f"YEAR({col}) = {ano} AND MONTH({col}) = {mes_num}"
-        return "1=1"
-
-    # ---------------- TOTAL PEDIDOS ----------------
-    cursor.execute(f"SELECT COUNT(*) FROM Pedidos WHERE {filtro('data')}")
-    total_pedidos = int(cursor.fetchone()[0] or 0)
-
-     # ---------------- TOTAL PRODUTOS CADASTRADOS ----------------
-    cursor.execute("SELECT COUNT(*) FROM Produtos")
-    total_produtos = int(cursor.fetchone()[0] or 0)
-
-    # ---------------- TOTAL CLIENTES CADASTRADOS ----------------
-    cursor.execute("SELECT COUNT(*) FROM Clientes")
-    total_clientes = int(cursor.fetchone()[0] or 0)
-
-    # ---------------- FATURAMENTO ----------------
-    cursor.execute(f"SELECT SUM(total) FROM Pedidos WHERE {filtro('data')}")
-    faturamento_mes = float(cursor.fetchone()[0] or 0)
-
-    # ---------------- COMPRA MAIS BARATA ----------------
-    cursor.execute(f"""
-        SELECT TOP 1 total, FORMAT(data, 'MM/yyyy')
-        FROM Pedidos
-        WHERE {filtro('data')}
-        ORDER BY total ASC
-    """)
-    row = cursor.fetchone()
-    compra_mais_barata = {
-        "valor": float(row[0]) if row else 0.0,
-        "mes": row[1] if row else "-"
-    }
-
-    # ---------------- CLIENTE QUE MAIS COMPRA ----------------
-    cursor.execute(f"""
-        SELECT TOP 1 c.nome, COUNT(p.id) AS total_compras, SUM(p.total) AS valor_total
-        FROM Pedidos p
-        INNER JOIN Clientes c ON c.id = p.cliente_id
-        WHERE {filtro('p.data')}
-        GROUP BY c.nome
-        ORDER BY SUM(p.total) DESC
-    """)
-    row = cursor.fetchone()
-    cliente_top = {
-        "nome": row[0] if row else "-",
-        "compras": int(row[1]) if row else 0,
-        "valor": float(row[2]) if row else 0.0
-    }
-
-    # ---------------- TOP PRODUTOS ----------------
-    cursor.execute(f"SELECT produtos FROM Pedidos WHERE {filtro('data')}")
-    rows = cursor.fetchall() or []
-
-    produtos = {}
-    for r in rows:
-        if not r[0]:
-            continue
-        try:
-            itens = json.loads(r[0])
-        except Exception:
-            continue
-
-        for item in itens:
-            nome = item.get("nome")
-            qtd = int(item.get("quantidade", 0))
-            preco = float(item.get("preco", 0))
-            if not nome:
-                continue
-            if nome not in produtos:
-                produtos[nome] = {"qtd": 0, "valor": 0.0}
-            produtos[nome]["qtd"] += qtd
-            produtos[nome]["valor"] += qtd * preco
-
-    top_produtos = sorted(produtos.items(), key=lambda x: x[1]["qtd"], reverse=True)[:5]
-    top_produtos = [(nome, dados["qtd"], float(dados["valor"])) for nome, dados in top_produtos]
-
-    # ---------------- PRODUTOS (PIE) ----------------
-    pedidos_dia = [(nome, float(dados["valor"])) for nome, dados in produtos.items()]
-
-    # ---------------- PEDIDOS POR MÊS ----------------
-    cursor.execute("""
-        SELECT FORMAT(data, 'MM/yyyy'), SUM(total)
-        FROM Pedidos
-        GROUP BY FORMAT(data, 'MM/yyyy')
-        ORDER BY MIN(data)
-    """)
-    pedidos_mes = [(str(r[0]), float(r[1] or 0)) for r in cursor.fetchall()]
-
-    # ---------------- FORMAS DE PAGAMENTO ----------------
-    cursor.execute(f"""
-        SELECT pagamento, SUM(total)
-        FROM Pedidos
-        WHERE {filtro('data')}
-        GROUP BY pagamento
-    """)
-    pagamentos = [(str(r[0]), float(r[1] or 0)) for r in cursor.fetchall()]
-
-    conn.close()
-
     return render_template(
         "dashboard.html",
-        total_pedidos=total_pedidos,
-        faturamento_mes=faturamento_mes,
-        compra_mais_barata=compra_mais_barata,
-        cliente_top=cliente_top,
-        top_produtos=top_produtos,
-        pedidos_dia=pedidos_dia,
-        pedidos_mes=pedidos_mes,
-        pagamentos=pagamentos,
         mes_selecionado=mes,
-        total_produtos=total_produtos,
-        total_clientes=total_clientes
-    )
\ No newline at end of file
+        **cache_dashboard.obter(periodo)
+    )
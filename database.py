@@ -1,18 +1,175 @@
-import pyodbc
+import threading
+import time
+
+from banco.backends import criar_backend
+from banco.instrumentacao import CursorInstrumentado
+from banco.migracoes import aplicar_migracoes
+from banco.pool import PoolConexoes
+from banco.roteamento import Roteador, somente_leitura, marcar_escrita
+from config import (
+    DB_BACKEND, SQLITE_CAMINHO, MIGRACOES_AUTOMATICAS,
+    DB_SERVER, DB_DATABASE, DB_DRIVER,
+    DB_REPLICA_SERVER, SQLITE_REPLICA_CAMINHO,
+    JANELA_LEITURA_APOS_ESCRITA, REPLICA_QUARENTENA,
+    POOL_TAMANHO, POOL_TIMEOUT, POOL_RECICLAR, POOL_PRE_PING,
+)
 
 # Configurações do SQL Server
-SERVER = r"DESKTOP-URUJPEC\SQLEXPRESS"  # Exemplo: "DESKTOP-URUJPEC\SQLEXPRESS"
-DATABASE = "listadecompras"
-DRIVER = "ODBC Driver 17 for SQL Server"
+SERVER = DB_SERVER  # Exemplo: "DESKTOP-URUJPEC\SQLEXPRESS"
+DATABASE = DB_DATABASE
+DRIVER = DB_DRIVER
 
-def get_connection():
+
+def _criar_pool(backend, nome):
+    return PoolConexoes(
+        backend.conectar,
+        tamanho=POOL_TAMANHO,
+        timeout=POOL_TIMEOUT,
+        reciclar=POOL_RECICLAR,
+        pre_ping=POOL_PRE_PING,
+        ping=backend.ping,
+        nome=nome,
+        envelope_cursor=CursorInstrumentado,
+    )
+
+
+# Backend escolhido em config.DB_BACKEND ("sqlserver" ou "sqlite")
+backend = criar_backend(
+    DB_BACKEND,
+    server=SERVER,
+    database=DATABASE,
+    driver=DRIVER,
+    caminho=SQLITE_CAMINHO,
+)
+
+
+def migrar():
+    """Aplica as migrações pendentes (banco/migracoes) no banco principal."""
+    conn = backend.conectar()
+    try:
+        return aplicar_migracoes(conn, backend.nome)
+    finally:
+        conn.close()
+
+
+# ================= INICIALIZAÇÃO (SOB DEMANDA) =================
+_inicializado = False
+_lock_inicializacao = threading.Lock()
+tempo_inicializacao = None
+
+
+def inicializar():
     """
-    Retorna uma conexão com o banco SQL Server usando Trusted Connection.
+    Prepara o banco uma vez por processo: schema local e migrações
+    automáticas. Chamado na primeira conexão (ou antes, para aquecer).
     """
-    conn = pyodbc.connect(
-        f"DRIVER={{{DRIVER}}};"
-        f"SERVER={SERVER};"
-        f"DATABASE={DATABASE};"
-        f"Trusted_Connection=yes;"
+    global _inicializado, tempo_inicializacao
+    if _inicializado:
+        return
+
+    with _lock_inicializacao:
+        if _inicializado:
+            return
+        inicio = time.perf_counter()
+        backend.inicializar()
+        if MIGRACOES_AUTOMATICAS:
+            migrar()
+        tempo_inicializacao = time.perf_counter() - inicio
+        _inicializado = True
+
+
+_pool = _criar_pool(backend, "principal")
+
+# ================= RÉPLICA DE LEITURA =================
+backend_replica = None
+_pool_replica = None
+
+if DB_REPLICA_SERVER or SQLITE_REPLICA_CAMINHO:
+    backend_replica = criar_backend(
+        DB_BACKEND,
+        server=DB_REPLICA_SERVER or SERVER,
+        database=DATABASE,
+        driver=DRIVER,
+        caminho=SQLITE_REPLICA_CAMINHO,
+        somente_leitura=True,
     )
-    return conn
\ No newline at end of file
+    _pool_replica = _criar_pool(backend_replica, "replica")
+
+_roteador = Roteador(
+    _pool,
+    _pool_replica,
+    janela_escrita=JANELA_LEITURA_APOS_ESCRITA,
+    quarentena=REPLICA_QUARENTENA,
+)
+
+
+def get_connection():
+    """
+    Retorna uma conexão emprestada do pool.
+
+    Em views marcadas com @somente_leitura a conexão vem da réplica (se
+    configurada e no ar). Ao sair do bloco `with` (ou chamar close()) a
+    conexão volta para o pool. Lança banco.pool.PoolEsgotado se nenhuma
+    conexão ficar livre a tempo.
+    """
+    if not _inicializado:
+        inicializar()
+    return _roteador.obter()
+
+
+def get_write_connection():
+    """Conexão sempre do banco principal, mesmo em views somente leitura."""
+    if not _inicializado:
+        inicializar()
+    return _pool.obter()
+
+
+def consultar_lote(cursor, consultas):
+    """
+    Executa as consultas [(sql, params), ...] num único comando (uma ida ao
+    banco) e retorna as linhas de cada uma, na ordem, lidas com nextset().
+    O texto do lote não muda entre chamadas, então o plano fica em cache.
+    """
+    sql = ";\n".join(consulta.strip().rstrip(";") for consulta, _ in consultas)
+    params = [valor for _, valores in consultas for valor in valores]
+
+    cursor.execute(sql, params)
+    resultados = [cursor.fetchall()]
+    while len(resultados) < len(consultas):
+        if not cursor.nextset():
+            raise RuntimeError(
+                f"Lote devolveu {len(resultados)} resultados, esperados {len(consultas)}"
+            )
+        resultados.append(cursor.fetchall())
+    return resultados
+
+
+def aquecer(quantidade=1):
+    """
+    Abre `quantidade` conexões no pool antes de atender requisições.
+    Em servidor com fork, chamar em cada worker depois do fork.
+    """
+    if not _inicializado:
+        inicializar()
+    conexoes = [_pool.obter() for _ in range(min(quantidade, _pool.tamanho))]
+    for conn in conexoes:
+        conn.close()
+
+
+def descartar_conexoes():
+    """Fecha as conexões ociosas (ex.: no processo mestre antes do fork)."""
+    _pool.fechar_todas()
+    if _pool_replica:
+        _pool_replica.fechar_todas()
+
+
+def metricas_pool():
+    """Contadores do pool: em uso, ociosas, esperas, tempo de espera..."""
+    return _pool.metricas()
+
+
+def metricas_replica():
+    """Contadores do pool da réplica e do roteamento leitura/escrita."""
+    metricas = _roteador.metricas()
+    metricas["pool"] = _pool_replica.metricas() if _pool_replica else None
+    return metricas
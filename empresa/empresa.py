@@ -2,8 +2,10 @@ import os
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from werkzeug.utils import secure_filename
 from database import get_connection
-from config import UPLOAD_EMPRESA
+from cache import CacheValor
+from config import UPLOAD_EMPRESA, EMPRESA_CACHE_TTL
 from permissoes import tela_necessaria
+from recibos import recibos
 
 empresa_bp = Blueprint(
     "empresa",
@@ -12,6 +14,29 @@ empresa_bp = Blueprint(
     template_folder="templates/empresa"
 )
 
+# ================= CACHE DA EMPRESA ATIVA =================
+def _carregar_empresa_ativa():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT TOP 1 nome, cnpj, logo
+            FROM empresa
+            WHERE ativo = 1
+        """)
+        empresa = cursor.fetchone()
+
+    return {
+        "nome": empresa.nome if empresa else "",
+        "cnpj": empresa.cnpj if empresa else "",
+        "logo": empresa.logo if empresa else ""
+    }
+
+cache_empresa = CacheValor(_carregar_empresa_ativa, ttl=EMPRESA_CACHE_TTL)
+
+def empresa_ativa():
+    """Nome, CNPJ e logo da empresa ativa (cacheados em memória)."""
+    return cache_empresa.obter()
+
 @empresa_bp.route("/", methods=["GET", "POST"])
 @tela_necessaria("empresa")
 def painel_empresa():
@@ -64,6 +89,10 @@ def painel_empresa():
         cursor.close()
         conn.close()
 
+        cache_empresa.invalidar()
+        # Nome, CNPJ e logo estão nos recibos já renderizados
+        recibos.limpar()
+
         flash("Dados da empresa atualizados com sucesso!", "success")
         return redirect(url_for("empresa.painel_empresa"))
 
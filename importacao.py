@@ -0,0 +1,322 @@
+"""
+Importação de pedidos em lote a partir de CSV (planilhas dos vendedores).
+
+Uma linha por item; as linhas com o mesmo código em `pedido` formam um
+pedido. Colunas (separador ";"):
+
+    pedido;cliente_email;pagamento;produto;quantidade;preco;desconto;data
+
+- `produto` é o nome cadastrado; `preco` vazio usa o preço do cadastro
+- `desconto` (valor) e `data` (AAAA-MM-DD ou DD/MM/AAAA) são opcionais
+  e lidos da primeira linha do pedido que os trouxer
+
+Clientes, produtos e códigos já importados são resolvidos em lote, os
+totais são calculados em memória e a gravação é feita IMPORTAR_LOTE
+pedidos por transação: os pedidos com INSERT de várias linhas (os ids
+voltam pelo OUTPUT INSERTED) e os itens com executemany (fast_executemany
+no pyodbc). Um pedido com qualquer linha inválida é rejeitado inteiro.
+
+Pedidos.importacao_ref guarda "<hash do pedido>:<código>", com o hash do
+código, cliente, data e itens do pedido (ver ref_pedido): as planilhas
+costumam recomeçar os códigos em 1, então o código sozinho não identifica
+o pedido. Reenviar a planilha (a mesma ou com as linhas rejeitadas
+corrigidas) rejeita os pedidos que já foram gravados.
+"""
+import csv
+import hashlib
+import io
+import time
+from datetime import datetime
+
+from catalogo import catalogo, LOTE_IN
+from codec import codificar
+from config import IMPORTAR_LOTE
+from precos import ValorInvalido, centavos, ler_quantidade, montar_item, totais
+import resumos
+
+COLUNAS = ["pedido", "cliente_email", "pagamento", "produto",
+           "quantidade", "preco", "desconto", "data"]
+
+# Tamanho de Pedidos.importacao_ref e dígitos do hash antes do código
+REF_MAXIMO = 64
+REF_HASH = 16
+# Pedidos por INSERT (9 parâmetros cada; o SQL Server aceita até 2100)
+PEDIDOS_POR_INSERT = 200
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.linhas = 0
+        self.pedidos = 0
+        self.itens = 0
+        self.rejeitados = []  # (número da linha, motivo)
+        self.segundos = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.linhas / self.segundos if self.segundos else 0.0
+
+    def rejeitar(self, linha, motivo):
+        self.rejeitados.append((linha, motivo))
+
+
+# ==================== LEITURA ====================
+def _data(valor):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            pass
+    raise ValueError(f"data inválida: {valor}")
+
+
+def _ler_pedidos(texto, resultado):
+    """
+    Agrupa as linhas do CSV por código de pedido.
+    Retorna {ref: {"linhas": [...], "cliente_email", "pagamento", ...}}.
+    """
+    leitor = csv.DictReader(io.StringIO(texto), delimiter=";")
+    faltando = [c for c in ("pedido", "cliente_email", "produto", "quantidade")
+                if c not in (leitor.fieldnames or [])]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    pedidos = {}
+    for numero, linha in enumerate(leitor, start=2):
+        resultado.linhas += 1
+        ref = (linha.get("pedido") or "").strip()
+        if not ref:
+            resultado.rejeitar(numero, "código do pedido vazio")
+            continue
+
+        pedido = pedidos.setdefault(ref, {
+            "linhas": [],
+            "erros": [],
+            "cliente_email": None,
+            "pagamento": None,
+            "desconto": None,
+            "data": None,
+        })
+        pedido["linhas"].append(numero)
+
+        try:
+            email = (linha.get("cliente_email") or "").strip().lower()
+            nome = (linha.get("produto") or "").strip()
+            quantidade = ler_quantidade(linha.get("quantidade"))
+            preco = (linha.get("preco") or "").strip() or None
+            if preco is not None and centavos(preco, "preço") <= 0:
+                raise ValorInvalido(f"preço inválido: {preco}")
+            desconto = (linha.get("desconto") or "").strip() or None
+            centavos(desconto, "desconto")
+            data = _data(linha.get("data"))
+        except ValueError as e:
+            pedido["erros"].append((numero, str(e)))
+            continue
+
+        if not email or not nome:
+            pedido["erros"].append((numero, "cliente_email e produto são obrigatórios"))
+            continue
+        if quantidade <= 0:
+            pedido["erros"].append((numero, "quantidade deve ser maior que zero"))
+            continue
+        if pedido["cliente_email"] and pedido["cliente_email"] != email:
+            pedido["erros"].append((numero, "cliente diferente das outras linhas do pedido"))
+            continue
+
+        pedido["cliente_email"] = email
+        pedido["pagamento"] = pedido["pagamento"] or (linha.get("pagamento") or "").strip() or None
+        if pedido["desconto"] is None:
+            pedido["desconto"] = desconto
+        if pedido["data"] is None:
+            pedido["data"] = data
+        pedido.setdefault("itens", []).append((numero, nome, quantidade, preco))
+
+    return pedidos
+
+
+# ==================== RESOLUÇÃO EM LOTE ====================
+def _em_lotes(cursor, sql, valores):
+    """Executa `sql` (com {marcadores} no IN) em lotes de LOTE_IN valores."""
+    valores = list(valores)
+    rows = []
+    for i in range(0, len(valores), LOTE_IN):
+        lote = valores[i:i + LOTE_IN]
+        cursor.execute(sql.format(marcadores=", ".join("?" * len(lote))), lote)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def _resolver_clientes(cursor, emails):
+    rows = _em_lotes(cursor, "SELECT id, email FROM Clientes WHERE email IN ({marcadores})", emails)
+    return {(r[1] or "").strip().lower(): int(r[0]) for r in rows}
+
+
+def _refs_existentes(cursor, refs):
+    rows = _em_lotes(
+        cursor, "SELECT importacao_ref FROM Pedidos WHERE importacao_ref IN ({marcadores})", refs
+    )
+    return {r[0] for r in rows}
+
+
+def ref_pedido(codigo, pedido):
+    """
+    importacao_ref do pedido: REF_HASH dígitos do sha256 do código, email do
+    cliente, data e itens (nome, quantidade e preço, em qualquer ordem),
+    seguidos do código. Não depende do resto do arquivo.
+    """
+    itens = sorted(
+        (nome.lower(), quantidade, centavos(preco) if preco is not None else "")
+        for _, nome, quantidade, preco in pedido.get("itens", [])
+    )
+    data = pedido["data"].date().isoformat() if pedido["data"] else ""
+    chave = repr((codigo, pedido["cliente_email"] or "", data, itens))
+    return f"{hashlib.sha256(chave.encode('utf-8')).hexdigest()[:REF_HASH]}:{codigo}"
+
+
+# ==================== MONTAGEM EM MEMÓRIA ====================
+def _montar(pedidos, clientes, existentes, resultado, status):
+    """Valida cada pedido e calcula os totais; devolve os pedidos aceitos."""
+    produtos = {p.nome.strip().lower(): p for p in catalogo.listar()}
+    agora = datetime.now()
+    aceitos = []
+
+    for ref, pedido in pedidos.items():
+        erros = list(pedido["erros"])
+
+        importacao_ref = pedido["importacao_ref"]
+        if len(importacao_ref) > REF_MAXIMO:
+            erros.append((pedido["linhas"][0],
+                          f"código do pedido com mais de {REF_MAXIMO - REF_HASH - 1} caracteres"))
+        elif importacao_ref in existentes:
+            erros.append((pedido["linhas"][0], f"pedido {ref} já importado"))
+
+        cliente_id = clientes.get(pedido["cliente_email"])
+        if pedido["cliente_email"] and cliente_id is None:
+            erros.append((pedido["linhas"][0], f"cliente não encontrado: {pedido['cliente_email']}"))
+
+        itens = []
+        for numero, nome, quantidade, preco in pedido.get("itens", []):
+            produto = produtos.get(nome.lower())
+            if not produto:
+                erros.append((numero, f"produto não encontrado: {nome}"))
+                continue
+            preco = preco if preco is not None else produto.preco
+            itens.append(montar_item(produto.id, produto.nome, quantidade, preco))
+
+        if erros or not itens:
+            com_erro = {numero for numero, _ in erros}
+            for numero, motivo in erros:
+                resultado.rejeitar(numero, motivo)
+            for numero in pedido["linhas"]:
+                if numero not in com_erro:
+                    resultado.rejeitar(numero, f"pedido {ref} rejeitado (erro em outra linha)")
+            continue
+
+        total_bruto, desconto, total = totais(itens, "valor", pedido["desconto"])
+
+        aceitos.append({
+            "ref": importacao_ref,
+            "linhas": pedido["linhas"],
+            "cliente_id": cliente_id,
+            "data": pedido["data"] or agora,
+            "pagamento": pedido["pagamento"],
+            "status": status,
+            "itens": itens,
+            "total_bruto": total_bruto,
+            "desconto": desconto,
+            "total": total,
+        })
+
+    return aceitos
+
+
+# ==================== GRAVAÇÃO ====================
+def _inserir_pedidos(cursor, lote):
+    """
+    Grava os pedidos com PEDIDOS_POR_INSERT linhas por comando e devolve
+    {ref: id}, lido do OUTPUT do próprio INSERT (e não de um SELECT depois,
+    que poderia achar pedidos de outra importação).
+    """
+    ids = {}
+    for i in range(0, len(lote), PEDIDOS_POR_INSERT):
+        parte = lote[i:i + PEDIDOS_POR_INSERT]
+        cursor.execute(f"""
+            INSERT INTO Pedidos
+            (cliente_id, data, pagamento, status,
+             produtos, total_bruto, desconto, total, importacao_ref)
+            OUTPUT INSERTED.id, INSERTED.importacao_ref
+            VALUES {", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(parte))}
+        """, [
+            valor
+            for p in parte
+            for valor in (p["cliente_id"], p["data"], p["pagamento"], p["status"],
+                          codificar(p["itens"]),
+                          p["total_bruto"], p["desconto"], p["total"], p["ref"])
+        ])
+        ids.update({r[1]: int(r[0]) for r in cursor.fetchall()})
+    return ids
+
+
+def _gravar_lote(conn, cursor, lote):
+    ids = _inserir_pedidos(cursor, lote)
+
+    cursor.executemany("""
+        INSERT INTO PedidoItens
+        (pedido_id, produto_id, nome, quantidade, preco, subtotal)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (ids[p["ref"]], i["id"], i["nome"], i["quantidade"], i["preco"], i["subtotal"])
+        for p in lote
+        for i in p["itens"]
+    ])
+
+    resumos.registrar(cursor, resumos.Resumo(), ids.values())
+    conn.commit()
+
+
+def importar_pedidos(conn, texto, status, lote=IMPORTAR_LOTE, progresso=None):
+    """
+    Importa os pedidos do CSV `texto` usando a conexão `conn`.
+    `progresso(feito, total)` é chamado a cada lote gravado (em pedidos).
+    Retorna um ResultadoImportacao (contagens, linhas/s e rejeições).
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacao()
+    cursor = conn.cursor()
+
+    pedidos = _ler_pedidos(texto, resultado)
+
+    emails = {p["cliente_email"] for p in pedidos.values() if p["cliente_email"]}
+    clientes = _resolver_clientes(cursor, emails)
+    for ref, pedido in pedidos.items():
+        pedido["importacao_ref"] = ref_pedido(ref, pedido)
+    existentes = _refs_existentes(cursor, [p["importacao_ref"] for p in pedidos.values()])
+
+    aceitos = _montar(pedidos, clientes, existentes, resultado, status)
+
+    # Sem efeito no SQLite; no pyodbc envia cada executemany num só pacote
+    cursor.fast_executemany = True
+
+    for i in range(0, len(aceitos), lote):
+        parte = aceitos[i:i + lote]
+        try:
+            _gravar_lote(conn, cursor, parte)
+        except Exception as e:
+            conn.rollback()
+            for pedido in parte:
+                for numero in pedido["linhas"]:
+                    resultado.rejeitar(numero, f"erro ao gravar o lote: {e}")
+            continue
+
+        resultado.pedidos += len(parte)
+        resultado.itens += sum(len(p["itens"]) for p in parte)
+
+        if progresso:
+            progresso(i + len(parte), len(aceitos))
+
+    resultado.rejeitados.sort()
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
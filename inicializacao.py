@@ -0,0 +1,82 @@
+"""
+Medição do tempo de inicialização do worker.
+
+create_app() importa cada blueprint por aqui, registrando o custo de
+importação de cada módulo, e marca o tempo até a primeira requisição.
+O relatório fica em /monitor/inicializacao e vai para o log na primeira
+requisição.
+"""
+import importlib
+import sys
+import threading
+import time
+
+
+class RelatorioInicializacao:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.modulos = []
+        self.criacao_app = None
+        self.fork = None
+        self.worker_pronto = None
+        self.primeira_requisicao = None
+        self._lock = threading.Lock()
+
+    def importar(self, nome):
+        """Importa o módulo medindo o tempo e quantos módulos novos trouxe."""
+        antes = len(sys.modules)
+        ja_carregado = nome in sys.modules
+        inicio = time.perf_counter()
+
+        modulo = importlib.import_module(nome)
+
+        self.modulos.append({
+            "modulo": nome,
+            "segundos": time.perf_counter() - inicio,
+            "modulos_novos": len(sys.modules) - antes,
+            "ja_carregado": ja_carregado,
+        })
+        return modulo
+
+    def marcar_app_criado(self):
+        self.criacao_app = time.perf_counter() - self.inicio
+
+    def marcar_fork(self):
+        """Worker pre-fork: momento em que nasceu a partir do mestre."""
+        self.fork = time.perf_counter() - self.inicio
+
+    def marcar_worker_pronto(self):
+        """Worker pre-fork: conexões aquecidas, pronto para atender."""
+        self.worker_pronto = time.perf_counter() - self.inicio
+
+    def marcar_primeira_requisicao(self):
+        """Retorna True só na primeira chamada."""
+        if self.primeira_requisicao is not None:
+            return False
+        with self._lock:
+            if self.primeira_requisicao is not None:
+                return False
+            self.primeira_requisicao = time.perf_counter() - self.inicio
+            return True
+
+    def como_dict(self):
+        return {
+            "modulos": sorted(self.modulos, key=lambda m: m["segundos"], reverse=True),
+            "importacao_total": sum(m["segundos"] for m in self.modulos),
+            "criacao_app": self.criacao_app,
+            "fork": self.fork,
+            "worker_pronto": self.worker_pronto,
+            "primeira_requisicao": self.primeira_requisicao,
+        }
+
+    def resumo(self):
+        dados = self.como_dict()
+        partes = [f"{m['modulo']}={m['segundos'] * 1000:.1f}ms" for m in dados["modulos"]]
+        primeira = dados["primeira_requisicao"]
+        texto = (
+            f"app criado em {(dados['criacao_app'] or 0) * 1000:.1f}ms "
+            f"(imports {dados['importacao_total'] * 1000:.1f}ms: {', '.join(partes)}); "
+        )
+        if self.fork is not None and self.worker_pronto is not None:
+            texto += f"worker pronto {(self.worker_pronto - self.fork) * 1000:.1f}ms após o fork; "
+        return texto + f"primeira requisição em {(primeira or 0) * 1000:.1f}ms"
@@ -0,0 +1,155 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, jsonify, session
+from banco.instrumentacao import estatisticas
+from busca import indice_clientes, indice_produtos
+from catalogo import catalogo
+from dashboard import cache_dashboard
+import database
+from recibos import recibos
+from database import metricas_pool, metricas_replica
+from permissoes import admin_necessario
+from precos import auditar_totais
+from tarefas import executor, tipo_tarefa
+import senhas
+
+monitor_bp = Blueprint("monitor", __name__, url_prefix="/monitor")
+
+# =====================================================
+# CONSULTAS SQL (PIORES POR TEMPO TOTAL)
+# =====================================================
+@monitor_bp.route("/sql")
+@admin_necessario
+def monitor_sql():
+    consultas = [
+        {
+            "sql": item["sql"],
+            "execucoes": item["execucoes"],
+            "tempo_total": item["tempo_total"] * 1000,
+            "tempo_medio": item["tempo_medio"] * 1000,
+            "tempo_max": item["tempo_max"] * 1000,
+            "linhas": item["linhas"],
+        }
+        for item in estatisticas.piores(30)
+    ]
+
+    return render_template(
+        "monitor/sql.html",
+        consultas=consultas,
+        pool=metricas_pool(),
+        replica=metricas_replica()
+    )
+
+# =====================================================
+# ZERAR ESTATÍSTICAS
+# =====================================================
+@monitor_bp.route("/sql/limpar", methods=["POST"])
+@admin_necessario
+def monitor_sql_limpar():
+    estatisticas.limpar()
+    flash("Estatísticas de SQL zeradas.", "success")
+    return redirect(url_for("monitor.monitor_sql"))
+
+# =====================================================
+# TEMPO DE INICIALIZAÇÃO DO WORKER
+# =====================================================
+@monitor_bp.route("/inicializacao")
+@admin_necessario
+def monitor_inicializacao():
+    relatorio = current_app.extensions["relatorio_inicializacao"].como_dict()
+    relatorio["banco"] = database.tempo_inicializacao
+    return jsonify(relatorio)
+
+# =====================================================
+# HASH DE SENHAS (TEMPO POR ALGORITMO)
+# =====================================================
+@monitor_bp.route("/senhas")
+@admin_necessario
+def monitor_senhas():
+    return jsonify(senhas.executor.metricas())
+
+# =====================================================
+# SESSÕES NO SERVIDOR (CACHE LRU)
+# =====================================================
+@monitor_bp.route("/sessoes")
+@admin_necessario
+def monitor_sessoes():
+    interface = current_app.session_interface
+    if not hasattr(interface, "metricas"):
+        return jsonify({"armazem": "cookie"})
+    return jsonify(interface.metricas())
+
+
+# =====================================================
+# CATÁLOGO DE PRODUTOS EM MEMÓRIA
+# =====================================================
+@monitor_bp.route("/catalogo")
+@admin_necessario
+def monitor_catalogo():
+    return jsonify(catalogo.metricas())
+
+
+# =====================================================
+# RECIBOS RENDERIZADOS
+# =====================================================
+@monitor_bp.route("/recibos")
+@admin_necessario
+def monitor_recibos():
+    return jsonify(recibos.metricas())
+
+
+# =====================================================
+# ÍNDICES DE BUSCA (AUTOCOMPLETAR)
+# =====================================================
+@monitor_bp.route("/busca")
+@admin_necessario
+def monitor_busca():
+    return jsonify({
+        "clientes": indice_clientes.metricas(),
+        "produtos": indice_produtos.metricas(),
+    })
+
+# =====================================================
+# CACHE DO DASHBOARD
+# =====================================================
+@monitor_bp.route("/dashboard")
+@admin_necessario
+def monitor_dashboard():
+    return jsonify(cache_dashboard.metricas())
+
+# =====================================================
+# TAREFAS EM SEGUNDO PLANO
+# =====================================================
+@monitor_bp.route("/tarefas")
+@admin_necessario
+def monitor_tarefas():
+    return jsonify(executor.metricas())
+
+
+@tipo_tarefa("auditar_totais", "Auditoria dos totais dos pedidos")
+def auditar_totais_tarefa(conn, corrigir, progresso):
+    """Mesma auditoria de `python -m precos`, disparada pelo monitor."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Pedidos")
+    total = int(cursor.fetchone()[0])
+
+    resultado = auditar_totais(
+        conn, corrigir=corrigir,
+        progresso=lambda verificados: progresso(min(verificados, total), total),
+        corrigidos_em=recibos.invalidar_pedidos,
+    )
+    return {
+        "verificados": resultado["verificados"],
+        "divergentes": len(resultado["divergentes"]),
+        "corrigidos": resultado["corrigidos"],
+        "sem_itens": resultado["sem_itens"],
+        "segundos": round(resultado["segundos"], 1),
+        "pedidos_por_segundo": round(resultado["pedidos_por_segundo"]),
+    }
+
+
+@monitor_bp.route("/auditar-totais", methods=["POST"])
+@admin_necessario
+def monitor_auditar_totais():
+    tarefa_id = executor.enviar(
+        "auditar_totais", False, usuario_id=session.get("user_id")
+    )
+    return redirect(url_for("tarefas.tarefa_detalhe", id=tarefa_id))
@@ -1,8 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-import json
-from database import get_connection
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash,
+    Response, stream_with_context, make_response, session,
+)
+import csv
+import io
+from datetime import datetime, timedelta
+from busca import indice_clientes
+from database import get_connection, somente_leitura, marcar_escrita
+from catalogo import catalogo
+from codec import codificar
+from dashboard import cache_dashboard
+from config import PEDIDOS_POR_PAGINA, EXPORTAR_LOTE
 from empresa import empresa
+from importacao import COLUNAS, importar_pedidos
+from precos import ValorInvalido, centavos, em_reais, ler_quantidade, moeda, montar_item, totais
+from recibos import recibos
+import resumos
 from permissoes import tela_necessaria
+from tarefas import executor, tipo_tarefa
 
 pedidos_bp = Blueprint("pedidos", __name__, url_prefix="/pedidos")
 
@@ -11,16 +26,199 @@ STATUS_PAGO = "PAGO"
 # =====================================================
 # FUNÇÕES AUXILIARES
 # =====================================================
-def to_float(valor):
+def to_int(valor):
     try:
-        return float(str(valor).replace(",", "."))
-    except:
-        return 0.0
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+def inicio_do_dia(valor):
+    """'YYYY-MM-DD' -> datetime à meia-noite (None se vazio ou inválido)."""
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+def itens_do_formulario(cursor):
+    """
+    Itens enviados pelo formulário de pedido (produto_id[], quantidade_<id>,
+    preco_<id>). Os nomes vêm do catálogo, resolvidos todos de uma vez.
+    """
+    ids = request.form.getlist("produto_id[]")
+    catalogo_ids = catalogo.buscar(cursor, ids)
+
+    itens = []
+    for pid in ids:
+        qtd = ler_quantidade(request.form.get(f"quantidade_{pid}", 0))
+        preco = request.form.get(f"preco_{pid}")
+
+        if qtd <= 0 or centavos(preco, "preço") <= 0:
+            continue
+
+        produto = catalogo_ids.get(to_int(pid))
+        if not produto:
+            continue
+
+        itens.append(montar_item(produto.id, produto.nome, qtd, preco))
+    return itens
+
+def itens_livres_do_formulario():
+    """Itens digitados no pedido livre (produto_nome[], produto_qtd[], produto_preco[])."""
+    nomes = request.form.getlist("produto_nome[]")
+    qtds = request.form.getlist("produto_qtd[]")
+    precos = request.form.getlist("produto_preco[]")
+
+    itens = []
+    for nome, qtd, preco in zip(nomes, qtds, precos):
+        nome = (nome or "").strip()
+        qtd = ler_quantidade(qtd or 0)
+
+        if not nome or qtd <= 0 or centavos(preco, "preço") <= 0:
+            continue
+
+        itens.append(montar_item(None, nome, qtd, preco))
+    return itens
+
+
+# =====================================================
+# ITENS (PedidoItens)
+# =====================================================
+# Pedidos.produtos (JSON) continua sendo gravado durante a transição;
+# as leituras vêm de PedidoItens.
+def gravar_itens(cursor, pedido_id, itens):
+    """Substitui os itens do pedido em PedidoItens."""
+    cursor.execute("DELETE FROM PedidoItens WHERE pedido_id = ?", (pedido_id,))
+    if not itens:
+        return
+
+    cursor.executemany("""
+        INSERT INTO PedidoItens
+        (pedido_id, produto_id, nome, quantidade, preco, subtotal)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (pedido_id, item["id"], item["nome"], item["quantidade"],
+         item["preco"], item["subtotal"])
+        for item in itens
+    ])
+
+def carregar_itens(cursor, filtro="1=1", params=()):
+    """
+    Itens dos pedidos que casam com `filtro` (condição sobre Pedidos p),
+    numa consulta só. Retorna {pedido_id: [item, ...]}.
+    """
+    cursor.execute(f"""
+        SELECT i.pedido_id, i.produto_id, i.nome, i.quantidade, i.preco, i.subtotal
+        FROM PedidoItens i
+        JOIN Pedidos p ON p.id = i.pedido_id
+        WHERE {filtro}
+        ORDER BY i.pedido_id, i.id
+    """, params)
+
+    itens = {}
+    for row in cursor.fetchall():
+        itens.setdefault(row.pedido_id, []).append({
+            "id": row.produto_id,
+            "nome": row.nome,
+            "quantidade": int(row.quantidade),
+            "preco": em_reais(row.preco),
+            "subtotal": em_reais(row.subtotal)
+        })
+    return itens
+
+def itens_do_pedido(cursor, pedido_id):
+    return carregar_itens(cursor, "p.id = ?", (pedido_id,)).get(pedido_id, [])
 
-def get_nome_produto(cursor, produto_id):
-    cursor.execute("SELECT nome FROM Produtos WHERE id = ?", (produto_id,))
-    row = cursor.fetchone()
-    return row.nome if row else None
+
+# =====================================================
+# FILTROS DA LISTA (compartilhados com a exportação)
+# =====================================================
+def filtro_pedidos():
+    """
+    Condição sobre Pedidos p a partir de request.args (hoje, data_inicio,
+    data_fim, cliente_id, pagamento). Retorna (filtro, params, filtros),
+    onde `filtros` são os argumentos preenchidos, para repetir em links.
+    """
+    filtros = {
+        chave: request.args.get(chave)
+        for chave in ("hoje", "data_inicio", "data_fim", "cliente_id", "pagamento")
+        if request.args.get(chave)
+    }
+
+    filtro = "1=1"
+    params = []
+
+    # ================= FILTRO DATA =================
+    # Intervalos semiabertos [início, fim) para usar o índice em p.data
+    if filtros.get("hoje") == "1":
+        inicio = datetime.combine(datetime.today(), datetime.min.time())
+        filtro += " AND p.data >= ? AND p.data < ?"
+        params += [inicio, inicio + timedelta(days=1)]
+    else:
+        inicio = inicio_do_dia(filtros.get("data_inicio"))
+        if inicio:
+            filtro += " AND p.data >= ?"
+            params.append(inicio)
+
+        fim = inicio_do_dia(filtros.get("data_fim"))
+        if fim:
+            filtro += " AND p.data < ?"
+            params.append(fim + timedelta(days=1))
+
+    # ================= OUTROS FILTROS =================
+    if filtros.get("cliente_id"):
+        filtro += " AND p.cliente_id = ?"
+        params.append(filtros["cliente_id"])
+
+    if filtros.get("pagamento"):
+        filtro += " AND p.pagamento = ?"
+        params.append(filtros["pagamento"])
+
+    return filtro, params, filtros
+
+
+def pagina_pedidos(cursor, filtro, params, antes=None, apos=None, tamanho=PEDIDOS_POR_PAGINA):
+    """
+    Página da lista por keyset em p.id, do mais novo para o mais antigo.
+
+    antes=<id>: próxima página (ids menores); apos=<id>: página anterior
+    (ids maiores). Retorna (rows, tem_anterior, tem_proxima). Um `apos`
+    além do último pedido (ex.: pedidos excluídos) cai na primeira página.
+    """
+    pagina_filtro = filtro
+    pagina_params = list(params)
+    ordem = "DESC"
+    if apos is not None:
+        pagina_filtro += " AND p.id > ?"
+        pagina_params.append(apos)
+        ordem = "ASC"
+    elif antes is not None:
+        pagina_filtro += " AND p.id < ?"
+        pagina_params.append(antes)
+
+    # Uma linha a mais só para saber se existe outra página
+    cursor.execute(f"""
+        SELECT TOP {tamanho + 1}
+               p.id, p.data, c.nome AS cliente_nome,
+               p.pagamento, p.status,
+               p.total_bruto, p.desconto, p.total
+        FROM Pedidos p
+        JOIN Clientes c ON c.id = p.cliente_id
+        WHERE {pagina_filtro}
+        ORDER BY p.id {ordem}
+    """, pagina_params)
+    rows = cursor.fetchall()
+
+    if apos is not None and not rows:
+        return pagina_pedidos(cursor, filtro, params, tamanho=tamanho)
+
+    tem_mais = len(rows) > tamanho
+    rows = rows[:tamanho]
+    if ordem == "ASC":
+        rows.reverse()
+
+    if apos is not None:
+        return rows, tem_mais, True
+    return rows, antes is not None, tem_mais
 
 
 # =====================================================
@@ -28,87 +226,166 @@ def get_nome_produto(cursor, produto_id):
 # =====================================================
 @pedidos_bp.route("/")
 @tela_necessaria("Pedidos")
+@somente_leitura
 def pedidos_lista():
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        data_inicio = request.args.get("data_inicio")
-        data_fim = request.args.get("data_fim")
-        hoje = request.args.get("hoje")
-        cliente_id = request.args.get("cliente_id")
-        pagamento = request.args.get("pagamento")
-
-        query = """
-            SELECT p.id, p.data, c.nome AS cliente_nome,
-                   p.pagamento, p.status,
-                   p.produtos, p.total_bruto, p.desconto, p.total
-            FROM Pedidos p
-            JOIN Clientes c ON c.id = p.cliente_id
-            WHERE 1=1
-        """
-        params = []
-
-        # ================= FILTRO DATA =================
-        if hoje == "1":
-            query += " AND CONVERT(date, p.data) = CONVERT(date, GETDATE())"
-        else:
-            if data_inicio:
-                query += " AND CONVERT(date, p.data) >= ?"
-                params.append(data_inicio)
-
-            if data_fim:
-                query += " AND CONVERT(date, p.data) <= ?"
-                params.append(data_fim)
-
-        # ================= OUTROS FILTROS =================
-        if cliente_id:
-            query += " AND p.cliente_id = ?"
-            params.append(cliente_id)
-
-        if pagamento:
-            query += " AND p.pagamento = ?"
-            params.append(pagamento)
-
-        query += " ORDER BY p.id DESC"
+        filtro, params, filtros = filtro_pedidos()
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        # ================= TOTAIS DO FILTRO =================
+        cursor.execute(f"""
+            SELECT COUNT(*), SUM(p.total) FROM Pedidos p WHERE {filtro}
+        """, params)
+        row = cursor.fetchone()
+        total_pedidos = int(row[0] or 0)
+        total_filtrado = em_reais(row[1])
+
+        # ================= PÁGINA (KEYSET EM p.id) =================
+        rows, tem_anterior, tem_proxima = pagina_pedidos(
+            cursor, filtro, params,
+            antes=to_int(request.args.get("antes")),
+            apos=to_int(request.args.get("apos")),
+        )
+
+        # Itens da página numa consulta só: os ids da página são contíguos
+        # dentro do filtro, então basta limitar o filtro ao intervalo
+        itens = {}
+        if rows:
+            itens = carregar_itens(
+                cursor,
+                filtro + " AND p.id BETWEEN ? AND ?",
+                list(params) + [rows[-1].id, rows[0].id]
+            )
 
         pedidos = []
-        total_filtrado = 0.0
-
         for row in rows:
-            produtos = json.loads(row.produtos or "[]")
-            total = to_float(row.total)
-            total_filtrado += total
-
             pedidos.append({
                 "id": row.id,
                 "cliente_nome": row.cliente_nome,
                 "data": row.data,
                 "pagamento": row.pagamento,
                 "status": row.status,
-                "produtos": produtos,
-                "total_bruto": to_float(row.total_bruto),
-                "desconto": to_float(row.desconto),
-                "total": total
+                "produtos": itens.get(row.id, []),
+                "total_bruto": em_reais(row.total_bruto),
+                "desconto": em_reais(row.desconto),
+                "total": em_reais(row.total)
             })
 
-        cursor.execute("SELECT id, nome FROM Clientes ORDER BY nome")
-        clientes = cursor.fetchall()
+        pagina_anterior = pagina_proxima = None
+        if pedidos and tem_anterior:
+            pagina_anterior = url_for("pedidos.pedidos_lista", apos=pedidos[0]["id"], **filtros)
+        if pedidos and tem_proxima:
+            pagina_proxima = url_for("pedidos.pedidos_lista", antes=pedidos[-1]["id"], **filtros)
 
     return render_template(
         "pedidos.html",
         pedidos=pedidos,
-        clientes=clientes,
+        cliente=indice_clientes.obter(filtros.get("cliente_id")),
         total_filtrado=total_filtrado,
-        data_inicio=data_inicio,
-        data_fim=data_fim,
-        cliente_id=cliente_id,
-        pagamento=pagamento,
+        total_pedidos=total_pedidos,
+        pagina_anterior=pagina_anterior,
+        pagina_proxima=pagina_proxima,
+        primeira_pagina=url_for("pedidos.pedidos_lista", **filtros),
+        data_inicio=filtros.get("data_inicio"),
+        data_fim=filtros.get("data_fim"),
+        cliente_id=filtros.get("cliente_id"),
+        pagamento=filtros.get("pagamento"),
+        filtros=filtros,
         empresa=empresa
     )
 
+# =====================================================
+# EXPORTAR CSV (STREAMING)
+# =====================================================
+def _linhas_csv(conn, cursor, cabecalho, formatar):
+    """
+    Gera o CSV em blocos de EXPORTAR_LOTE linhas (fetchmany), sem montar
+    o resultado inteiro em memória. Devolve a conexão ao pool no fim.
+    """
+    try:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=";")
+
+        # BOM UTF-8 (acentuação no Excel)
+        buffer.write("\ufeff")
+        escritor.writerow(cabecalho)
+
+        while True:
+            rows = cursor.fetchmany(EXPORTAR_LOTE)
+            if not rows:
+                break
+            escritor.writerows(formatar(row) for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
+@pedidos_bp.route("/exportar")
+@tela_necessaria("Pedidos")
+@somente_leitura
+def pedidos_exportar():
+    """
+    CSV dos pedidos com os mesmos filtros da lista.
+    ?por=item gera uma linha por item; o padrão é uma linha por pedido.
+    """
+    filtro, params, _ = filtro_pedidos()
+    por_item = request.args.get("por") == "item"
+
+    # A conexão é obtida aqui, ainda dentro de @somente_leitura (réplica);
+    # o gerador só lê o cursor e a devolve ao pool quando termina
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if por_item:
+            cursor.execute(f"""
+                SELECT p.id, p.data, c.nome AS cliente_nome, p.pagamento,
+                       i.produto_id, i.nome, i.quantidade, i.preco, i.subtotal
+                FROM Pedidos p
+                JOIN Clientes c ON c.id = p.cliente_id
+                JOIN PedidoItens i ON i.pedido_id = p.id
+                WHERE {filtro}
+                ORDER BY p.id DESC, i.id
+            """, params)
+            cabecalho = ["Pedido", "Data", "Cliente", "Pagamento",
+                         "Produto ID", "Produto", "Quantidade", "Preço", "Subtotal"]
+            formatar = lambda r: [
+                r.id, r.data, r.cliente_nome, r.pagamento,
+                r.produto_id if r.produto_id is not None else "",
+                r.nome, r.quantidade, moeda(r.preco), moeda(r.subtotal)
+            ]
+        else:
+            cursor.execute(f"""
+                SELECT p.id, p.data, c.nome AS cliente_nome,
+                       p.pagamento, p.status,
+                       p.total_bruto, p.desconto, p.total
+                FROM Pedidos p
+                JOIN Clientes c ON c.id = p.cliente_id
+                WHERE {filtro}
+                ORDER BY p.id DESC
+            """, params)
+            cabecalho = ["Pedido", "Data", "Cliente", "Pagamento", "Status",
+                         "Total Bruto", "Desconto", "Total Final"]
+            formatar = lambda r: [
+                r.id, r.data, r.cliente_nome, r.pagamento, r.status,
+                moeda(r.total_bruto), moeda(r.desconto), moeda(r.total)
+            ]
+    except Exception:
+        conn.close()
+        raise
+
+    nome = "pedidos_itens.csv" if por_item else "pedidos_filtrados.csv"
+    return Response(
+        stream_with_context(_linhas_csv(conn, cursor, cabecalho, formatar)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'}
+    )
+
+
 # =====================================================
 # NOVO
 # =====================================================
@@ -118,71 +395,45 @@ def pedidos_novo():
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        cursor.execute("SELECT id, nome FROM Clientes ORDER BY nome")
-        clientes = cursor.fetchall()
-
-        cursor.execute("SELECT id, nome, preco FROM Produtos ORDER BY nome")
-        produtos = cursor.fetchall()
-
         if request.method == "POST":
             cliente_id = request.form.get("cliente_id")
             pagamento = request.form.get("pagamento")
-            desconto = to_float(request.form.get("desconto"))
-
-            produtos_json = []
-            total_bruto = 0.0
-
-            ids = request.form.getlist("produto_id[]")
-
-            for pid in ids:
-                qtd = int(request.form.get(f"quantidade_{pid}", 0))
-                preco = to_float(request.form.get(f"preco_{pid}"))
-
-                if qtd <= 0 or preco <= 0:
-                    continue
-
-                nome_produto = get_nome_produto(cursor, pid)
-                if not nome_produto:
-                    continue
-
-                subtotal = qtd * preco
-                total_bruto += subtotal
 
-                produtos_json.append({
-                    "id": int(pid),
-                    "nome": nome_produto,
-                    "quantidade": qtd,
-                    "preco": preco,
-                    "subtotal": subtotal
-                })
-
-            total_final = max(total_bruto - desconto, 0.0)
+            try:
+                produtos_json = itens_do_formulario(cursor)
+                total_bruto, desconto, total_final = totais(
+                    produtos_json, "valor", request.form.get("desconto")
+                )
+            except ValorInvalido as e:
+                flash(f"Pedido não salvo: {e}", "warning")
+                return redirect(request.url)
 
             cursor.execute("""
                 INSERT INTO Pedidos
                 (cliente_id, data, pagamento, status,
                  produtos, total_bruto, desconto, total)
+                OUTPUT INSERTED.id
                 VALUES (?, GETDATE(), ?, ?, ?, ?, ?, ?)
             """, (
                 cliente_id,
                 pagamento,
                 STATUS_PAGO,
-                json.dumps(produtos_json, ensure_ascii=False),
+                codificar(produtos_json),
                 total_bruto,
                 desconto,
                 total_final
             ))
+            pedido_id = cursor.fetchone()[0]
+            gravar_itens(cursor, pedido_id, produtos_json)
+            resumos.registrar(cursor, resumos.Resumo(), [pedido_id])
 
             conn.commit()
+            marcar_escrita()
+            cache_dashboard.invalidar()
             flash("Pedido criado com sucesso!", "success")
             return redirect(url_for("pedidos.pedidos_lista"))
 
-    return render_template(
-        "pedidos_form.html",
-        clientes=clientes,
-        produtos=produtos,
-        pedido=None
-    )
+    return render_template("pedidos_form.html", cliente=None, pedido=None)
 
 
 # =====================================================
@@ -195,7 +446,7 @@ def pedidos_editar(id):
         cursor = conn.cursor()
 
         cursor.execute("""
-            SELECT id, cliente_id, pagamento, produtos, desconto, total_bruto
+            SELECT id, cliente_id, pagamento, desconto, total_bruto
             FROM Pedidos WHERE id = ?
         """, (id,))
         row = cursor.fetchone()
@@ -204,55 +455,20 @@ def pedidos_editar(id):
             flash("Pedido não encontrado.", "warning")
             return redirect(url_for("pedidos.pedidos_lista"))
 
-        cursor.execute("SELECT id, nome FROM Clientes ORDER BY nome")
-        clientes = cursor.fetchall()
-
-        cursor.execute("SELECT id, nome, preco FROM Produtos ORDER BY nome")
-        produtos = cursor.fetchall()
-
-        pedido = {
-            "id": row.id,
-            "cliente_id": row.cliente_id,
-            "pagamento": row.pagamento,
-            "desconto": to_float(row.desconto),
-            "total_bruto": to_float(row.total_bruto),
-            "produtos": json.loads(row.produtos or "[]")
-        }
-
         if request.method == "POST":
             cliente_id = request.form.get("cliente_id")
             pagamento = request.form.get("pagamento")
-            desconto = to_float(request.form.get("desconto"))
-
-            produtos_editados = []
-            total_bruto = 0.0
-
-            ids = request.form.getlist("produto_id[]")
-
-            for pid in ids:
-                qtd = int(request.form.get(f"quantidade_{pid}", 0))
-                preco = to_float(request.form.get(f"preco_{pid}"))
 
-                if qtd <= 0 or preco <= 0:
-                    continue
-
-                nome_produto = get_nome_produto(cursor, pid)
-                if not nome_produto:
-                    continue
-
-                subtotal = qtd * preco
-                total_bruto += subtotal
-
-                produtos_editados.append({
-                    "id": int(pid),
-                    "nome": nome_produto,
-                    "quantidade": qtd,
-                    "preco": preco,
-                    "subtotal": subtotal
-                })
-
-            total_final = max(total_bruto - desconto, 0.0)
+            try:
+                produtos_editados = itens_do_formulario(cursor)
+                total_bruto, desconto, total_final = totais(
+                    produtos_editados, "valor", request.form.get("desconto")
+                )
+            except ValorInvalido as e:
+                flash(f"Pedido não salvo: {e}", "warning")
+                return redirect(request.url)
 
+            antes = resumos.capturar(cursor, [id])
             cursor.execute("""
                 UPDATE Pedidos SET
                     cliente_id = ?,
@@ -265,48 +481,37 @@ def pedidos_editar(id):
             """, (
                 cliente_id,
                 pagamento,
-                json.dumps(produtos_editados, ensure_ascii=False),
+                codificar(produtos_editados),
                 total_bruto,
                 desconto,
                 total_final,
                 id
             ))
+            gravar_itens(cursor, id, produtos_editados)
+            resumos.registrar(cursor, antes, [id])
 
             conn.commit()
+            marcar_escrita()
+            recibos.invalidar(id)
+            cache_dashboard.invalidar()
             flash("Pedido atualizado com sucesso!", "success")
             return redirect(url_for("pedidos.pedidos_lista"))
 
+        pedido = {
+            "id": row.id,
+            "cliente_id": row.cliente_id,
+            "pagamento": row.pagamento,
+            "desconto": em_reais(row.desconto),
+            "total_bruto": em_reais(row.total_bruto),
+            "produtos": itens_do_pedido(cursor, id)
+        }
+
     return render_template(
         "pedidos_form.html",
-        clientes=clientes,
-        produtos=produtos,
+        cliente=indice_clientes.obter(pedido["cliente_id"]),
         pedido=pedido
     )
 
-# ================ FUNÇÃO CALCULAR TOTAIS ===================
-
-def calcular_totais(produtos, desconto_tipo, desconto_valor):
-    # Soma dos subtotais
-    total_bruto = sum(p["subtotal"] for p in produtos)
-
-    desconto = 0.0
-    desconto_valor = desconto_valor or 0.0
-
-    if desconto_tipo == "percentual":
-        # Ex: 10% → 10 / 100
-        desconto = total_bruto * (desconto_valor / 100)
-
-    elif desconto_tipo == "valor":
-        desconto = desconto_valor
-
-    # Nunca permitir desconto maior que o total
-    if desconto > total_bruto:
-        desconto = total_bruto
-
-    total_final = total_bruto - desconto
-
-    return round(total_bruto, 2), round(desconto, 2), round(total_final, 2)
-
 # =====================================================
 # PEDIDO LIVRE - NOVO
 # =====================================================
@@ -316,64 +521,47 @@ def pedidos_livre():
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        cursor.execute("SELECT id, nome FROM Clientes ORDER BY nome")
-        clientes = cursor.fetchall()
-
         if request.method == "POST":
             cliente_id = request.form.get("cliente_id")
             pagamento = request.form.get("pagamento")
 
-            desconto_tipo = request.form.get("desconto_tipo")
-            desconto_valor = to_float(request.form.get("desconto_valor"))
-
-            nomes = request.form.getlist("produto_nome[]")
-            qtds = request.form.getlist("produto_qtd[]")
-            precos = request.form.getlist("produto_preco[]")
-
-            produtos = []
-
-            for nome, qtd, preco in zip(nomes, qtds, precos):
-                nome = (nome or "").strip()
-                qtd = int(qtd or 0)
-                preco = to_float(preco)
-
-                if not nome or qtd <= 0 or preco <= 0:
-                    continue
-
-                subtotal = qtd * preco
-
-                produtos.append({
-                    "id": None,
-                    "nome": nome,
-                    "quantidade": qtd,
-                    "preco": preco,
-                    "subtotal": subtotal
-                })
-
-            total_bruto, desconto, total = calcular_totais(
-                produtos, desconto_tipo, desconto_valor
-            )
+            try:
+                produtos = itens_livres_do_formulario()
+                total_bruto, desconto, total = totais(
+                    produtos,
+                    request.form.get("desconto_tipo"),
+                    request.form.get("desconto_valor")
+                )
+            except ValorInvalido as e:
+                flash(f"Pedido não salvo: {e}", "warning")
+                return redirect(request.url)
 
             cursor.execute("""
                 INSERT INTO Pedidos
                 (cliente_id, data, pagamento, status,
                  produtos, total_bruto, desconto, total)
+                OUTPUT INSERTED.id
                 VALUES (?, GETDATE(), ?, ?, ?, ?, ?, ?)
             """, (
                 cliente_id,
                 pagamento,
                 STATUS_PAGO,
-                json.dumps(produtos, ensure_ascii=False),
+                codificar(produtos),
                 total_bruto,
                 desconto,
                 total
             ))
+            pedido_id = cursor.fetchone()[0]
+            gravar_itens(cursor, pedido_id, produtos)
+            resumos.registrar(cursor, resumos.Resumo(), [pedido_id])
 
             conn.commit()
+            marcar_escrita()
+            cache_dashboard.invalidar()
             flash("Pedido criado com sucesso!", "success")
             return redirect(url_for("pedidos.pedidos_lista"))
 
-    return render_template("pedido_livre.html", clientes=clientes)
+    return render_template("pedido_livre.html")
 
 # =====================================================
 # PEDIDO LIVRE - EDITAR
@@ -392,43 +580,22 @@ def pedidos_livre_editar(id):
             return redirect(url_for("pedidos.pedidos_lista"))
 
         # Produtos existentes
-        produtos_db = json.loads(pedido.produtos or "[]")
-
-        # Clientes para select
-        cursor.execute("SELECT id, nome FROM Clientes ORDER BY nome")
-        clientes = cursor.fetchall()
+        produtos_db = itens_do_pedido(cursor, id)
 
         if request.method == "POST":
             cliente_id = request.form.get("cliente_id")
             pagamento = request.form.get("pagamento")
-            desconto_valor = to_float(request.form.get("desconto_valor"))
-
-            nomes = request.form.getlist("produto_nome[]")
-            qtds = request.form.getlist("produto_qtd[]")
-            precos = request.form.getlist("produto_preco[]")
-
-            produtos = []
-            for nome, qtd, preco in zip(nomes, qtds, precos):
-                nome = (nome or "").strip()
-                qtd = int(qtd or 0)
-                preco = to_float(preco)
-                if not nome or qtd <= 0 or preco <= 0:
-                    continue
-                subtotal = qtd * preco
-                produtos.append({
-                    "id": None,
-                    "nome": nome,
-                    "quantidade": qtd,
-                    "preco": preco,
-                    "subtotal": subtotal
-                })
-
-            # Calcular totais
-            total_bruto = sum(p["subtotal"] for p in produtos)
-            desconto = min(desconto_valor, total_bruto)
-            total = total_bruto - desconto
+            try:
+                produtos = itens_livres_do_formulario()
+                total_bruto, desconto, total = totais(
+                    produtos, "valor", request.form.get("desconto_valor")
+                )
+            except ValorInvalido as e:
+                flash(f"Pedido não salvo: {e}", "warning")
+                return redirect(request.url)
 
             # **UPDATE** obrigatório
+            antes = resumos.capturar(cursor, [id])
             cursor.execute("""
                 UPDATE Pedidos SET
                     cliente_id = ?,
@@ -441,14 +608,19 @@ def pedidos_livre_editar(id):
             """, (
                 cliente_id,
                 pagamento,
-                json.dumps(produtos, ensure_ascii=False),
+                codificar(produtos),
                 total_bruto,
                 desconto,
                 total,
                 id
             ))
+            gravar_itens(cursor, id, produtos)
+            resumos.registrar(cursor, antes, [id])
 
             conn.commit()
+            marcar_escrita()
+            recibos.invalidar(id)
+            cache_dashboard.invalidar()
             flash("Pedido atualizado com sucesso!", "success")
             return redirect(url_for("pedidos.pedidos_lista"))
 
@@ -456,8 +628,8 @@ def pedidos_livre_editar(id):
         "pedido_livre_editar.html",
         pedido=pedido,
         produtos=produtos_db,
-        clientes=clientes,
-        desconto_valor=to_float(pedido.desconto)
+        cliente=indice_clientes.obter(pedido.cliente_id),
+        desconto_valor=em_reais(pedido.desconto)
     )
 
 # =====================================================
@@ -465,31 +637,63 @@ def pedidos_livre_editar(id):
 # =====================================================
 @pedidos_bp.route("/recibo/<int:id>")
 @tela_necessaria("Pedidos")
+@somente_leitura
 def pedidos_recibo(id):
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT p.id, p.data, p.pagamento, p.total, p.desconto,
-                   c.nome AS cliente_nome
-            FROM Pedidos p
-            JOIN Clientes c ON c.id = p.cliente_id
-            WHERE p.id = ?
-        """, (id,))
-        pedido = cursor.fetchone()
-
-        if not pedido:
+    # Reimpressão: recibo já renderizado (memória ou disco), sem ir ao banco
+    cacheado = recibos.obter(id)
+    if cacheado:
+        html, etag = cacheado
+    else:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            # Pedido, cliente e itens numa consulta só
+            cursor.execute("""
+                SELECT p.id, p.cliente_id, p.data, p.pagamento, p.total, p.desconto,
+                       c.nome AS cliente_nome,
+                       i.produto_id, i.nome, i.quantidade, i.preco, i.subtotal
+                FROM Pedidos p
+                JOIN Clientes c ON c.id = p.cliente_id
+                LEFT JOIN PedidoItens i ON i.pedido_id = p.id
+                WHERE p.id = ?
+                ORDER BY i.id
+            """, (id,))
+            rows = cursor.fetchall()
+
+        if not rows:
             flash("Pedido não encontrado.", "warning")
             return redirect(url_for("pedidos.pedidos_lista"))
 
-        cursor.execute("SELECT produtos FROM Pedidos WHERE id = ?", (id,))
-        produtos = json.loads(cursor.fetchone().produtos or "[]")
-
-    return render_template(
-        "pedidos_recibo.html",
-        pedido=pedido,
-        produtos=produtos
-    )
+        row = rows[0]
+        pedido = {
+            "id": row.id,
+            "data": row.data,
+            "pagamento": row.pagamento,
+            "total": em_reais(row.total),
+            "desconto": em_reais(row.desconto),
+            "cliente_nome": row.cliente_nome
+        }
+        produtos = [
+            {
+                "id": r.produto_id,
+                "nome": r.nome,
+                "quantidade": int(r.quantidade),
+                "preco": em_reais(r.preco),
+                "subtotal": em_reais(r.subtotal)
+            }
+            for r in rows if r.nome is not None
+        ]
+
+        html = render_template(
+            "pedidos_recibo.html",
+            pedido=pedido,
+            produtos=produtos
+        )
+        etag = recibos.guardar(id, html, row.cliente_id)
+
+    resposta = make_response(html)
+    resposta.set_etag(etag)
+    return resposta.make_conditional(request)
 
 
 # =====================================================
@@ -500,8 +704,65 @@ def pedidos_recibo(id):
 def pedidos_excluir(id):
     with get_connection() as conn:
         cursor = conn.cursor()
+        antes = resumos.capturar(cursor, [id])
         cursor.execute("DELETE FROM Pedidos WHERE id = ?", (id,))
+        resumos.registrar(cursor, antes)
         conn.commit()
 
+    marcar_escrita()
+    recibos.invalidar(id)
+    cache_dashboard.invalidar()
+
     flash("Pedido excluído com sucesso!", "success")
-    return redirect(url_for("pedidos.pedidos_lista"))
\ No newline at end of file
+    return redirect(url_for("pedidos.pedidos_lista"))
+
+# =====================================================
+# IMPORTAR PEDIDOS VIA CSV (EM LOTE)
+# =====================================================
+@tipo_tarefa("importar_pedidos", "Importação de pedidos", voltar="pedidos.pedidos_lista")
+def importar_pedidos_csv(conn, texto, progresso):
+    """Tarefa em segundo plano: importação em lote (ver importacao.py)."""
+    resultado = importar_pedidos(conn, texto, STATUS_PAGO, progresso=progresso)
+    cache_dashboard.invalidar()
+    return {
+        "linhas": resultado.linhas,
+        "pedidos": resultado.pedidos,
+        "itens": resultado.itens,
+        "segundos": round(resultado.segundos, 2),
+        "linhas_por_segundo": round(resultado.linhas_por_segundo),
+        "linhas_rejeitadas": len(resultado.rejeitados),
+        "rejeitados": resultado.rejeitados[:500],
+    }
+
+
+@pedidos_bp.route("/importar", methods=["GET", "POST"])
+@tela_necessaria("Pedidos")
+def pedidos_importar():
+    if request.method == "POST":
+        arquivo = request.files.get("arquivo")
+
+        if not arquivo or arquivo.filename == "":
+            flash("Selecione um arquivo CSV.", "danger")
+            return redirect(request.url)
+
+        if not arquivo.filename.lower().endswith(".csv"):
+            flash("O arquivo deve estar no formato CSV.", "danger")
+            return redirect(request.url)
+
+        try:
+            # Corrige acentuação do Excel (UTF-8 com BOM)
+            texto = arquivo.stream.read().decode("utf-8-sig")
+
+            # Processada em segundo plano; a tela da tarefa mostra o progresso
+            tarefa_id = executor.enviar(
+                "importar_pedidos", texto, usuario_id=session.get("user_id")
+            )
+            return redirect(url_for("tarefas.tarefa_detalhe", id=tarefa_id))
+
+        except Exception as e:
+            flash(f"Erro ao importar CSV: {str(e)}", "danger")
+
+    return render_template(
+        "pedidos_importar.html",
+        colunas=";".join(COLUNAS)
+    )
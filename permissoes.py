@@ -1,27 +1,170 @@
+import threading
+import time
+import unicodedata
+
 from flask import session, redirect, url_for, flash
 from functools import wraps
 
+from config import PERMISSOES_VERIFICAR_S
+from database import get_write_connection
+
+PERFIL_ADMIN = 1
+
+# Telas conhecidas e a rota de entrada de cada uma (ordem = preferência
+# de redirecionamento quando o usuário não tem acesso à tela pedida)
+ROTA_DA_TELA = {
+    "dashboard": "dashboard.dashboard_home",
+    "pedidos": "pedidos.pedidos_lista",
+    "clientes": "clientes.clientes_lista",
+    "produtos": "produtos.produtos_lista",
+    "usuarios": "usuarios.usuarios_listar",
+    "empresa": "empresa.painel_empresa",
+}
+
+
+def normalizar_tela(tela):
+    """'Usuários ' -> 'usuarios' (minúsculas, sem acento, sem espaços)."""
+    tela = unicodedata.normalize("NFKD", (tela or "").strip().lower())
+    return "".join(c for c in tela if not unicodedata.combining(c))
+
+
+# ==================== MATRIZ DE PERMISSÕES ====================
+class MatrizPermissoes:
+    """
+    Matriz Perfis x PerfilTelas em memória.
+
+    Cada tela recebe um bit; cada perfil guarda um inteiro com os bits das
+    telas permitidas, então a checagem é um AND. A matriz é recarregada
+    quando o carimbo PermissoesVersao muda (verificado no máximo a cada
+    `intervalo` segundos, ou na hora depois de invalidar()).
+    """
+
+    def __init__(self, intervalo=5.0):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # (tela -> índice do bit, perfil_id -> máscara); trocado de uma vez
+        self._estado = ({}, {})
+        self._versao = None
+        self._verificado_em = 0.0
+
+    # ---------------- CARGA ----------------
+    def _atualizar(self):
+        if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._verificado_em < self.intervalo and self._versao is not None:
+                return
+
+            with get_write_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT versao FROM PermissoesVersao WHERE id = 1")
+                row = cursor.fetchone()
+                versao = row[0] if row else 0
+
+                if versao != self._versao:
+                    self._carregar(cursor)
+                    self._versao = versao
+
+            self._verificado_em = time.monotonic()
+
+    def _carregar(self, cursor):
+        cursor.execute("SELECT id FROM Perfis")
+        perfis = [int(row[0]) for row in cursor.fetchall()]
+
+        cursor.execute("SELECT perfil_id, tela_nome FROM PerfilTelas")
+        linhas = [(int(row[0]), normalizar_tela(row[1])) for row in cursor.fetchall()]
+
+        telas = list(ROTA_DA_TELA) + sorted({t for _, t in linhas} - set(ROTA_DA_TELA))
+        bits = {tela: i for i, tela in enumerate(telas)}
+
+        mascaras = {perfil: 0 for perfil in perfis}
+        for perfil, tela in linhas:
+            mascaras[perfil] = mascaras.get(perfil, 0) | (1 << bits[tela])
+
+        # Admin sempre tem todas as telas
+        mascaras[PERFIL_ADMIN] = (1 << len(telas)) - 1
+
+        self._estado = (bits, mascaras)
+
+    def invalidar(self):
+        """Força a verificação do carimbo na próxima checagem."""
+        self._verificado_em = 0.0
+
+    # ---------------- CONSULTAS ----------------
+    def perfil_existe(self, perfil_id):
+        self._atualizar()
+        return perfil_id in self._estado[1]
+
+    def permite(self, perfil_id, tela):
+        self._atualizar()
+        bits, mascaras = self._estado
+        bit = bits.get(normalizar_tela(tela))
+        if bit is None:
+            return perfil_id == PERFIL_ADMIN
+        return bool(mascaras.get(perfil_id, 0) >> bit & 1)
+
+    def telas(self):
+        self._atualizar()
+        return list(self._estado[0])
+
+    def telas_do_perfil(self, perfil_id):
+        self._atualizar()
+        bits, mascaras = self._estado
+        mascara = mascaras.get(perfil_id, 0)
+        return frozenset(t for t, bit in bits.items() if mascara >> bit & 1)
+
+    @property
+    def versao(self):
+        return self._versao
+
+
+matriz = MatrizPermissoes(PERMISSOES_VERIFICAR_S)
+
+
+def incrementar_versao(cursor):
+    """
+    Incrementa o carimbo da matriz. Chamar na mesma transação que altera
+    PerfilTelas; depois do commit chamar matriz.invalidar().
+    """
+    cursor.execute("UPDATE PermissoesVersao SET versao = versao + 1 WHERE id = 1")
+
+
+def perfil_da_sessao():
+    try:
+        return int(session.get("perfil_id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def pode_acessar(tela):
+    """Checagem para o usuário logado (usada também pelos templates)."""
+    if "user_id" not in session:
+        return False
+    perfil = perfil_da_sessao()
+    return perfil is not None and matriz.permite(perfil, tela)
+
+
+def rota_segura(perfil_id):
+    """Primeira tela permitida ao perfil; o dashboard só exige login."""
+    for tela, rota in ROTA_DA_TELA.items():
+        if matriz.permite(perfil_id, tela):
+            return rota
+    return "dashboard.dashboard_home"
+
+
 def tela_necessaria(tela: str):
     """
     Decorator para proteger rotas baseado no PERFIL do usuário.
 
-    Perfis:
-    1 = Admin            -> acesso total
-    2 = Usuário          -> apenas Pedidos
-    3 = Usuário Avançado -> todas menos Usuários
+    As telas permitidas a cada perfil vêm da tabela PerfilTelas (matriz em
+    memória); o Admin (perfil 1) tem acesso total.
 
     Evita loop de redirecionamento redirecionando o usuário para uma rota
     segura caso ele não tenha acesso à tela solicitada.
     """
 
-    tela = tela.lower()  # padroniza para comparação
-
-    # Rota segura padrão para redirecionamento
-    rota_segura_por_perfil = {
-        1: "dashboard.dashboard_home",  # Admin -> dashboard
-        2: "pedidos.listar_pedidos",    # Usuário -> página de pedidos
-        3: "dashboard.dashboard_home"   # Usuário avançado -> dashboard
-    }
+    tela = normalizar_tela(tela)  # padroniza para comparação
 
     def decorator(func):
         @wraps(func)
@@ -32,33 +175,36 @@ def tela_necessaria(tela: str):
                 return redirect(url_for("usuarios.login"))
 
             # ================= PERFIL =================
-            try:
-                perfil = int(session.get("perfil_id"))
-            except (TypeError, ValueError):
+            perfil = perfil_da_sessao()
+            if perfil is None or not matriz.perfil_existe(perfil):
                 flash("Perfil de usuário inválido.", "danger")
                 return redirect(url_for("usuarios.login"))
 
-            # ================= ADMIN =================
-            if perfil == 1:
-                return func(*args, **kwargs)
-
-            # ================= USUÁRIO =================
-            if perfil == 2:
-                if tela != "pedidos":
-                    flash("Você não tem acesso a esta tela.", "danger")
-                    return redirect(url_for(rota_segura_por_perfil[2]))
-                return func(*args, **kwargs)
-
-            # ================= USUÁRIO AVANÇADO =================
-            if perfil == 3:
-                if tela == "usuários":
-                    flash("Você não tem acesso a esta tela.", "danger")
-                    return redirect(url_for(rota_segura_por_perfil[3]))
-                return func(*args, **kwargs)
-
-            # ================= PERFIL INVÁLIDO =================
-            flash("Perfil de usuário inválido.", "danger")
-            return redirect(url_for("usuarios.login"))
+            # ================= TELA =================
+            if not matriz.permite(perfil, tela):
+                flash("Você não tem acesso a esta tela.", "danger")
+                return redirect(url_for(rota_segura(perfil)))
+
+            return func(*args, **kwargs)
 
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def admin_necessario(func):
+    """
+    Decorator para telas exclusivas do perfil Admin (perfil 1).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if "user_id" not in session:
+            flash("Você precisa estar logado para acessar esta página.", "warning")
+            return redirect(url_for("usuarios.login"))
+
+        if session.get("perfil_id") != PERFIL_ADMIN:
+            flash("Você não tem acesso a esta tela.", "danger")
+            return redirect(url_for("dashboard.dashboard_home"))
+
+        return func(*args, **kwargs)
+
+    return wrapper
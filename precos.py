@@ -0,0 +1,219 @@
+"""
+Cálculo de preços e totais dos pedidos em centavos (inteiros).
+
+Todas as rotas de pedido (normal, livre, edição e importação) passam por
+aqui, com a mesma regra:
+
+- subtotal do item = quantidade x preço, em centavos
+- desconto "valor" (em reais) ou "percentual" (sobre o total bruto),
+  arredondado para o centavo mais próximo (metade para cima)
+- desconto nunca maior que o total bruto; total = bruto - desconto
+
+Valores inválidos levantam ValorInvalido em vez de virar 0.
+
+Auditoria dos totais gravados (recalcula a partir de PedidoItens):
+
+    python -m precos              # só relata divergências
+    python -m precos --corrigir   # regrava total_bruto/desconto/total
+"""
+import sys
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+Totais = namedtuple("Totais", "total_bruto desconto total")
+
+_CENTAVO = Decimal("0.01")
+
+
+class ValorInvalido(ValueError):
+    pass
+
+
+# ==================== CONVERSÕES ====================
+def centavos(valor, campo="valor"):
+    """'12,50' / 12.5 / Decimal('12.5') -> 1250. Vazio ou None -> 0."""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return 0
+    try:
+        numero = Decimal(str(valor).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValorInvalido(f"{campo} inválido: {valor}")
+    if not numero.is_finite() or numero < 0:
+        raise ValorInvalido(f"{campo} inválido: {valor}")
+    return int(numero.quantize(_CENTAVO, rounding=ROUND_HALF_UP) * 100)
+
+
+def reais(valor_centavos):
+    """1250 -> 12.5 (para gravar nas colunas em reais)."""
+    return valor_centavos / 100
+
+
+def em_reais(valor, campo="valor"):
+    """Valor do banco ou de formulário -> reais arredondados ao centavo."""
+    return reais(centavos(valor, campo))
+
+
+def moeda(valor):
+    """12.5 -> '12,50' (CSV e telas)."""
+    valor = centavos(valor)
+    return f"{valor // 100},{valor % 100:02d}"
+
+
+def ler_quantidade(valor):
+    try:
+        return int(str(valor).strip())
+    except (TypeError, ValueError):
+        raise ValorInvalido(f"quantidade inválida: {valor}")
+
+
+# ==================== CÁLCULO ====================
+def montar_item(produto_id, nome, qtd, preco):
+    """Item de pedido com preço e subtotal arredondados ao centavo."""
+    preco_c = centavos(preco, "preço")
+    return {
+        "id": produto_id,
+        "nome": nome,
+        "quantidade": qtd,
+        "preco": reais(preco_c),
+        "subtotal": reais(qtd * preco_c)
+    }
+
+
+def calcular(subtotais, desconto_tipo="valor", desconto_valor=0):
+    """
+    Totais em centavos a partir dos subtotais (centavos).
+    `desconto_valor` é em reais (tipo "valor") ou em % (tipo "percentual").
+    """
+    bruto = sum(subtotais)
+
+    if desconto_tipo == "percentual":
+        percentual = Decimal(centavos(desconto_valor, "desconto")) / 100
+        desconto = int((bruto * percentual / 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    else:
+        desconto = centavos(desconto_valor, "desconto")
+
+    desconto = min(desconto, bruto)
+    return Totais(bruto, desconto, bruto - desconto)
+
+
+def totais(itens, desconto_tipo="valor", desconto_valor=0):
+    """Totais em reais dos itens montados por montar_item()."""
+    subtotais = [i["quantidade"] * centavos(i["preco"]) for i in itens]
+    return Totais(*map(reais, calcular(subtotais, desconto_tipo, desconto_valor)))
+
+
+# ==================== AUDITORIA ====================
+def auditar_totais(conn, lote=5000, corrigir=False, log=None, progresso=None,
+                   corrigidos_em=None):
+    """
+    Recalcula total_bruto/desconto/total de todos os pedidos a partir de
+    PedidoItens, em lotes de `lote` pedidos (keyset por id). O desconto
+    gravado é mantido (limitado ao bruto). Pedidos sem nenhum item são só
+    contados, nunca corrigidos. Retorna um dict com contagens, tempo e as
+    divergências (id, gravado, calculado) em centavos.
+
+    `corrigidos_em(ids)` é chamado depois do commit de cada lote corrigido
+    (ex.: para invalidar os recibos desses pedidos).
+    """
+    import resumos  # resumos importa precos; importado aqui para evitar o ciclo
+
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    verificados = 0
+    divergentes = []
+    sem_itens = 0
+    corrigidos = 0
+    ultimo = 0
+
+    while True:
+        cursor.execute(f"""
+            SELECT TOP {lote} id, total_bruto, desconto, total
+            FROM Pedidos
+            WHERE id > ?
+            ORDER BY id
+        """, (ultimo,))
+        pedidos = cursor.fetchall()
+        if not pedidos:
+            break
+
+        primeiro, ultimo = pedidos[0][0], pedidos[-1][0]
+
+        cursor.execute("""
+            SELECT pedido_id, quantidade, preco
+            FROM PedidoItens
+            WHERE pedido_id BETWEEN ? AND ?
+        """, (primeiro, ultimo))
+        subtotais = {}
+        for pedido_id, qtd, preco in cursor.fetchall():
+            subtotais.setdefault(pedido_id, []).append(int(qtd) * centavos(preco))
+
+        correcoes = []
+        for pedido_id, total_bruto, desconto, total in pedidos:
+            if pedido_id not in subtotais:
+                sem_itens += 1
+                continue
+            gravado = Totais(centavos(total_bruto), centavos(desconto), centavos(total))
+            calculado = calcular(subtotais[pedido_id], "valor", reais(gravado.desconto))
+            if gravado != calculado:
+                divergentes.append((pedido_id, gravado, calculado))
+                correcoes.append((*map(reais, calculado), pedido_id))
+
+        if corrigir and correcoes:
+            ids = [pedido_id for *_, pedido_id in correcoes]
+            antes = resumos.capturar(cursor, ids)
+            cursor.executemany("""
+                UPDATE Pedidos SET total_bruto = ?, desconto = ?, total = ?
+                WHERE id = ?
+            """, correcoes)
+            resumos.registrar(cursor, antes, ids)
+            conn.commit()
+            corrigidos += len(correcoes)
+            if corrigidos_em:
+                corrigidos_em(ids)
+
+        verificados += len(pedidos)
+        if progresso:
+            progresso(verificados)
+        if log:
+            log(f"{verificados} pedidos verificados, {len(divergentes)} divergentes")
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "verificados": verificados,
+        "divergentes": divergentes,
+        "sem_itens": sem_itens,
+        "corrigidos": corrigidos,
+        "segundos": segundos,
+        "pedidos_por_segundo": verificados / segundos if segundos else 0.0,
+    }
+
+
+def main(argv):
+    from database import backend
+    from recibos import recibos
+
+    backend.inicializar()
+    conn = backend.conectar()
+    try:
+        resultado = auditar_totais(
+            conn, corrigir="--corrigir" in argv, log=print,
+            corrigidos_em=recibos.invalidar_pedidos,
+        )
+    finally:
+        conn.close()
+
+    for pedido_id, gravado, calculado in resultado["divergentes"][:50]:
+        print(f"Pedido {pedido_id}: gravado {gravado} calculado {calculado} (centavos)")
+
+    print(
+        f"{resultado['verificados']} pedidos em {resultado['segundos']:.1f} s "
+        f"({resultado['pedidos_por_segundo']:.0f}/s); "
+        f"{len(resultado['divergentes'])} divergentes, {resultado['corrigidos']} corrigidos, "
+        f"{resultado['sem_itens']} sem itens."
+    )
+    return 1 if resultado["divergentes"] and not resultado["corrigidos"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,11 @@
 import csv
 import io
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_connection
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from catalogo import catalogo, incrementar_versao
+from database import get_connection, somente_leitura, marcar_escrita
 from permissoes import tela_necessaria
+from precos import ValorInvalido, em_reais
+from tarefas import executor, tipo_tarefa
 
 produtos_bp = Blueprint("produtos", __name__, url_prefix="/produtos")
 
@@ -11,6 +14,7 @@ produtos_bp = Blueprint("produtos", __name__, url_prefix="/produtos")
 # =====================================================
 @produtos_bp.route("/")
 @tela_necessaria("Produtos")
+@somente_leitura
 def produtos_lista():
     pagina = request.args.get("page", 1, type=int)
     por_pagina = 10
@@ -85,13 +89,22 @@ def produtos_novo():
             flash("Preencha todos os campos.", "warning")
             return render_template("produtos_form.html")
 
+        try:
+            preco = em_reais(preco, "preço")
+        except ValorInvalido as e:
+            flash(f"Produto não salvo: {e}", "warning")
+            return render_template("produtos_form.html")
+
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO Produtos (nome, preco) VALUES (?, ?)",
                 (nome, preco)
             )
+            incrementar_versao(cursor)
             conn.commit()
+            marcar_escrita()
+            catalogo.invalidar()
 
         flash("Produto criado com sucesso!", "success")
         return redirect(url_for("produtos.produtos_lista"))
@@ -126,11 +139,20 @@ def produtos_editar(id):
                 flash("Preencha todos os campos.", "warning")
                 return render_template("produtos_form.html", produto=produto)
 
+            try:
+                preco = em_reais(preco, "preço")
+            except ValorInvalido as e:
+                flash(f"Produto não salvo: {e}", "warning")
+                return render_template("produtos_form.html", produto=produto)
+
             cursor.execute(
                 "UPDATE Produtos SET nome = ?, preco = ? WHERE id = ?",
                 (nome, preco, id)
             )
+            incrementar_versao(cursor)
             conn.commit()
+            marcar_escrita()
+            catalogo.invalidar()
 
             flash("Produto atualizado com sucesso!", "success")
             return redirect(url_for("produtos.produtos_lista"))
@@ -147,7 +169,10 @@ def produtos_excluir(id):
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM Produtos WHERE id = ?", (id,))
+        incrementar_versao(cursor)
         conn.commit()
+        marcar_escrita()
+        catalogo.invalidar()
 
     flash("Produto excluído com sucesso!", "success")
     return redirect(url_for("produtos.produtos_lista"))
@@ -155,7 +180,65 @@ def produtos_excluir(id):
 # ==========================================
 # IMPORTAR PRODUTOS VIA CSV (SEM DUPLICAR)
 # ==========================================
+@tipo_tarefa("importar_produtos", "Importação de produtos", voltar="produtos.produtos_lista")
+def importar_produtos_csv(conn, texto, progresso):
+    """Tarefa em segundo plano: upsert dos produtos do CSV (por nome)."""
+    linhas = list(csv.DictReader(io.StringIO(texto), delimiter=";"))
+    cursor = conn.cursor()
+
+    inseridos = 0
+    atualizados = 0
+
+    for numero, linha in enumerate(linhas, start=1):
+        progresso(numero, len(linhas))
+
+        nome = linha.get("nome")
+        preco = linha.get("preco")
+
+        if not nome or not preco:
+            continue
+
+        nome = nome.strip()
+
+        try:
+            preco = em_reais(preco, "preço")
+        except ValorInvalido:
+            continue
+
+        # 🔎 Verifica se produto já existe
+        cursor.execute(
+            "SELECT id FROM produtos WHERE nome = ?",
+            (nome,)
+        )
+        produto = cursor.fetchone()
+
+        if produto:
+            # ✏️ Atualiza produto existente
+            cursor.execute("""
+                UPDATE produtos
+                SET preco = ?
+                WHERE id = ?
+            """, (preco, produto.id))
+
+            atualizados += 1
+        else:
+            # ➕ Insere novo produto
+            cursor.execute("""
+                INSERT INTO produtos (nome, preco)
+                VALUES (?, ?)
+            """, (nome, preco))
+
+            inseridos += 1
+
+    incrementar_versao(cursor)
+    conn.commit()
+    catalogo.invalidar()
+
+    return {"linhas": len(linhas), "inseridos": inseridos, "atualizados": atualizados}
+
+
 @produtos_bp.route("/importar", methods=["GET", "POST"])
+@tela_necessaria("Produtos")
 def importar_csv():
     if request.method == "POST":
         arquivo = request.files.get("arquivo")
@@ -170,68 +253,15 @@ def importar_csv():
 
         try:
             # 🔹 Corrige acentuação do Excel (UTF-8 com BOM)
-            stream = io.StringIO(
-                arquivo.stream.read().decode("utf-8-sig")
-            )
-            leitor = csv.DictReader(stream, delimiter=";")
-
-            conn = get_connection()
-            cursor = conn.cursor()
+            texto = arquivo.stream.read().decode("utf-8-sig")
 
-            inseridos = 0
-            atualizados = 0
-
-            for linha in leitor:
-                nome = linha.get("nome")
-                preco = linha.get("preco")
-
-                if not nome or not preco:
-                    continue
-
-                nome = nome.strip()
-                preco = preco.replace(",", ".")
-
-                try:
-                    preco = float(preco)
-                except ValueError:
-                    continue
-
-                # 🔎 Verifica se produto já existe
-                cursor.execute(
-                    "SELECT id FROM produtos WHERE nome = ?",
-                    (nome,)
-                )
-                produto = cursor.fetchone()
-
-                if produto:
-                    # ✏️ Atualiza produto existente
-                    cursor.execute("""
-                        UPDATE produtos
-                        SET preco = ?
-                        WHERE id = ?
-                    """, (preco, produto.id))
-
-                    atualizados += 1
-                else:
-                    # ➕ Insere novo produto
-                    cursor.execute("""
-                        INSERT INTO produtos (nome, preco)
-                        VALUES (?, ?)
-                    """, (nome, preco))
-
-                    inseridos += 1
-
-            conn.commit()
-            conn.close()
-
-            flash(
-                f"Importação concluída: "
-                f"{inseridos} inseridos, {atualizados} atualizados.",
-                "success"
+            # Processada em segundo plano; a tela da tarefa mostra o progresso
+            tarefa_id = executor.enviar(
+                "importar_produtos", texto, usuario_id=session.get("user_id")
             )
-            return redirect(url_for("produtos.produtos_lista"))
+            return redirect(url_for("tarefas.tarefa_detalhe", id=tarefa_id))
 
         except Exception as e:
             flash(f"Erro ao importar CSV: {str(e)}", "danger")
 
-    return render_template("importar_csv.html")
\ No newline at end of file
+    return render_template("importar_csv.html")
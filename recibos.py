@@ -0,0 +1,162 @@
+"""
+Recibos já renderizados, para reimpressão sem consultar o banco.
+
+Cada recibo é gravado em disco (RECIBOS_PASTA/<versão do layout>/<id>.html,
+compartilhado pelos workers) com um LRU em memória na frente. A versão do
+layout é o hash do template pedidos_recibo.html: mudar o template descarta
+os recibos antigos. O ETag é o hash do conteúdo.
+
+Quem altera um pedido chama invalidar(pedido_id); o arquivo é apagado, e
+os outros workers percebem na próxima leitura (o LRU confere o mtime).
+Cada recibo também fica marcado na pasta do cliente
+(<versão>/clientes/<cliente_id>/<pedido_id>), para invalidar_cliente()
+apagar os recibos de um cliente sem consultar o banco. Dados da empresa
+aparecem em todos os recibos: quem os altera chama limpar().
+"""
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from config import BASE_DIR, RECIBOS_PASTA, RECIBOS_CACHE_TAMANHO
+
+TEMPLATE = os.path.join(BASE_DIR, "templates", "pedidos_recibo.html")
+
+
+def _versao_layout():
+    try:
+        with open(TEMPLATE, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+    except OSError:
+        return "sem-template"
+
+
+class CacheRecibos:
+    def __init__(self, pasta, tamanho=500):
+        self.raiz = pasta
+        self.pasta = os.path.join(pasta, _versao_layout())
+        self.tamanho = tamanho
+
+        # pedido_id -> (html, etag, mtime_ns do arquivo)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.renderizacoes = 0
+        self.invalidacoes = 0
+
+    def _caminho(self, pedido_id):
+        return os.path.join(self.pasta, f"{int(pedido_id)}.html")
+
+    def _pasta_cliente(self, cliente_id):
+        return os.path.join(self.pasta, "clientes", str(int(cliente_id)))
+
+    def _guardar_memoria(self, pedido_id, registro):
+        with self._lock:
+            self._cache[pedido_id] = registro
+            self._cache.move_to_end(pedido_id)
+            while len(self._cache) > self.tamanho:
+                self._cache.popitem(last=False)
+
+    # ---------------- LEITURA ----------------
+    def obter(self, pedido_id):
+        """(html, etag) do recibo, ou None se não estiver em cache."""
+        caminho = self._caminho(pedido_id)
+        try:
+            mtime = os.stat(caminho).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._cache.pop(pedido_id, None)
+            return None
+
+        with self._lock:
+            registro = self._cache.get(pedido_id)
+            if registro is not None and registro[2] == mtime:
+                self._cache.move_to_end(pedido_id)
+                self.acertos_memoria += 1
+                return registro[0], registro[1]
+
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                html = f.read()
+        except OSError:
+            return None
+
+        etag = hashlib.sha1(html.encode("utf-8")).hexdigest()
+        self._guardar_memoria(pedido_id, (html, etag, mtime))
+        self.acertos_disco += 1
+        return html, etag
+
+    # ---------------- GRAVAÇÃO ----------------
+    def guardar(self, pedido_id, html, cliente_id=None):
+        """Grava o recibo renderizado; retorna o etag."""
+        etag = hashlib.sha1(html.encode("utf-8")).hexdigest()
+        caminho = self._caminho(pedido_id)
+
+        os.makedirs(self.pasta, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(temporario, caminho)
+
+        if cliente_id is not None:
+            pasta = self._pasta_cliente(cliente_id)
+            os.makedirs(pasta, exist_ok=True)
+            open(os.path.join(pasta, str(int(pedido_id))), "w").close()
+
+        self._guardar_memoria(pedido_id, (html, etag, os.stat(caminho).st_mtime_ns))
+        self.renderizacoes += 1
+        return etag
+
+    def invalidar(self, pedido_id):
+        with self._lock:
+            self._cache.pop(pedido_id, None)
+        try:
+            os.remove(self._caminho(pedido_id))
+        except OSError:
+            pass
+        self.invalidacoes += 1
+
+    def invalidar_pedidos(self, pedido_ids):
+        """Apaga os recibos de vários pedidos (ex.: totais corrigidos)."""
+        for pedido_id in pedido_ids:
+            self.invalidar(pedido_id)
+
+    def invalidar_cliente(self, cliente_id):
+        """Apaga os recibos dos pedidos do cliente (o nome dele está neles)."""
+        pasta = self._pasta_cliente(cliente_id)
+        # Renomeia antes de percorrer: recibos gravados daqui em diante
+        # marcam uma pasta nova e não se perdem
+        apagando = f"{pasta}.{os.getpid()}.{threading.get_ident()}.apagando"
+        try:
+            os.replace(pasta, apagando)
+        except OSError:
+            return
+        for nome in os.listdir(apagando):
+            if nome.isdigit():
+                self.invalidar(int(nome))
+        shutil.rmtree(apagando, ignore_errors=True)
+
+    def limpar(self):
+        """Descarta todos os recibos (de todas as versões do layout)."""
+        with self._lock:
+            self._cache.clear()
+        shutil.rmtree(self.raiz, ignore_errors=True)
+        self.invalidacoes += 1
+
+    def metricas(self):
+        with self._lock:
+            em_memoria = len(self._cache)
+        return {
+            "pasta": self.pasta,
+            "em_memoria": em_memoria,
+            "acertos_memoria": self.acertos_memoria,
+            "acertos_disco": self.acertos_disco,
+            "renderizacoes": self.renderizacoes,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+recibos = CacheRecibos(RECIBOS_PASTA, RECIBOS_CACHE_TAMANHO)
@@ -0,0 +1,287 @@
+"""
+Resumos de vendas do dashboard, mantidos a cada gravação de pedido.
+
+- VendasDia:        dia x pagamento -> pedidos, total, menor pedido
+- VendasMesCliente: mês x cliente   -> pedidos, total
+- VendasMesProduto: mês x nome do item -> quantidade, valor
+
+Quem grava pedidos atualiza os resumos na mesma transação:
+
+    antes = capturar(cursor, ids)     # antes do UPDATE/DELETE (novo: Resumo())
+    ... grava Pedidos / PedidoItens ...
+    registrar(cursor, antes, ids)     # soma a diferença depois - antes
+
+registrar() também incrementa VendasVersao dos meses afetados (carimbo
+usado pelo cache do dashboard).
+
+As linhas são somadas com UPDATE WITH (UPDLOCK, SERIALIZABLE) e, se a
+chave ainda não existe, INSERT: o bloqueio de intervalo do UPDATE vale até
+o commit, então duas gravações que criam a mesma chave ao mesmo tempo
+esperam uma pela outra em vez de violar a chave primária (o SQLite já
+serializa as transações de escrita; o dialeto remove a dica).
+
+Conferência e reconstrução a partir de Pedidos/PedidoItens:
+
+    python -m resumos                 # só relata divergências
+    python -m resumos --reconstruir   # apaga e recalcula os resumos
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from catalogo import LOTE_IN
+from precos import centavos, reais
+
+
+# ==================== RESUMO EM MEMÓRIA ====================
+class Resumo:
+    """Contribuição de um conjunto de pedidos para as três tabelas (centavos)."""
+
+    def __init__(self):
+        self.dias = {}       # (dia, pagamento) -> [pedidos, total, menor]
+        self.clientes = {}   # (mês, cliente_id) -> [pedidos, total]
+        self.produtos = {}   # (mês, nome) -> [quantidade, valor]
+
+    def somar_pedido(self, data, pagamento, cliente_id, total):
+        dia = data.date() if isinstance(data, datetime) else data
+        total = centavos(total)
+
+        linha = self.dias.setdefault((dia, pagamento or ""), [0, 0, None])
+        linha[0] += 1
+        linha[1] += total
+        linha[2] = total if linha[2] is None else min(linha[2], total)
+
+        linha = self.clientes.setdefault((dia.replace(day=1), cliente_id), [0, 0])
+        linha[0] += 1
+        linha[1] += total
+        return dia.replace(day=1)
+
+    def somar_item(self, mes, nome, quantidade, preco):
+        quantidade = int(quantidade or 0)
+        linha = self.produtos.setdefault((mes, nome), [0, 0])
+        linha[0] += quantidade
+        linha[1] += quantidade * centavos(preco)
+
+    def diferenca(self, antes):
+        """Novo Resumo com self - antes (sem o menor, que é recalculado)."""
+        delta = Resumo()
+        for nome in ("dias", "clientes", "produtos"):
+            depois_t, antes_t, delta_t = getattr(self, nome), getattr(antes, nome), getattr(delta, nome)
+            for chave in set(depois_t) | set(antes_t):
+                d = depois_t.get(chave, [0, 0])
+                a = antes_t.get(chave, [0, 0])
+                valores = [d[0] - a[0], d[1] - a[1]]
+                if valores != [0, 0]:
+                    delta_t[chave] = valores
+        return delta
+
+
+def _em_lotes(cursor, sql, ids):
+    ids = list(ids)
+    rows = []
+    for i in range(0, len(ids), LOTE_IN):
+        lote = ids[i:i + LOTE_IN]
+        cursor.execute(sql.format(marcadores=", ".join("?" * len(lote))), lote)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def _acumular(resumo, pedidos, itens):
+    meses = {}
+    for pedido_id, data, pagamento, cliente_id, total in pedidos:
+        meses[pedido_id] = resumo.somar_pedido(data, pagamento, cliente_id, total)
+    for pedido_id, nome, quantidade, preco in itens:
+        resumo.somar_item(meses[pedido_id], nome, quantidade, preco)
+    return resumo
+
+
+# ==================== MANUTENÇÃO INCREMENTAL ====================
+def capturar(cursor, pedido_ids):
+    """Resumo dos pedidos `pedido_ids` como estão gravados agora."""
+    pedido_ids = [int(i) for i in pedido_ids]
+    if not pedido_ids:
+        return Resumo()
+
+    pedidos = _em_lotes(cursor, """
+        SELECT id, data, pagamento, cliente_id, total
+        FROM Pedidos WHERE id IN ({marcadores})
+    """, pedido_ids)
+    itens = _em_lotes(cursor, """
+        SELECT pedido_id, nome, quantidade, preco
+        FROM PedidoItens WHERE pedido_id IN ({marcadores})
+    """, pedido_ids)
+    return _acumular(Resumo(), pedidos, itens)
+
+
+def registrar(cursor, antes, pedido_ids=()):
+    """
+    Aplica nas tabelas a diferença entre o estado atual de `pedido_ids` e
+    `antes` (capturado antes da alteração). Não faz commit.
+    """
+    depois = capturar(cursor, pedido_ids)
+    delta = depois.diferenca(antes)
+
+    _aplicar(cursor, "VendasDia", ("dia", "pagamento"), ("pedidos", "total"), delta.dias)
+    _aplicar(cursor, "VendasMesCliente", ("mes", "cliente_id"), ("pedidos", "total"), delta.clientes)
+    _aplicar(cursor, "VendasMesProduto", ("mes", "nome"), ("quantidade", "valor"), delta.produtos)
+
+    # O menor pedido do dia não sai de uma soma: relê o dia (índice por data)
+    for dia, pagamento in set(antes.dias) | set(depois.dias):
+        inicio = datetime(dia.year, dia.month, dia.day)
+        cursor.execute("""
+            UPDATE VendasDia SET menor = (
+                SELECT MIN(total) FROM Pedidos
+                WHERE data >= ? AND data < ? AND ISNULL(pagamento, '') = ?
+            )
+            WHERE dia = ? AND pagamento = ?
+        """, (inicio, inicio + timedelta(days=1), pagamento, dia, pagamento))
+
+    carimbar(cursor, {dia.replace(day=1) for dia, _ in set(antes.dias) | set(depois.dias)})
+
+
+def carimbar(cursor, meses):
+    """Incrementa a versão de cada mês em `meses` (cria com 1 se não existir)."""
+    for mes in sorted(meses):
+        cursor.execute("""
+            UPDATE VendasVersao WITH (UPDLOCK, SERIALIZABLE)
+            SET versao = versao + 1 WHERE mes = ?
+        """, (mes,))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO VendasVersao (mes, versao) VALUES (?, 1)", (mes,))
+
+
+def _aplicar(cursor, tabela, chaves, colunas, delta):
+    onde = " AND ".join(f"{c} = ?" for c in chaves)
+    for chave, (contagem, valor) in delta.items():
+        cursor.execute(f"""
+            UPDATE {tabela} WITH (UPDLOCK, SERIALIZABLE)
+            SET {colunas[0]} = {colunas[0]} + ?, {colunas[1]} = {colunas[1]} + ?
+            WHERE {onde}
+        """, (contagem, reais(valor), *chave))
+        if cursor.rowcount == 0:
+            cursor.execute(f"""
+                INSERT INTO {tabela} ({', '.join(chaves)}, {', '.join(colunas)})
+                VALUES (?, ?, ?, ?)
+            """, (*chave, contagem, reais(valor)))
+        cursor.execute(
+            f"DELETE FROM {tabela} WHERE {onde} AND {colunas[0]} <= 0", chave
+        )
+
+
+# ==================== RECONSTRUÇÃO E CONFERÊNCIA ====================
+def calcular(cursor, lote=5000, log=None):
+    """Resumo de todos os pedidos, lido em lotes de `lote` (keyset por id)."""
+    resumo = Resumo()
+    ultimo = 0
+    lidos = 0
+
+    while True:
+        cursor.execute(f"""
+            SELECT TOP {lote} id, data, pagamento, cliente_id, total
+            FROM Pedidos
+            WHERE id > ?
+            ORDER BY id
+        """, (ultimo,))
+        pedidos = cursor.fetchall()
+        if not pedidos:
+            break
+
+        primeiro, ultimo = pedidos[0][0], pedidos[-1][0]
+        cursor.execute("""
+            SELECT pedido_id, nome, quantidade, preco
+            FROM PedidoItens
+            WHERE pedido_id BETWEEN ? AND ?
+        """, (primeiro, ultimo))
+        _acumular(resumo, pedidos, cursor.fetchall())
+
+        lidos += len(pedidos)
+        if log:
+            log(f"{lidos} pedidos lidos")
+
+    return resumo
+
+
+def reconstruir(cursor, lote=5000, log=None):
+    """
+    Apaga e recalcula as três tabelas. Não faz commit nem mexe no carimbo
+    (a migração que cria as tabelas roda antes de VendasVersao existir).
+    """
+    resumo = calcular(cursor, lote, log)
+
+    for tabela in ("VendasDia", "VendasMesCliente", "VendasMesProduto"):
+        cursor.execute(f"DELETE FROM {tabela}")
+
+    cursor.fast_executemany = True
+    if resumo.dias:
+        cursor.executemany("""
+            INSERT INTO VendasDia (dia, pagamento, pedidos, total, menor)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(dia, pag, n, reais(t), reais(m)) for (dia, pag), (n, t, m) in resumo.dias.items()])
+    if resumo.clientes:
+        cursor.executemany("""
+            INSERT INTO VendasMesCliente (mes, cliente_id, pedidos, total)
+            VALUES (?, ?, ?, ?)
+        """, [(*chave, n, reais(t)) for chave, (n, t) in resumo.clientes.items()])
+    produtos = [(*chave, q, reais(v)) for chave, (q, v) in resumo.produtos.items() if q > 0]
+    if produtos:
+        cursor.executemany("""
+            INSERT INTO VendasMesProduto (mes, nome, quantidade, valor)
+            VALUES (?, ?, ?, ?)
+        """, produtos)
+
+    return resumo
+
+
+def conferir(cursor, lote=5000, log=None):
+    """Lista de divergências (tabela, chave, gravado, calculado) em centavos."""
+    esperado = calcular(cursor, lote, log)
+    divergencias = []
+
+    def comparar(tabela, sql, calculado):
+        cursor.execute(sql)
+        gravado = {
+            tuple(r[:2]): [int(r[2])] + [centavos(v) if v is not None else None for v in r[3:]]
+            for r in cursor.fetchall()
+        }
+        for chave in set(gravado) | set(calculado):
+            if gravado.get(chave) != calculado.get(chave):
+                divergencias.append((tabela, chave, gravado.get(chave), calculado.get(chave)))
+
+    comparar("VendasDia", "SELECT dia, pagamento, pedidos, total, menor FROM VendasDia",
+             esperado.dias)
+    comparar("VendasMesCliente", "SELECT mes, cliente_id, pedidos, total FROM VendasMesCliente",
+             esperado.clientes)
+    comparar("VendasMesProduto", "SELECT mes, nome, quantidade, valor FROM VendasMesProduto",
+             {k: v for k, v in esperado.produtos.items() if v[0] > 0})
+    return divergencias
+
+
+def main(argv):
+    from database import backend
+
+    backend.inicializar()
+    conn = backend.conectar()
+    inicio = time.perf_counter()
+    try:
+        cursor = conn.cursor()
+        if "--reconstruir" in argv:
+            resumo = reconstruir(cursor, log=print)
+            cursor.execute("SELECT mes FROM VendasVersao")
+            meses = {r[0] for r in cursor.fetchall()}
+            carimbar(cursor, meses | {mes for mes, _ in resumo.clientes})
+            conn.commit()
+            print(f"Resumos reconstruídos em {time.perf_counter() - inicio:.1f} s.")
+            return 0
+
+        divergencias = conferir(cursor, log=print)
+    finally:
+        conn.close()
+
+    for tabela, chave, gravado, calculado in divergencias[:50]:
+        print(f"{tabela} {chave}: gravado {gravado} calculado {calculado}")
+    print(f"{len(divergencias)} divergências em {time.perf_counter() - inicio:.1f} s.")
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,172 @@
+"""
+Hash de senhas fora da thread da requisição.
+
+PBKDF2 e scrypt gastam dezenas de milissegundos de CPU (o scrypt legado,
+n=32768, também ~32 MB de memória) por tentativa. Uma rajada de logins não
+pode ocupar todas as threads do worker, então o cálculo roda num executor
+próprio:
+
+- no máximo SENHA_THREADS hashes simultâneos;
+- no máximo SENHA_FILA esperando; quem não conseguir vaga em
+  SENHA_FILA_TIMEOUT segundos recebe SenhasOcupado;
+- o custo alvo (algoritmo e parâmetros) vem do config; hashes legados ou
+  mais fracos que o alvo são refeitos no próximo login bem-sucedido.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import (
+    SENHA_ALGORITMO, SENHA_PBKDF2_ITERACOES, SENHA_SCRYPT_N, SENHA_SCRYPT_R,
+    SENHA_SCRYPT_P, SENHA_THREADS, SENHA_FILA, SENHA_FILA_TIMEOUT,
+)
+
+
+class SenhasOcupado(Exception):
+    """A fila de hash de senhas está cheia (muitos logins ao mesmo tempo)."""
+
+
+# ==================== NORMALIZAR HASH ====================
+def normalizar_hash(valor):
+    if not valor:
+        return None
+
+    if isinstance(valor, (bytes, bytearray)):
+        valor = valor.decode("utf-8")
+
+    elif hasattr(valor, "tobytes"):  # memoryview
+        valor = valor.tobytes().decode("utf-8")
+
+    return valor.strip()
+
+
+# ==================== PARÂMETROS ====================
+def metodo_alvo():
+    """Método no formato do Werkzeug (ex.: 'pbkdf2:sha256:600000')."""
+    if SENHA_ALGORITMO == "scrypt":
+        return f"scrypt:{SENHA_SCRYPT_N}:{SENHA_SCRYPT_R}:{SENHA_SCRYPT_P}"
+    return f"pbkdf2:sha256:{SENHA_PBKDF2_ITERACOES}"
+
+
+def algoritmo(senha_hash):
+    return senha_hash.split(":", 1)[0] if senha_hash else ""
+
+
+def precisa_refazer(senha_hash):
+    """True se o hash não usa exatamente o algoritmo e o custo alvo."""
+    metodo = senha_hash.split("$", 1)[0]
+    return metodo != metodo_alvo()
+
+
+# ==================== EXECUTOR ====================
+class ExecutorSenhas:
+    """Executor limitado com métricas de tempo por algoritmo."""
+
+    def __init__(self, threads, fila, timeout):
+        self.threads = threads
+        self.timeout = timeout
+        # Vagas = em execução + esperando
+        self._vagas = threading.BoundedSemaphore(threads + fila)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._metricas = {}
+        self.recusadas = 0
+        self.espera_total = 0.0
+
+    def _obter_executor(self):
+        # Threads não sobrevivem ao fork: cada worker cria o seu executor
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.threads, thread_name_prefix="senha"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def executar(self, nome, funcao, *args):
+        inicio = time.perf_counter()
+        if not self._vagas.acquire(timeout=self.timeout):
+            with self._lock:
+                self.recusadas += 1
+            raise SenhasOcupado("Fila de verificação de senhas cheia")
+
+        try:
+            def medir():
+                comeco = time.perf_counter()
+                try:
+                    return funcao(*args)
+                finally:
+                    self._registrar(nome, comeco)
+
+            futuro = self._obter_executor().submit(medir)
+            with self._lock:
+                self.espera_total += time.perf_counter() - inicio
+            return futuro.result()
+        finally:
+            self._vagas.release()
+
+    def _registrar(self, nome, comeco):
+        duracao = time.perf_counter() - comeco
+        with self._lock:
+            item = self._metricas.setdefault(nome, [0, 0.0, 0.0])
+            item[0] += 1
+            item[1] += duracao
+            item[2] = max(item[2], duracao)
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "threads": self.threads,
+                "recusadas": self.recusadas,
+                "espera_total": self.espera_total,
+                "metodo_alvo": metodo_alvo(),
+                "algoritmos": {
+                    nome: {
+                        "execucoes": qtd,
+                        "tempo_total": total,
+                        "tempo_medio": total / qtd if qtd else 0.0,
+                        "tempo_max": maximo,
+                    }
+                    for nome, (qtd, total, maximo) in self._metricas.items()
+                },
+            }
+
+
+executor = ExecutorSenhas(SENHA_THREADS, SENHA_FILA, SENHA_FILA_TIMEOUT)
+
+
+# ==================== API ====================
+def gerar_hash(senha):
+    """Hash da senha com o custo alvo (calculado no executor)."""
+    return executor.executar(SENHA_ALGORITMO, generate_password_hash, senha, metodo_alvo())
+
+
+def verificar_senha(senha_digitada, senha_hash):
+    """
+    Confere a senha (PBKDF2 ou scrypt legado) no executor.
+
+    Retorna (confere, novo_hash); novo_hash só vem preenchido quando a senha
+    confere e o hash salvo está abaixo do custo alvo.
+    """
+    senha_hash = normalizar_hash(senha_hash)
+    if not senha_digitada or not senha_hash:
+        return False, None
+
+    nome = algoritmo(senha_hash)
+    if nome not in ("pbkdf2", "scrypt"):
+        return False, None
+
+    try:
+        confere = executor.executar(nome, check_password_hash, senha_hash, senha_digitada)
+    except ValueError:
+        # Parâmetros inválidos no hash salvo
+        return False, None
+
+    if confere and precisa_refazer(senha_hash):
+        return True, gerar_hash(senha_digitada)
+    return confere, None
@@ -0,0 +1,322 @@
+"""
+Servidor de produção: vários processos worker (pre-fork), cada um com
+threads por requisição.
+
+    python servidor.py --workers 4 --porta 8000
+
+- O processo mestre cria o app (create_app) e prepara o banco antes do
+  fork, então os workers já nascem com tudo importado.
+- Cada worker abre as próprias conexões do pool logo depois do fork
+  (conexões não podem ser compartilhadas entre processos).
+- Depois de --max-requisicoes (com uma variação aleatória de até 10%) o
+  worker termina as requisições em andamento (até a resposta ser fechada),
+  espera as tarefas em segundo plano por até --espera-tarefas segundos e
+  é substituído.
+- A cada --intervalo segundos o mestre registra no log as requisições e
+  req/s de cada worker.
+
+Em sistemas sem os.fork (Windows) roda um único processo com threads.
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.sharedctypes import RawArray
+
+from werkzeug.serving import make_server
+
+from config import (
+    SERVIDOR_HOST, SERVIDOR_PORTA, SERVIDOR_WORKERS, SERVIDOR_MAX_REQUISICOES,
+    SERVIDOR_CONEXOES_AQUECIDAS, SERVIDOR_INTERVALO_RELATORIO, SERVIDOR_ESPERA_TAREFAS,
+)
+
+log = logging.getLogger("listadecompras.servidor")
+
+# Campos de cada worker na memória compartilhada
+_PID, _INICIO, _REQUISICOES, _ATIVAS = range(4)
+_CAMPOS = 4
+
+# Espera pelas requisições em andamento ao sair (segundos)
+_ESPERA_REQUISICOES = 30
+
+
+# ==================== WORKER ====================
+class ContadorRequisicoes:
+    """Middleware WSGI que conta requisições e pede reciclagem no limite."""
+
+    def __init__(self, app, estatisticas, slot, limite, reciclar):
+        self.app = app
+        self.estatisticas = estatisticas
+        self.base = slot * _CAMPOS
+        self.limite = limite
+        self.reciclar = reciclar
+        self.lock = threading.Lock()
+        self.requisicoes = 0
+        self.ativas = 0
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.ativas += 1
+            self.estatisticas[self.base + _ATIVAS] = self.ativas
+        try:
+            resposta = self.app(environ, start_response)
+        except BaseException:
+            self._encerrada()
+            raise
+        # A requisição só termina quando o servidor fecha a resposta (o
+        # corpo pode ser um gerador que ainda consulta o banco)
+        return RespostaContada(resposta, self._encerrada)
+
+    def _encerrada(self):
+        with self.lock:
+            self.ativas -= 1
+            self.requisicoes += 1
+            self.estatisticas[self.base + _ATIVAS] = self.ativas
+            self.estatisticas[self.base + _REQUISICOES] = self.requisicoes
+            atingiu = self.limite and self.requisicoes == self.limite
+        if atingiu:
+            self.reciclar()
+
+
+class RespostaContada:
+    """Corpo WSGI que avisa `ao_fechar` uma única vez, no close()."""
+
+    def __init__(self, resposta, ao_fechar):
+        self.resposta = resposta
+        self.ao_fechar = ao_fechar
+        self.fechada = False
+
+    def __iter__(self):
+        return iter(self.resposta)
+
+    def close(self):
+        try:
+            fechar = getattr(self.resposta, "close", None)
+            if fechar is not None:
+                fechar()
+        finally:
+            if not self.fechada:
+                self.fechada = True
+                self.ao_fechar()
+
+
+def _rodar_worker(app, sock, args, estatisticas, slot):
+    import database
+    from tarefas import executor as tarefas
+
+    random.seed()
+    relatorio = app.extensions["relatorio_inicializacao"]
+    relatorio.marcar_fork()
+
+    base = slot * _CAMPOS
+    estatisticas[base + _PID] = os.getpid()
+    estatisticas[base + _INICIO] = time.time()
+    estatisticas[base + _REQUISICOES] = 0
+    estatisticas[base + _ATIVAS] = 0
+
+    database.aquecer(args.conexoes)
+    relatorio.marcar_worker_pronto()
+
+    limite = 0
+    if args.max_requisicoes:
+        limite = args.max_requisicoes + random.randint(0, args.max_requisicoes // 10)
+
+    servidor = None
+    parando = threading.Event()
+
+    def parar(*_):
+        # shutdown() precisa rodar fora da thread do serve_forever
+        if not parando.is_set():
+            parando.set()
+            threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+    contador = ContadorRequisicoes(app, estatisticas, slot, limite, parar)
+    servidor = make_server(
+        args.host, args.porta, contador, threaded=True, fd=sock.fileno()
+    )
+
+    signal.signal(signal.SIGTERM, parar)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    servidor.serve_forever()
+
+    # Espera as requisições em andamento antes de sair
+    limite_espera = time.monotonic() + _ESPERA_REQUISICOES
+    while contador.ativas and time.monotonic() < limite_espera:
+        time.sleep(0.05)
+
+    # Tarefas na fila viram erro; as que rodam têm até --espera-tarefas
+    restantes = tarefas.encerrar(args.espera_tarefas)
+    if restantes:
+        log.warning("Worker %d saiu com %d tarefas ainda rodando", slot, restantes)
+
+    database.descartar_conexoes()
+
+
+# ==================== MESTRE ====================
+class Mestre:
+    def __init__(self, app, sock, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.estatisticas = RawArray("d", args.workers * _CAMPOS)
+        self.workers = {}            # pid -> slot
+        self.recicladas = [0] * args.workers
+        self.totais = [0.0] * args.workers
+        self.anteriores = [0.0] * args.workers
+        self.parar = False
+
+    def iniciar_worker(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _rodar_worker(self.app, self.sock, self.args, self.estatisticas, slot)
+            except Exception:
+                log.exception("Worker %d falhou", slot)
+                codigo = 1
+            finally:
+                os._exit(codigo)
+
+        self.workers[pid] = slot
+        log.info("Worker %d iniciado (pid %d)", slot, pid)
+
+    def recolher(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            slot = self.workers.pop(pid, None)
+            if slot is None:
+                continue
+
+            base = slot * _CAMPOS
+            self.totais[slot] += self.estatisticas[base + _REQUISICOES]
+            self.anteriores[slot] = 0.0
+            self.recicladas[slot] += 1
+            log.info(
+                "Worker %d (pid %d) saiu com código %d após %d requisições",
+                slot, pid, os.waitstatus_to_exitcode(status),
+                self.estatisticas[base + _REQUISICOES]
+            )
+
+            if not self.parar:
+                self.iniciar_worker(slot)
+
+    def relatorio(self, intervalo):
+        linhas = []
+        for slot in range(self.args.workers):
+            base = slot * _CAMPOS
+            requisicoes = self.estatisticas[base + _REQUISICOES]
+            vida = max(time.time() - self.estatisticas[base + _INICIO], 1e-9)
+            recentes = (requisicoes - self.anteriores[slot]) / intervalo
+            self.anteriores[slot] = requisicoes
+            linhas.append(
+                f"w{slot} pid={int(self.estatisticas[base + _PID])} "
+                f"req={int(requisicoes)} ativas={int(self.estatisticas[base + _ATIVAS])} "
+                f"req/s={recentes:.1f} (vida {requisicoes / vida:.1f}) "
+                f"total={int(self.totais[slot] + requisicoes)} reciclado={self.recicladas[slot]}x"
+            )
+        log.info("Vazão por worker:\n  %s", "\n  ".join(linhas))
+
+    def rodar(self):
+        def pedir_parada(*_):
+            self.parar = True
+
+        signal.signal(signal.SIGTERM, pedir_parada)
+        signal.signal(signal.SIGINT, pedir_parada)
+
+        for slot in range(self.args.workers):
+            self.iniciar_worker(slot)
+
+        ultimo_relatorio = time.monotonic()
+        while not self.parar:
+            time.sleep(0.5)
+            self.recolher()
+
+            agora = time.monotonic()
+            if agora - ultimo_relatorio >= self.args.intervalo:
+                self.relatorio(agora - ultimo_relatorio)
+                ultimo_relatorio = agora
+
+        self.encerrar()
+
+    def encerrar(self):
+        log.info("Encerrando %d workers...", len(self.workers))
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # O worker espera requisições e depois tarefas; folga de 5 s
+        limite = time.monotonic() + _ESPERA_REQUISICOES + self.args.espera_tarefas + 5
+        while self.workers and time.monotonic() < limite:
+            self.recolher()
+            time.sleep(0.1)
+
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.sock.close()
+
+
+# ==================== ENTRADA ====================
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(description="Servidor de produção da Lista de Compras")
+    parser.add_argument("--host", default=SERVIDOR_HOST)
+    parser.add_argument("--porta", type=int, default=SERVIDOR_PORTA)
+    parser.add_argument("--workers", type=int, default=SERVIDOR_WORKERS)
+    parser.add_argument("--max-requisicoes", type=int, default=SERVIDOR_MAX_REQUISICOES)
+    parser.add_argument("--conexoes", type=int, default=SERVIDOR_CONEXOES_AQUECIDAS,
+                        help="conexões abertas por worker antes de atender")
+    parser.add_argument("--intervalo", type=float, default=SERVIDOR_INTERVALO_RELATORIO,
+                        help="segundos entre relatórios de vazão")
+    parser.add_argument("--espera-tarefas", type=float, default=SERVIDOR_ESPERA_TAREFAS,
+                        help="segundos que o worker espera as tarefas em execução ao sair")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(message)s")
+    args = _argumentos(argv)
+
+    from app import create_app
+    import database
+
+    # Pré-carrega o app e prepara o banco (schema, migrações, driver)
+    app = create_app({"AQUECER_BANCO": True})
+    database.aquecer(1)
+
+    if not hasattr(os, "fork"):
+        log.warning("os.fork indisponível: rodando um único processo com threads")
+        make_server(args.host, args.porta, app, threaded=True).serve_forever()
+        return 0
+
+    # Conexões abertas aqui não podem ir para os filhos
+    database.descartar_conexoes()
+
+    sock = socket.create_server((args.host, args.porta), backlog=2048)
+    sock.set_inheritable(True)
+    log.info(
+        "Escutando em %s:%d com %d workers (reciclagem a cada %d requisições)",
+        args.host, args.porta, args.workers, args.max_requisicoes
+    )
+
+    Mestre(app, sock, args).rodar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,302 @@
+"""
+Sessões guardadas no servidor.
+
+O cookie leva só um id opaco e aleatório; os dados ficam num armazém
+(arquivo SQLite local, compartilhado pelos workers, ou memória do
+processo). Na frente do armazém há um cache LRU por worker, então a
+maioria das requisições não toca no armazém.
+
+- Expiração deslizante: cada acesso estende a validade por SESSAO_DURACAO,
+  gravando no armazém no máximo a cada SESSAO_RENOVAR segundos.
+- session.clear() (login/logout) troca o id e apaga o registro antigo.
+- revogar_usuario(user_id) derruba todas as sessões de um usuário.
+- Entradas do cache LRU são revalidadas no armazém depois de
+  SESSAO_CACHE_TTL segundos, para enxergar revogações feitas em outro worker.
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+# ==================== SESSÃO ====================
+class SessaoServidor(CallbackDict, SessionMixin):
+    def __init__(self, dados=None, sid=None, expira=0.0, nova=False):
+        def alterada(_):
+            self.modified = True
+
+        super().__init__(dados, alterada)
+        self.sid = sid
+        self.expira = expira
+        self.new = nova
+        self.modified = False
+        self.trocar_id = False
+
+    def clear(self):
+        # Login e logout limpam a sessão: nunca reaproveitar o id anterior
+        super().clear()
+        self.trocar_id = True
+
+
+# ==================== ARMAZÉNS ====================
+class ArmazemMemoria:
+    """Dicionário no processo (um único worker ou testes)."""
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def ler(self, sid):
+        registro = self._dados.get(sid)
+        if registro is None or registro[2] < time.time():
+            return None
+        return registro
+
+    def gravar(self, sid, user_id, dados, expira):
+        with self._lock:
+            self._dados[sid] = (user_id, dados, expira)
+
+    def renovar(self, sid, expira):
+        with self._lock:
+            registro = self._dados.get(sid)
+            if registro:
+                self._dados[sid] = (registro[0], registro[1], expira)
+
+    def apagar(self, sid):
+        with self._lock:
+            self._dados.pop(sid, None)
+
+    def apagar_usuario(self, user_id):
+        with self._lock:
+            sids = [sid for sid, r in self._dados.items() if r[0] == user_id]
+            for sid in sids:
+                del self._dados[sid]
+            return len(sids)
+
+    def limpar_expiradas(self):
+        agora = time.time()
+        with self._lock:
+            for sid in [sid for sid, r in self._dados.items() if r[2] < agora]:
+                del self._dados[sid]
+
+
+class ArmazemSqlite:
+    """Arquivo SQLite local, compartilhado entre os workers do servidor."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessoes (
+            sid     TEXT PRIMARY KEY,
+            user_id INTEGER,
+            dados   TEXT NOT NULL,
+            expira  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_sessoes_user_id ON sessoes (user_id);
+        CREATE INDEX IF NOT EXISTS ix_sessoes_expira ON sessoes (expira);
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with sqlite3.connect(caminho, timeout=5) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _conexao(self):
+        # Uma conexão por thread; após o fork cada worker abre as suas
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            local.conn.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+        return local.conn
+
+    def ler(self, sid):
+        return self._conexao().execute(
+            "SELECT user_id, dados, expira FROM sessoes WHERE sid = ? AND expira >= ?",
+            (sid, time.time())
+        ).fetchone()
+
+    def gravar(self, sid, user_id, dados, expira):
+        self._conexao().execute(
+            "INSERT OR REPLACE INTO sessoes (sid, user_id, dados, expira) VALUES (?, ?, ?, ?)",
+            (sid, user_id, dados, expira)
+        )
+
+    def renovar(self, sid, expira):
+        self._conexao().execute("UPDATE sessoes SET expira = ? WHERE sid = ?", (expira, sid))
+
+    def apagar(self, sid):
+        self._conexao().execute("DELETE FROM sessoes WHERE sid = ?", (sid,))
+
+    def apagar_usuario(self, user_id):
+        return self._conexao().execute(
+            "DELETE FROM sessoes WHERE user_id = ?", (user_id,)
+        ).rowcount
+
+    def limpar_expiradas(self):
+        self._conexao().execute("DELETE FROM sessoes WHERE expira < ?", (time.time(),))
+
+
+def criar_armazem(nome, caminho=None):
+    if nome == "sqlite":
+        return ArmazemSqlite(caminho)
+    if nome == "memoria":
+        return ArmazemMemoria()
+    raise ValueError(f"Armazém de sessão desconhecido: {nome}")
+
+
+# ==================== INTERFACE FLASK ====================
+class SessoesServidor(SessionInterface):
+    def __init__(self, armazem, duracao=8 * 3600, renovar=60,
+                 cache_tamanho=5000, cache_ttl=5.0, limpeza=600):
+        self.armazem = armazem
+        self.duracao = duracao
+        self.renovar = renovar
+        self.cache_tamanho = cache_tamanho
+        self.cache_ttl = cache_ttl
+        self.limpeza = limpeza
+
+        # sid -> (user_id, dados, expira, verificado_em)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._ultima_limpeza = time.monotonic()
+
+        self.acertos = 0
+        self.leituras = 0
+        self.nao_encontradas = 0
+        self.gravacoes = 0
+        self.revogadas = 0
+
+    # ---------------- CACHE LRU ----------------
+    def _do_cache(self, sid):
+        with self._lock:
+            registro = self._cache.get(sid)
+            if registro is None:
+                return None
+            if time.monotonic() - registro[3] > self.cache_ttl:
+                del self._cache[sid]
+                return None
+            self._cache.move_to_end(sid)
+            return registro
+
+    def _guardar_cache(self, sid, user_id, dados, expira):
+        with self._lock:
+            self._cache[sid] = (user_id, dados, expira, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_tamanho:
+                self._cache.popitem(last=False)
+
+    def _tirar_cache(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    # ---------------- LEITURA ----------------
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return SessaoServidor(nova=True)
+
+        registro = self._do_cache(sid)
+        if registro is not None:
+            self.acertos += 1
+        else:
+            self.leituras += 1
+            linha = self.armazem.ler(sid)
+            if linha is None:
+                self.nao_encontradas += 1
+                return SessaoServidor(nova=True)
+            registro = (linha[0], linha[1], linha[2], time.monotonic())
+            self._guardar_cache(sid, *registro[:3])
+
+        if registro[2] < time.time():
+            self._tirar_cache(sid)
+            return SessaoServidor(nova=True)
+
+        return SessaoServidor(json.loads(registro[1]), sid=sid, expira=registro[2])
+
+    # ---------------- GRAVAÇÃO ----------------
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        if session.sid and (session.trocar_id or not session):
+            self.armazem.apagar(session.sid)
+            self._tirar_cache(session.sid)
+            session.sid = None
+
+        if not session:
+            if not session.new or session.modified:
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+
+        agora = time.time()
+        expira = agora + self.duracao
+
+        if session.sid is None or session.modified:
+            session.sid = session.sid or secrets.token_urlsafe(32)
+            dados = json.dumps(dict(session), separators=(",", ":"))
+            self.armazem.gravar(session.sid, session.get("user_id"), dados, expira)
+            self._guardar_cache(session.sid, session.get("user_id"), dados, expira)
+            self.gravacoes += 1
+        elif session.expira - agora < self.duracao - self.renovar:
+            # Expiração deslizante sem gravar a cada requisição
+            self.armazem.renovar(session.sid, expira)
+            registro = self._do_cache(session.sid)
+            if registro is not None:
+                self._guardar_cache(session.sid, registro[0], registro[1], expira)
+        else:
+            expira = session.expira
+
+        response.set_cookie(
+            nome, session.sid,
+            expires=expira,
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+        if time.monotonic() - self._ultima_limpeza > self.limpeza:
+            self._ultima_limpeza = time.monotonic()
+            self.armazem.limpar_expiradas()
+
+    # ---------------- REVOGAÇÃO ----------------
+    def revogar_usuario(self, user_id):
+        """Derruba todas as sessões do usuário (ex.: ao ser desativado)."""
+        quantidade = self.armazem.apagar_usuario(user_id)
+        with self._lock:
+            for sid in [sid for sid, r in self._cache.items() if r[0] == user_id]:
+                del self._cache[sid]
+        self.revogadas += quantidade
+        return quantidade
+
+    def metricas(self):
+        consultas = self.acertos + self.leituras
+        return {
+            "cache_tamanho": len(self._cache),
+            "acertos_cache": self.acertos,
+            "leituras_armazem": self.leituras,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "nao_encontradas": self.nao_encontradas,
+            "gravacoes": self.gravacoes,
+            "revogadas": self.revogadas,
+        }
+
+
+def revogar_usuario(app, user_id):
+    """Revoga as sessões do usuário se o app usa sessões no servidor."""
+    interface = app.session_interface
+    if isinstance(interface, SessoesServidor):
+        return interface.revogar_usuario(user_id)
+    return 0
@@ -0,0 +1,77 @@
+// ================= BUSCA (AUTOCOMPLETAR) =================
+// Consulta /busca/clientes e /busca/produtos enquanto o usuário digita,
+// em vez de a página trazer a tabela inteira.
+
+// Chama `desenhar(itens)` com o resultado da busca do texto de `campo`
+function buscarAoDigitar(campo, url, desenhar, espera = 200) {
+    let timer = null;
+    let controle = null;
+
+    async function carregar() {
+        if (controle) controle.abort();
+        controle = new AbortController();
+
+        let resposta;
+        try {
+            resposta = await fetch(`${url}?q=${encodeURIComponent(campo.value)}`,
+                                   { signal: controle.signal });
+        } catch (e) {
+            return;  // cancelada por uma busca mais nova
+        }
+        if (resposta.ok) desenhar(await resposta.json());
+    }
+
+    campo.addEventListener("input", () => {
+        clearTimeout(timer);
+        timer = setTimeout(carregar, espera);
+    });
+
+    return carregar;
+}
+
+// Campo de texto + hidden com o id; a lista de sugestões abre embaixo
+function autocompletar(campo, oculto, url, rotulo = item => item.nome) {
+    const lista = document.createElement("div");
+    lista.className = "list-group position-absolute w-100 shadow-sm d-none";
+    lista.style.zIndex = 1050;
+    lista.style.maxHeight = "300px";
+    lista.style.overflowY = "auto";
+    campo.parentElement.classList.add("position-relative");
+    campo.after(lista);
+
+    const validar = () => campo.setCustomValidity(
+        campo.required && !oculto.value ? "Selecione um item da lista." : ""
+    );
+
+    const carregar = buscarAoDigitar(campo, url, itens => {
+        lista.innerHTML = "";
+        itens.forEach(item => {
+            const opcao = document.createElement("button");
+            opcao.type = "button";
+            opcao.className = "list-group-item list-group-item-action";
+            opcao.textContent = rotulo(item);
+            // mousedown: escolhe antes do blur fechar a lista
+            opcao.addEventListener("mousedown", e => {
+                e.preventDefault();
+                campo.value = item.nome;
+                oculto.value = item.id;
+                validar();
+                lista.classList.add("d-none");
+            });
+            lista.appendChild(opcao);
+        });
+        lista.classList.toggle("d-none", !itens.length);
+    });
+
+    campo.setAttribute("autocomplete", "off");
+    campo.addEventListener("input", () => { oculto.value = ""; validar(); });
+    campo.addEventListener("focus", carregar);
+    campo.addEventListener("blur", () => lista.classList.add("d-none"));
+    validar();
+}
+
+// Campo de cliente padrão dos formulários de pedido
+function autocompletarCliente(campo, oculto, url) {
+    autocompletar(campo, oculto, url,
+                  c => c.email ? `${c.nome} — ${c.email}` : c.nome);
+}
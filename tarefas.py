@@ -0,0 +1,391 @@
+"""
+Tarefas em segundo plano (importações de CSV, recálculos).
+
+A rota registra a tarefa na tabela Tarefas, entrega os dados a um
+ThreadPoolExecutor do próprio worker e responde na hora com o id; a tela
+/tarefas/<id> acompanha o progresso e mostra o resumo no fim.
+
+- Cada worker roda no máximo TAREFAS_SIMULTANEAS tarefas, e o mesmo
+  limite vale para o total de tarefas "executando" na tabela (todos os
+  workers): a tarefa espera na fila até abrir vaga, para não tirar
+  conexões e CPU das requisições interativas
+- Os dados (ex.: o texto do CSV) ficam só na memória do worker, que
+  renova Tarefas.atualizado_em a cada TAREFAS_SINAL_S enquanto a tarefa
+  está na fila ou rodando; sem sinal há mais de TAREFAS_SEM_SINAL_S (o
+  worker morreu) a tarefa aparece como erro na consulta, e a thread de
+  gravação de cada worker com tarefas grava o erro no mesmo intervalo
+- Tipos de tarefa são registrados com @tipo_tarefa nos módulos das telas
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import Blueprint, render_template, session, jsonify, flash, redirect, url_for
+
+from config import TAREFAS_SIMULTANEAS, TAREFAS_ESPERA, TAREFAS_SINAL_S, TAREFAS_SEM_SINAL_S
+from database import get_write_connection
+from permissoes import PERFIL_ADMIN
+
+tarefas_bp = Blueprint("tarefas", __name__, url_prefix="/tarefas")
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+
+# Intervalo entre gravações do progresso na tabela (segundos)
+PROGRESSO_INTERVALO = 1.0
+
+
+# ==================== TIPOS DE TAREFA ====================
+_TIPOS = {}
+
+
+def tipo_tarefa(nome, descricao, voltar=None):
+    """
+    Registra `func(conn, dados, progresso)` como tipo de tarefa.
+
+    `progresso(feito, total=None)` atualiza a barra da tela; o retorno da
+    função (dict) é gravado como resumo. `voltar` é o endpoint do botão
+    "Voltar" da tela da tarefa.
+    """
+    def decorator(func):
+        _TIPOS[nome] = {"func": func, "descricao": descricao, "voltar": voltar}
+        return func
+    return decorator
+
+
+SEM_SINAL = "Processo encerrado antes do fim da tarefa"
+
+
+def _marcar_sem_sinal(cursor, sem_sinal=TAREFAS_SEM_SINAL_S):
+    """Marca como erro as tarefas abertas cujo worker parou de dar sinal."""
+    cursor.execute("""
+        UPDATE Tarefas
+        SET situacao = ?, erro = ?, concluida_em = GETDATE()
+        WHERE situacao IN (?, ?)
+          AND ISNULL(atualizado_em, criada_em) < DATEADD(SECOND, -?, GETDATE())
+    """, (ERRO, SEM_SINAL, PENDENTE, EXECUTANDO, int(sem_sinal)))
+
+
+# ==================== EXECUTOR ====================
+class ExecutorTarefas:
+    def __init__(self, simultaneas=1, espera=1.0, sinal=10.0):
+        self.simultaneas = simultaneas
+        self.espera = espera
+        self.sinal = sinal
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._gravador = None
+
+        # tarefa_id -> (feito, total) das tarefas em execução neste processo
+        self._andamento = {}
+        self._pendentes = set()
+        # Tarefas deste processo ainda abertas (na fila ou rodando)
+        self._vivas = set()
+        # future -> tarefa_id, para o encerramento do worker
+        self._futuras = {}
+        self._encerrando = False
+
+        self.enviadas = 0
+        self.concluidas = 0
+        self.erros = 0
+        self.tempo_fila = 0.0
+        self.tempo_execucao = 0.0
+
+    def _obter_executor(self):
+        # Criado sob demanda e recriado depois de fork (threads não sobrevivem)
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.simultaneas, thread_name_prefix="tarefa"
+                )
+                self._pid = os.getpid()
+                # O que veio do processo pai não roda aqui
+                self._andamento.clear()
+                self._pendentes.clear()
+                self._vivas.clear()
+                self._futuras.clear()
+                self._encerrando = False
+            return self._executor
+
+    # ---------------- ENVIO ----------------
+    def enviar(self, tipo, dados, usuario_id=None, descricao=None):
+        """Registra a tarefa e a coloca na fila; retorna o id."""
+        if tipo not in _TIPOS:
+            raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+
+        pool = self._obter_executor()
+        with get_write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO Tarefas (tipo, descricao, situacao, usuario_id, atualizado_em)
+                OUTPUT INSERTED.id
+                VALUES (?, ?, ?, ?, GETDATE())
+            """, (tipo, descricao or _TIPOS[tipo]["descricao"], PENDENTE, usuario_id))
+            tarefa_id = int(cursor.fetchone()[0])
+            conn.commit()
+
+        with self._lock:
+            self._vivas.add(tarefa_id)
+        self._iniciar_gravador()
+
+        self.enviadas += 1
+        futura = pool.submit(self._rodar, tarefa_id, tipo, dados)
+        with self._lock:
+            self._futuras[futura] = tarefa_id
+        futura.add_done_callback(self._descartar_futura)
+        return tarefa_id
+
+    def _descartar_futura(self, futura):
+        with self._lock:
+            self._futuras.pop(futura, None)
+
+    # ---------------- ENCERRAMENTO ----------------
+    def encerrar(self, espera):
+        """
+        Encerramento do worker: tarefas ainda na fila são marcadas como erro
+        e as que estão rodando têm até `espera` segundos para terminar.
+        Retorna quantas continuavam rodando no fim da espera.
+        """
+        with self._lock:
+            pool = self._executor if self._pid == os.getpid() else None
+            self._encerrando = True
+        if pool is None:
+            return 0
+
+        # Copia antes: cancelar dispara o callback que tira a future do dict
+        with self._lock:
+            futuras = dict(self._futuras)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        canceladas = [t for f, t in futuras.items() if f.cancelled()]
+        for tarefa_id in canceladas:
+            self.erros += 1
+            self._finalizar(tarefa_id, ERRO, erro="Servidor reiniciado antes do início da tarefa")
+            with self._lock:
+                self._vivas.discard(tarefa_id)
+
+        _, restantes = wait([f for f in futuras if not f.cancelled()], timeout=espera)
+        return len(restantes)
+
+    # ---------------- EXECUÇÃO ----------------
+    def _ocupar_vaga(self, tarefa_id):
+        """Passa a tarefa para "executando" se houver vaga entre todos os workers."""
+        # UPDLOCK + HOLDLOCK na contagem: no READ COMMITTED do SQL Server
+        # dois workers veriam a mesma contagem e ocupariam a mesma vaga; assim
+        # o segundo espera o commit do primeiro. (Vagas de workers mortos são
+        # liberadas pela thread de gravação, em _gravar_andamento.)
+        with get_write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE Tarefas
+                SET situacao = ?, iniciada_em = GETDATE(), atualizado_em = GETDATE()
+                WHERE id = ? AND situacao = ?
+                  AND (SELECT COUNT(*) FROM Tarefas WITH (UPDLOCK, HOLDLOCK)
+                       WHERE situacao = ?) < ?
+            """, (EXECUTANDO, tarefa_id, PENDENTE, EXECUTANDO, self.simultaneas))
+            ocupou = cursor.rowcount == 1
+            conn.commit()
+        return ocupou
+
+    def _finalizar(self, tarefa_id, situacao, resultado=None, erro=None):
+        feito, total = self.andamento(tarefa_id) or (None, None)
+        with get_write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE Tarefas
+                SET situacao = ?, resultado = ?, erro = ?, concluida_em = GETDATE(),
+                    feito = COALESCE(?, feito), total = COALESCE(?, total)
+                WHERE id = ?
+            """, (situacao,
+                  json.dumps(resultado, ensure_ascii=False, default=str) if resultado is not None else None,
+                  erro, feito, total, tarefa_id))
+            conn.commit()
+
+    def _progresso(self, tarefa_id):
+        # Só guarda em memória: a tarefa pode estar com uma transação aberta
+        # (no SQLite, gravar de outra conexão esperaria o commit dela). A
+        # thread de gravação persiste o último valor a cada intervalo.
+        def progresso(feito, total=None):
+            with self._lock:
+                anterior = self._andamento.get(tarefa_id, (0, None))
+                self._andamento[tarefa_id] = (feito, total if total is not None else anterior[1])
+                self._pendentes.add(tarefa_id)
+
+        return progresso
+
+    def andamento(self, tarefa_id):
+        """(feito, total) em memória, se a tarefa roda neste processo."""
+        with self._lock:
+            return self._andamento.get(tarefa_id)
+
+    def _iniciar_gravador(self):
+        with self._lock:
+            if self._gravador is not None and self._gravador.is_alive():
+                return
+            self._gravador = threading.Thread(
+                target=self._gravar_andamento, name="tarefa-progresso", daemon=True
+            )
+            self._gravador.start()
+
+    def _gravar_andamento(self):
+        # Grava o progresso a cada PROGRESSO_INTERVALO e, a cada `sinal`
+        # segundos, renova atualizado_em das tarefas abertas daqui e marca
+        # como erro as de workers que pararam de dar sinal
+        ultimo_sinal = time.monotonic()
+        while True:
+            time.sleep(PROGRESSO_INTERVALO)
+            agora = time.monotonic()
+            sinal = agora - ultimo_sinal >= self.sinal
+            with self._lock:
+                valores = [(*self._andamento[t], t) for t in self._pendentes if t in self._andamento]
+                self._pendentes.clear()
+                vivas = [(t, PENDENTE, EXECUTANDO) for t in self._vivas] if sinal else []
+            if not valores and not sinal:
+                continue
+            try:
+                with get_write_connection() as conn:
+                    cursor = conn.cursor()
+                    if valores:
+                        cursor.executemany("""
+                            UPDATE Tarefas SET feito = ?, total = ?, atualizado_em = GETDATE()
+                            WHERE id = ?
+                        """, valores)
+                    if vivas:
+                        cursor.executemany("""
+                            UPDATE Tarefas SET atualizado_em = GETDATE()
+                            WHERE id = ? AND situacao IN (?, ?)
+                        """, vivas)
+                    if sinal:
+                        _marcar_sem_sinal(cursor)
+                    conn.commit()
+            except Exception:
+                # Tenta de novo no próximo intervalo
+                with self._lock:
+                    self._pendentes.update(t for *_, t in valores)
+            else:
+                if sinal:
+                    ultimo_sinal = agora
+
+    def _rodar(self, tarefa_id, tipo, dados):
+        enfileirada = time.monotonic()
+        try:
+            while not self._ocupar_vaga(tarefa_id):
+                if self._encerrando:
+                    raise RuntimeError("servidor reiniciado antes do início da tarefa")
+                time.sleep(self.espera)
+        except Exception as e:
+            self.erros += 1
+            self._finalizar(tarefa_id, ERRO, erro=f"Falha ao iniciar: {e}")
+            return
+
+        inicio = time.monotonic()
+        self.tempo_fila += inicio - enfileirada
+
+        try:
+            with get_write_connection() as conn:
+                resultado = _TIPOS[tipo]["func"](conn, dados, self._progresso(tarefa_id))
+        except Exception as e:
+            self.erros += 1
+            self._finalizar(tarefa_id, ERRO, erro=str(e))
+        else:
+            self.concluidas += 1
+            self._finalizar(tarefa_id, CONCLUIDA, resultado=resultado)
+        finally:
+            self.tempo_execucao += time.monotonic() - inicio
+            with self._lock:
+                self._andamento.pop(tarefa_id, None)
+                self._pendentes.discard(tarefa_id)
+                self._vivas.discard(tarefa_id)
+
+    def metricas(self):
+        return {
+            "simultaneas": self.simultaneas,
+            "enviadas": self.enviadas,
+            "concluidas": self.concluidas,
+            "erros": self.erros,
+            "tempo_fila_total": self.tempo_fila,
+            "tempo_execucao_total": self.tempo_execucao,
+        }
+
+
+executor = ExecutorTarefas(TAREFAS_SIMULTANEAS, TAREFAS_ESPERA, TAREFAS_SINAL_S)
+
+
+# ==================== CONSULTA ====================
+def obter_tarefa(tarefa_id):
+    """
+    Dados da tarefa (dict) ou None. Só lê: tarefa aberta sem sinal do
+    worker aparece como erro, e quem grava o erro é _gravar_andamento.
+    """
+    with get_write_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, tipo, descricao, situacao, usuario_id,
+                   feito, total, resultado, erro,
+                   criada_em, iniciada_em, concluida_em,
+                   CASE WHEN ISNULL(atualizado_em, criada_em) < DATEADD(SECOND, -?, GETDATE())
+                        THEN 1 ELSE 0 END AS sem_sinal
+            FROM Tarefas WHERE id = ?
+        """, (int(TAREFAS_SEM_SINAL_S), tarefa_id))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+    situacao, erro = row.situacao, row.erro
+    if situacao in (PENDENTE, EXECUTANDO) and row.sem_sinal:
+        situacao, erro = ERRO, SEM_SINAL
+
+    feito, total = executor.andamento(row.id) or (row.feito, row.total)
+    tipo = _TIPOS.get(row.tipo, {})
+    return {
+        "id": row.id,
+        "tipo": row.tipo,
+        "descricao": row.descricao,
+        "situacao": situacao,
+        "usuario_id": row.usuario_id,
+        "feito": int(feito or 0),
+        "total": total,
+        "percentual": round(100 * (feito or 0) / total) if total else None,
+        "resultado": json.loads(row.resultado) if row.resultado else None,
+        "erro": erro,
+        "criada_em": str(row.criada_em),
+        "iniciada_em": str(row.iniciada_em) if row.iniciada_em else None,
+        "concluida_em": str(row.concluida_em) if row.concluida_em else None,
+        "voltar": tipo.get("voltar"),
+    }
+
+
+def _pode_ver(tarefa):
+    """Só o usuário que disparou a tarefa ou um administrador."""
+    if tarefa is None:
+        return False
+    if session.get("perfil_id") == PERFIL_ADMIN:
+        return True
+    dono = tarefa["usuario_id"]
+    return dono is not None and dono == session.get("user_id")
+
+
+# =====================================================
+# ACOMPANHAMENTO
+# =====================================================
+@tarefas_bp.route("/<int:id>")
+def tarefa_detalhe(id):
+    tarefa = obter_tarefa(id)
+    if not _pode_ver(tarefa):
+        flash("Tarefa não encontrada.", "warning")
+        return redirect(url_for("index"))
+
+    return render_template("tarefas/tarefa.html", tarefa=tarefa)
+
+
+@tarefas_bp.route("/<int:id>/situacao")
+def tarefa_situacao(id):
+    tarefa = obter_tarefa(id)
+    if not _pode_ver(tarefa):
+        return jsonify({"erro": "Tarefa não encontrada"}), 404
+    return jsonify(tarefa)
@@ -1,2 +1,2 @@
-from empresa import empresa_bp
+from empresa.empresa import empresa_bp
 print("IMPORT OK:", empresa_bp)
\ No newline at end of file
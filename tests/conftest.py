@@ -0,0 +1,55 @@
+"""
+Testes contra o backend SQLite, num banco descartável por sessão.
+
+config.py lê o ambiente na importação: as variáveis são definidas aqui,
+antes de qualquer módulo do app ser importado pelos testes.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_PASTA = tempfile.mkdtemp(prefix="listadecompras-testes-")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_CAMINHO"] = os.path.join(_PASTA, "testes.db")
+os.environ["SQLITE_REPLICA_CAMINHO"] = ""
+os.environ["RECIBOS_PASTA"] = os.path.join(_PASTA, "recibos")
+os.environ["SQL_LENTO_LOG"] = os.path.join(_PASTA, "sql_lento.log")
+
+# Tabelas de movimento, esvaziadas antes de cada teste que usa o banco
+_TABELAS = (
+    "PedidoItens", "Pedidos", "VendasDia", "VendasMesCliente",
+    "VendasMesProduto", "VendasVersao", "Produtos", "Clientes",
+)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_PASTA, ignore_errors=True)
+
+
+@pytest.fixture
+def conn():
+    """Conexão de escrita com as tabelas de movimento vazias."""
+    from database import get_write_connection
+
+    with get_write_connection() as conexao:
+        cursor = conexao.cursor()
+        for tabela in _TABELAS:
+            cursor.execute(f"DELETE FROM {tabela}")
+        conexao.commit()
+        yield conexao
+        conexao.rollback()
+
+
+@pytest.fixture
+def cliente(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Clientes (nome, email, telefone)
+        OUTPUT INSERTED.id
+        VALUES (?, ?, ?)
+    """, ("Maria Teste", "maria@teste.com", "11 99999-0000"))
+    cliente_id = int(cursor.fetchone()[0])
+    conn.commit()
+    return cliente_id
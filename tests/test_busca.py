@@ -0,0 +1,78 @@
+from collections import namedtuple
+
+import pytest
+
+from busca import IndicePrefixo, dobrar
+
+Registro = namedtuple("Registro", "id nome")
+
+NOMES = [
+    "Ana Souza", "João Ávila", "Joana Prado", "Mariana Lima",
+    "Pedro Souza Filho", "Ânderson Costa", "Luana",
+]
+
+
+@pytest.fixture
+def indice():
+    return IndicePrefixo([Registro(i, n) for i, n in enumerate(NOMES)], lambda r: r.nome)
+
+
+def nomes(resultados):
+    return [r.nome for r in resultados]
+
+
+def test_dobrar():
+    assert dobrar("  João ÁVILA ") == "joao avila"
+    assert dobrar(None) == ""
+
+
+def test_prefixo_de_qualquer_palavra(indice):
+    assert nomes(indice.buscar("sou")) == ["Ana Souza", "Pedro Souza Filho"]
+    assert nomes(indice.buscar("jo")) == ["João Ávila", "Joana Prado"]
+
+
+def test_ignora_acento_e_caixa(indice):
+    assert nomes(indice.buscar("JOAO")) == ["João Ávila"]
+    assert nomes(indice.buscar("anderson")) == ["Ânderson Costa"]
+
+
+def test_todas_as_palavras_precisam_casar(indice):
+    assert nomes(indice.buscar("souza fi")) == ["Pedro Souza Filho"]
+    assert indice.buscar("ana costa") == []
+
+
+def test_completa_com_trecho_depois_dos_prefixos(indice):
+    # "ana" só é prefixo em Ana; Joana, Mariana e Luana vêm do trecho
+    assert nomes(indice.buscar("ana")) == [
+        "Ana Souza", "Joana Prado", "Mariana Lima", "Luana",
+    ]
+
+
+def test_trecho_curto_nao_completa(indice):
+    assert nomes(indice.buscar("an")) == ["Ana Souza", "Ânderson Costa"]
+
+
+def test_limite(indice):
+    assert nomes(indice.buscar("ana", limite=2)) == ["Ana Souza", "Joana Prado"]
+    assert nomes(indice.buscar("an", limite=1)) == ["Ana Souza"]
+    assert len(indice.buscar("ana", limite=3)) == 3
+
+
+def test_termo_vazio_devolve_os_primeiros(indice):
+    assert nomes(indice.buscar("  ", limite=2)) == NOMES[:2]
+
+
+def test_email_entra_na_busca():
+    Cliente = namedtuple("Cliente", "nome email")
+    indice = IndicePrefixo(
+        [Cliente("Ana", "ana.souza@exemplo.com"), Cliente("Bia", "bia@outro.com")],
+        lambda c: f"{c.nome} {c.email}",
+    )
+    assert [c.nome for c in indice.buscar("exemplo")] == ["Ana"]
+    assert [c.nome for c in indice.buscar("souza")] == ["Ana"]
+
+
+def test_indice_vazio():
+    indice = IndicePrefixo([], lambda r: "")
+    assert len(indice) == 0
+    assert indice.buscar("ana") == []
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from banco.dialeto import dividir_lote, traduzir
+
+
+def sql(comando):
+    return " ".join(traduzir(comando)[0].split())
+
+
+def test_top_no_fim_do_comando():
+    assert sql("SELECT TOP 5 id FROM t ORDER BY id") == "SELECT id FROM t ORDER BY id LIMIT 5"
+    assert sql("SELECT DISTINCT TOP (2) a FROM t;") == "SELECT DISTINCT a FROM t LIMIT 2;"
+
+
+def test_top_em_subconsulta_fica_dentro_dos_parenteses():
+    assert sql(
+        "SELECT p.id, (SELECT TOP 1 nome FROM c WHERE c.id = p.cid ORDER BY nome) AS n FROM p"
+    ) == "SELECT p.id, (SELECT nome FROM c WHERE c.id = p.cid ORDER BY nome LIMIT 1) AS n FROM p"
+
+
+def test_top_aninhado():
+    assert sql(
+        "SELECT TOP 10 * FROM (SELECT TOP 3 id FROM t ORDER BY id DESC) x ORDER BY id"
+    ) == "SELECT * FROM (SELECT id FROM t ORDER BY id DESC LIMIT 3) x ORDER BY id LIMIT 10"
+
+
+def test_top_dentro_de_literal_nao_muda():
+    assert sql("SELECT id FROM t WHERE nome = 'SELECT TOP 3 (x)'") == \
+        "SELECT id FROM t WHERE nome = 'SELECT TOP 3 (x)'"
+
+
+def test_top_em_subconsulta_executa_no_sqlite():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE c (id INTEGER, nome TEXT);
+        INSERT INTO c VALUES (1, 'b'), (1, 'a'), (2, 'c');
+    """)
+    comando, _ = traduzir("""
+        SELECT id, (SELECT TOP 1 nome FROM c AS d WHERE d.id = c.id ORDER BY nome) AS primeiro
+        FROM c GROUP BY id ORDER BY id
+    """)
+    assert conn.execute(comando).fetchall() == [(1, "a"), (2, "c")]
+
+
+def test_offset_fetch_troca_parametros():
+    comando, trocar = traduzir("SELECT id FROM t ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+    assert " ".join(comando.split()) == "SELECT id FROM t ORDER BY id LIMIT ? OFFSET ?"
+    assert trocar
+
+
+def test_output_inserted():
+    assert sql("INSERT INTO t (a, b) OUTPUT INSERTED.id, INSERTED.b VALUES (?, ?)") == \
+        "INSERT INTO t (a, b) VALUES (?, ?) RETURNING id, b"
+
+
+@pytest.mark.parametrize("tsql, sqlite", [
+    ("SELECT GETDATE()", "SELECT datetime('now', 'localtime')"),
+    ("SELECT ISNULL(a, 0), LEN(b) FROM t", "SELECT IFNULL(a, 0), LENGTH(b) FROM t"),
+    ("SELECT CONVERT(date, data) FROM t", "SELECT date(data) FROM t"),
+    ("SELECT FORMAT(data, 'MM/yyyy') FROM t", "SELECT strftime('%m/%Y', data) FROM t"),
+    ("SELECT 1 FROM dbo.t WHERE n = N'x'", "SELECT 1 FROM t WHERE n = 'x'"),
+    ("UPDATE t WITH (UPDLOCK, SERIALIZABLE) SET a = 1", "UPDATE t SET a = 1"),
+])
+def test_funcoes_e_sintaxe(tsql, sqlite):
+    assert sql(tsql) == sqlite
+
+
+def test_dateadd_executa_no_sqlite():
+    comando, _ = traduzir("SELECT DATEADD(SECOND, -?, '2024-01-01 00:00:10')")
+    assert sqlite3.connect(":memory:").execute(comando, (20,)).fetchone() == ("2023-12-31 23:59:50",)
+
+
+def test_dividir_lote_ignora_ponto_e_virgula_em_literal():
+    assert dividir_lote("INSERT INTO t VALUES ('a;b', ?); SELECT ?") == (
+        ("INSERT INTO t VALUES ('a;b', ?)", 1),
+        (" SELECT ?", 1),
+    )
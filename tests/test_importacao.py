@@ -0,0 +1,112 @@
+import pytest
+
+import resumos
+from catalogo import catalogo, incrementar_versao
+from importacao import importar_pedidos
+
+CABECALHO = "pedido;cliente_email;pagamento;produto;quantidade;preco;desconto;data\n"
+
+ARQUIVO = CABECALHO + (
+    "1;maria@teste.com;Pix;Arroz;2;;;2024-05-03\n"
+    "1;maria@teste.com;Pix;Feijão;1;7,25;;\n"
+    "2;MARIA@teste.com;Dinheiro;Arroz;1;;1,00;03/05/2024\n"
+)
+
+
+@pytest.fixture
+def produtos(conn, cliente):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO Produtos (nome, preco) VALUES (?, ?)",
+        [("Arroz", 10.5), ("Feijão", 8.0)],
+    )
+    incrementar_versao(cursor)
+    conn.commit()
+    catalogo.invalidar()
+
+
+def pedidos_gravados(conn):
+    """[(código, total, item, quantidade, preço)], com o código tirado da ref."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT p.importacao_ref, p.total, i.nome, i.quantidade, i.preco
+        FROM Pedidos p JOIN PedidoItens i ON i.pedido_id = p.id
+        ORDER BY p.id, i.nome
+    """)
+    return [(r[0].split(":", 1)[1], *r[1:]) for r in cursor.fetchall()]
+
+
+def test_importa_e_liga_itens_aos_pedidos(conn, produtos):
+    resultado = importar_pedidos(conn, ARQUIVO, "PAGO")
+
+    assert (resultado.pedidos, resultado.itens, resultado.rejeitados) == (2, 3, [])
+    assert pedidos_gravados(conn) == [
+        ("1", 28.25, "Arroz", 2, 10.5),
+        ("1", 28.25, "Feijão", 1, 7.25),
+        ("2", 9.5, "Arroz", 1, 10.5),
+    ]
+    assert resumos.conferir(conn.cursor()) == []
+
+
+def test_mesmo_arquivo_nao_duplica(conn, produtos):
+    importar_pedidos(conn, ARQUIVO, "PAGO")
+    resultado = importar_pedidos(conn, ARQUIVO, "PAGO")
+
+    assert resultado.pedidos == 0
+    assert resultado.rejeitados == [
+        (2, "pedido 1 já importado"),
+        (3, "pedido 1 rejeitado (erro em outra linha)"),
+        (4, "pedido 2 já importado"),
+    ]
+    assert len(pedidos_gravados(conn)) == 3
+
+
+def test_outro_arquivo_com_os_mesmos_codigos_e_aceito(conn, produtos):
+    importar_pedidos(conn, ARQUIVO, "PAGO")
+    outro = CABECALHO + "1;maria@teste.com;Pix;Feijão;3;;;2024-05-04\n"
+    resultado = importar_pedidos(conn, outro, "PAGO")
+
+    assert (resultado.pedidos, resultado.rejeitados) == (1, [])
+    assert pedidos_gravados(conn)[-1] == ("1", 24.0, "Feijão", 3, 8.0)
+    assert resumos.conferir(conn.cursor()) == []
+
+
+def test_planilha_corrigida_so_grava_os_pedidos_que_faltavam(conn, produtos):
+    com_erro = ARQUIVO + "3;maria@teste.com;Pix;Feijão;x;;;2024-05-05\n"
+    primeira = importar_pedidos(conn, com_erro, "PAGO")
+    assert (primeira.pedidos, [n for n, _ in primeira.rejeitados]) == (2, [5])
+
+    # Mesmo arquivo com a linha corrigida e as linhas em outra ordem
+    corrigido = CABECALHO + (
+        "3;maria@teste.com;Pix;Feijão;2;;;2024-05-05\n"
+        "2;MARIA@teste.com;Dinheiro;Arroz;1;;1,00;03/05/2024\n"
+        "1;maria@teste.com;Pix;Feijão;1;7,25;;\n"
+        "1;maria@teste.com;Pix;Arroz;2;;;2024-05-03\n"
+    )
+    segunda = importar_pedidos(conn, corrigido, "PAGO")
+
+    assert segunda.pedidos == 1
+    assert segunda.rejeitados == [
+        (3, "pedido 2 já importado"),
+        (4, "pedido 1 já importado"),
+        (5, "pedido 1 rejeitado (erro em outra linha)"),
+    ]
+    assert [r[0] for r in pedidos_gravados(conn)] == ["1", "1", "2", "3"]
+    assert resumos.conferir(conn.cursor()) == []
+
+
+def test_pedido_com_linha_invalida_e_rejeitado_inteiro(conn, produtos):
+    arquivo = CABECALHO + (
+        "1;maria@teste.com;Pix;Arroz;2;;;\n"
+        "1;maria@teste.com;Pix;Macarrão;1;;;\n"
+        "2;ninguem@teste.com;Pix;Arroz;1;;;\n"
+    )
+    resultado = importar_pedidos(conn, arquivo, "PAGO")
+
+    assert resultado.pedidos == 0
+    assert resultado.rejeitados == [
+        (2, "pedido 1 rejeitado (erro em outra linha)"),
+        (3, "produto não encontrado: Macarrão"),
+        (4, "cliente não encontrado: ninguem@teste.com"),
+    ]
+    assert pedidos_gravados(conn) == []
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from pedidos import pagina_pedidos
+
+TAMANHO = 3
+
+
+@pytest.fixture
+def pedidos(conn, cliente):
+    """Sete pedidos (ids crescentes), metade no Pix."""
+    cursor = conn.cursor()
+    ids = []
+    for i in range(7):
+        cursor.execute("""
+            INSERT INTO Pedidos (cliente_id, data, pagamento, status, total_bruto, desconto, total)
+            OUTPUT INSERTED.id
+            VALUES (?, ?, ?, 'PAGO', 10, 0, 10)
+        """, (cliente, datetime(2024, 3, 1 + i), "Pix" if i % 2 == 0 else "Dinheiro"))
+        ids.append(int(cursor.fetchone()[0]))
+    conn.commit()
+    return ids
+
+
+def pagina(conn, filtro="1=1", params=(), **keyset):
+    rows, tem_anterior, tem_proxima = pagina_pedidos(
+        conn.cursor(), filtro, list(params), tamanho=TAMANHO, **keyset
+    )
+    return [r.id for r in rows], tem_anterior, tem_proxima
+
+
+def test_primeira_pagina(conn, pedidos):
+    assert pagina(conn) == (pedidos[6:3:-1], False, True)
+
+
+def test_avanca_ate_a_ultima_e_volta(conn, pedidos):
+    segunda = pagina(conn, antes=pedidos[4])
+    assert segunda == (pedidos[3:0:-1], True, True)
+
+    ultima = pagina(conn, antes=pedidos[1])
+    assert ultima == ([pedidos[0]], True, False)
+
+    # Voltando da última: página cheia logo acima do primeiro id dela
+    assert pagina(conn, apos=pedidos[0]) == (pedidos[3:0:-1], True, True)
+    # Voltando da segunda: chega na primeira, sem página anterior
+    assert pagina(conn, apos=pedidos[3]) == (pedidos[6:3:-1], False, True)
+
+
+def test_pagina_exata_nao_anuncia_proxima(conn, pedidos):
+    # Depois de pedidos[3] restam exatamente TAMANHO pedidos
+    assert pagina(conn, antes=pedidos[3]) == (pedidos[2::-1], True, False)
+
+
+def test_apos_alem_do_ultimo_cai_na_primeira_pagina(conn, pedidos):
+    assert pagina(conn, apos=pedidos[6] + 100) == (pedidos[6:3:-1], False, True)
+
+
+def test_antes_do_primeiro_pedido_vem_vazio(conn, pedidos):
+    assert pagina(conn, antes=pedidos[0]) == ([], True, False)
+
+
+def test_keyset_respeita_o_filtro(conn, pedidos):
+    pix = pedidos[::2]    # 4 pedidos
+    filtro = ("1=1 AND p.pagamento = ?", ["Pix"])
+    assert pagina(conn, *filtro) == (pix[:0:-1], False, True)
+    assert pagina(conn, *filtro, antes=pix[1]) == ([pix[0]], True, False)
+    assert pagina(conn, *filtro, apos=pix[0]) == (pix[:0:-1], False, True)
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from banco.pool import PoolConexoes
+
+
+class Conexao:
+    """sqlite3 em memória com commit/rollback que podem falhar."""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.falhar_commit = False
+        self.falhar_rollback = False
+        self.fechada = False
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def commit(self):
+        if self.falhar_commit:
+            raise sqlite3.OperationalError("commit falhou")
+        self.conn.commit()
+
+    def rollback(self):
+        if self.falhar_rollback:
+            raise sqlite3.OperationalError("rollback falhou")
+        self.conn.rollback()
+
+    def close(self):
+        self.fechada = True
+        self.conn.close()
+
+
+@pytest.fixture
+def pool():
+    return PoolConexoes(Conexao, tamanho=2, timeout=0.1, pre_ping=False)
+
+
+def test_sem_erro_devolve_ao_pool(pool):
+    with pool.obter() as conn:
+        conn.cursor().execute("SELECT 1")
+    assert pool.metricas()["ociosas"] == 1
+
+
+def test_falha_no_commit_chega_a_quem_chamou(pool):
+    with pytest.raises(sqlite3.OperationalError, match="commit falhou"):
+        with pool.obter() as conn:
+            conn._conn.falhar_commit = True
+            conn.cursor().execute("SELECT 1")
+
+    # A conexão quebrada é descartada, não volta ao pool
+    metricas = pool.metricas()
+    assert (metricas["abertas"], metricas["descartadas"]) == (0, 1)
+    assert conn._conn.fechada
+
+
+def test_falha_no_rollback_nao_esconde_a_excecao_original(pool):
+    with pytest.raises(ValueError, match="original"):
+        with pool.obter() as conn:
+            conn._conn.falhar_rollback = True
+            raise ValueError("original")
+
+    assert pool.metricas()["abertas"] == 0
+
+
+def test_conexao_descartada_nao_prende_vaga(pool):
+    for _ in range(3):
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.obter() as conn:
+                conn._conn.falhar_commit = True
+    with pool.obter(), pool.obter():
+        pass
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from precos import (
+    Totais, ValorInvalido, auditar_totais, calcular, centavos, em_reais,
+    ler_quantidade, moeda, montar_item, totais,
+)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("12,50", 1250),
+    ("12.5", 1250),
+    (12.5, 1250),
+    (Decimal("12.5"), 1250),
+    (" 3 ", 300),
+    ("0,005", 1),       # metade para cima
+    ("0,004", 0),
+    ("2,675", 268),     # 2.675 em float seria 2.67499...
+    (0.1 + 0.2, 30),
+    (None, 0),
+    ("", 0),
+    ("   ", 0),
+])
+def test_centavos(valor, esperado):
+    assert centavos(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", ["abc", "1,2,3", "-1", "NaN", "inf"])
+def test_centavos_invalido(valor):
+    with pytest.raises(ValorInvalido, match="preço inválido"):
+        centavos(valor, "preço")
+
+
+def test_em_reais_e_moeda():
+    assert em_reais("10,005") == 10.01
+    assert em_reais(None) == 0
+    assert moeda(12.5) == "12,50"
+    assert moeda("0,07") == "0,07"
+    assert moeda(1234) == "1234,00"
+
+
+def test_ler_quantidade():
+    assert ler_quantidade(" 3 ") == 3
+    with pytest.raises(ValorInvalido):
+        ler_quantidade("2,5")
+
+
+def test_montar_item_arredonda_preco_e_subtotal():
+    item = montar_item(7, "Arroz", 3, "3,333")
+    assert item == {"id": 7, "nome": "Arroz", "quantidade": 3, "preco": 3.33, "subtotal": 9.99}
+
+
+def test_desconto_valor():
+    assert calcular([1000, 250], "valor", "2,50") == Totais(1250, 250, 1000)
+
+
+def test_desconto_percentual_arredonda_metade_para_cima():
+    # 10% de 12,35 = 1,235 -> 1,24
+    assert calcular([1235], "percentual", 10) == Totais(1235, 124, 1111)
+    # 12,5% de 1,00 = 0,125 -> 0,13
+    assert calcular([100], "percentual", "12,5") == Totais(100, 13, 87)
+
+
+def test_desconto_limitado_ao_bruto():
+    assert calcular([500], "valor", 20) == Totais(500, 500, 0)
+    assert calcular([500], "percentual", 150) == Totais(500, 500, 0)
+
+
+def test_desconto_invalido():
+    with pytest.raises(ValorInvalido, match="desconto"):
+        calcular([500], "valor", "-1")
+
+
+def test_totais_em_reais():
+    itens = [montar_item(1, "A", 2, "1,10"), montar_item(2, "B", 1, "0,35")]
+    assert totais(itens, "percentual", 10) == Totais(2.55, 0.26, 2.29)
+
+
+def test_precos_nao_importa_recibos_nem_flask():
+    codigo = "import sys, precos; assert not {'recibos', 'flask'} & set(sys.modules)"
+    subprocess.run([sys.executable, "-c", codigo], check=True, cwd=RAIZ)
+
+
+def test_auditoria_corrige_e_avisa_os_pedidos(conn, cliente):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Pedidos (cliente_id, data, pagamento, status, total_bruto, desconto, total)
+        OUTPUT INSERTED.id
+        VALUES (?, ?, 'Pix', 'PAGO', 99, 1, 98)
+    """, (cliente, datetime(2024, 5, 3)))
+    pedido_id = int(cursor.fetchone()[0])
+    cursor.execute("""
+        INSERT INTO PedidoItens (pedido_id, nome, quantidade, preco, subtotal)
+        VALUES (?, 'Arroz', 2, 10.5, 21)
+    """, (pedido_id,))
+    conn.commit()
+
+    avisados = []
+    resultado = auditar_totais(conn, corrigir=True, corrigidos_em=avisados.extend)
+
+    assert resultado["corrigidos"] == 1
+    assert avisados == [pedido_id]
+    cursor.execute("SELECT total_bruto, desconto, total FROM Pedidos WHERE id = ?", (pedido_id,))
+    assert tuple(cursor.fetchone()) == (21, 1, 20)
@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import pytest
+
+import resumos
+
+
+def gravar_pedido(cursor, cliente_id, data, pagamento, itens, desconto=0):
+    """Insere o pedido e os itens [(nome, quantidade, preço)] como as rotas."""
+    bruto = round(sum(q * p for _, q, p in itens), 2)
+    cursor.execute("""
+        INSERT INTO Pedidos (cliente_id, data, pagamento, status, total_bruto, desconto, total)
+        OUTPUT INSERTED.id
+        VALUES (?, ?, ?, 'PAGO', ?, ?, ?)
+    """, (cliente_id, data, pagamento, bruto, desconto, round(bruto - desconto, 2)))
+    pedido_id = int(cursor.fetchone()[0])
+    gravar_itens(cursor, pedido_id, itens)
+    return pedido_id
+
+
+def gravar_itens(cursor, pedido_id, itens):
+    cursor.executemany("""
+        INSERT INTO PedidoItens (pedido_id, nome, quantidade, preco, subtotal)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(pedido_id, nome, q, p, round(q * p, 2)) for nome, q, p in itens])
+
+
+def criar(conn, *args, **kwargs):
+    cursor = conn.cursor()
+    pedido_id = gravar_pedido(cursor, *args, **kwargs)
+    resumos.registrar(cursor, resumos.Resumo(), [pedido_id])
+    conn.commit()
+    return pedido_id
+
+
+def conferir(conn):
+    return resumos.conferir(conn.cursor())
+
+
+def linhas(conn, tabela):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {tabela}")
+    return [tuple(r) for r in cursor.fetchall()]
+
+
+@pytest.fixture
+def pedidos(conn, cliente):
+    return [
+        criar(conn, cliente, datetime(2024, 5, 3, 10), "Pix", [("Arroz", 2, 10.5), ("Feijão", 1, 7.25)]),
+        criar(conn, cliente, datetime(2024, 5, 3, 15), "Pix", [("Arroz", 1, 10.5)]),
+        criar(conn, cliente, datetime(2024, 5, 20), "Dinheiro", [("Café", 3, 15.9)], desconto=1.7),
+    ]
+
+
+def test_criar(conn, pedidos):
+    assert conferir(conn) == []
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT pedidos, total, menor FROM VendasDia WHERE pagamento = 'Pix'")
+    assert tuple(cursor.fetchone()) == (2, 38.75, 10.5)
+    cursor.execute("SELECT quantidade, valor FROM VendasMesProduto WHERE nome = 'Arroz'")
+    assert tuple(cursor.fetchone()) == (3, 31.5)
+
+
+def test_editar_troca_dia_pagamento_e_itens(conn, cliente, pedidos):
+    cursor = conn.cursor()
+    pedido_id = pedidos[0]
+
+    antes = resumos.capturar(cursor, [pedido_id])
+    cursor.execute("""
+        UPDATE Pedidos SET data = ?, pagamento = ?, total_bruto = 8, desconto = 0, total = 8
+        WHERE id = ?
+    """, (datetime(2024, 6, 1, 9), "Cartão", pedido_id))
+    cursor.execute("DELETE FROM PedidoItens WHERE pedido_id = ?", (pedido_id,))
+    gravar_itens(cursor, pedido_id, [("Açúcar", 2, 4.0)])
+    resumos.registrar(cursor, antes, [pedido_id])
+    conn.commit()
+
+    assert conferir(conn) == []
+    # O menor do dia 3 passa a ser o pedido que ficou; Feijão saiu de maio
+    cursor.execute("SELECT pedidos, menor FROM VendasDia WHERE pagamento = 'Pix'")
+    assert tuple(cursor.fetchone()) == (1, 10.5)
+    cursor.execute("SELECT COUNT(*) FROM VendasMesProduto WHERE nome = 'Feijão'")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_excluir_remove_as_linhas_zeradas(conn, pedidos):
+    cursor = conn.cursor()
+    for pedido_id in pedidos:
+        antes = resumos.capturar(cursor, [pedido_id])
+        cursor.execute("DELETE FROM Pedidos WHERE id = ?", (pedido_id,))
+        resumos.registrar(cursor, antes)
+    conn.commit()
+
+    assert conferir(conn) == []
+    for tabela in ("VendasDia", "VendasMesCliente", "VendasMesProduto"):
+        assert linhas(conn, tabela) == []
+
+
+def test_carimbo_do_mes_incrementa(conn, cliente):
+    cursor = conn.cursor()
+    criar(conn, cliente, datetime(2024, 7, 1), "Pix", [("Arroz", 1, 1)])
+    criar(conn, cliente, datetime(2024, 7, 2), "Pix", [("Arroz", 1, 1)])
+    cursor.execute("SELECT versao FROM VendasVersao WHERE mes = ?", (datetime(2024, 7, 1).date(),))
+    assert cursor.fetchone()[0] == 2
+
+
+def test_conferir_acusa_divergencia(conn, pedidos):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE VendasMesCliente SET total = total + 1")
+    conn.commit()
+    divergencias = conferir(conn)
+    assert [d[0] for d in divergencias] == ["VendasMesCliente"]
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import tarefas
+from tarefas import ERRO, EXECUTANDO, PENDENTE, SEM_SINAL, ExecutorTarefas, obter_tarefa
+
+
+@tarefas.tipo_tarefa("teste_espera", "Teste")
+def _esperar(conn, segundos, progresso):
+    progresso(0, 1)
+    time.sleep(segundos)
+    progresso(1, 1)
+    return {"ok": True}
+
+
+@pytest.fixture
+def banco(conn):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Tarefas")
+    conn.commit()
+    return conn
+
+
+def criar(conn, situacao, segundos_sem_sinal):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Tarefas (tipo, situacao, atualizado_em)
+        OUTPUT INSERTED.id
+        VALUES ('teste_espera', ?, DATEADD(SECOND, -?, GETDATE()))
+    """, (situacao, segundos_sem_sinal))
+    tarefa_id = int(cursor.fetchone()[0])
+    conn.commit()
+    return tarefa_id
+
+
+def situacao_gravada(conn, tarefa_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT situacao FROM Tarefas WHERE id = ?", (tarefa_id,))
+    resultado = cursor.fetchone()[0]
+    conn.commit()
+    return resultado
+
+
+def test_consulta_mostra_erro_sem_gravar(banco):
+    morta = criar(banco, EXECUTANDO, 3600)
+    viva = criar(banco, PENDENTE, 0)
+
+    tarefa = obter_tarefa(morta)
+    assert (tarefa["situacao"], tarefa["erro"]) == (ERRO, SEM_SINAL)
+    assert obter_tarefa(viva)["situacao"] == PENDENTE
+    # A consulta não escreve
+    assert situacao_gravada(banco, morta) == EXECUTANDO
+
+
+def test_vaga_presa_por_worker_morto_e_liberada(banco):
+    morta = criar(banco, EXECUTANDO, 3600)
+    executor = ExecutorTarefas(simultaneas=1, espera=0.05, sinal=0)
+
+    tarefa_id = executor.enviar("teste_espera", 0.1)
+    limite = time.monotonic() + 10
+    while obter_tarefa(tarefa_id)["situacao"] != "concluida" and time.monotonic() < limite:
+        time.sleep(0.1)
+
+    assert obter_tarefa(tarefa_id)["resultado"] == {"ok": True}
+    assert situacao_gravada(banco, morta) == ERRO
+
+
+def test_limite_de_simultaneas(banco):
+    executor = ExecutorTarefas(simultaneas=1, espera=0.05)
+    ocupada = criar(banco, PENDENTE, 0)
+    outra = criar(banco, PENDENTE, 0)
+
+    assert executor._ocupar_vaga(ocupada)
+    assert not executor._ocupar_vaga(outra)
+    assert situacao_gravada(banco, outra) == PENDENTE
@@ -1,9 +1,10 @@
-import pyodbc
-import hashlib
-import hmac
-
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
+from database import get_connection
+from senhas import verificar_senha, gerar_hash, SenhasOcupado
+from sessoes import revogar_usuario
+from permissoes import (
+    PERFIL_ADMIN, matriz, pode_acessar, admin_necessario, incrementar_versao,
+)
 
 usuarios_bp = Blueprint(
     "usuarios",
@@ -12,76 +13,14 @@ usuarios_bp = Blueprint(
     template_folder="templates/usuarios"
 )
 
-# ==================== NORMALIZAR HASH ====================
-def normalizar_hash(valor):
-    if not valor:
-        return None
-
-    if isinstance(valor, (bytes, bytearray)):
-        valor = valor.decode("utf-8")
-
-    elif hasattr(valor, "tobytes"):  # memoryview
-        valor = valor.tobytes().decode("utf-8")
-
-    return valor.strip()
-
-# ==================== VERIFICAR SENHA (PBKDF2 + SCRYPT) ====================
-def verificar_senha(senha_digitada, senha_hash):
-    if not senha_digitada or not senha_hash:
-        return False
-
-    # PBKDF2 (Werkzeug / Flask padrão)
-    if senha_hash.startswith("pbkdf2:"):
-        return check_password_hash(senha_hash, senha_digitada)
-
-    # SCRYPT (hash legado)
-    if senha_hash.startswith("scrypt:"):
-        try:
-            # Ex: scrypt:32768:8:1$salt$hash
-            _, params, resto = senha_hash.split("$", 2)
-            salt, hash_salvo = resto.split("$")
-
-            novo_hash = hashlib.scrypt(
-                senha_digitada.encode("utf-8"),
-                salt=salt.encode("utf-8"),
-                n=32768,
-                r=8,
-                p=1
-            ).hex()
-
-            return hmac.compare_digest(novo_hash, hash_salvo)
-        except Exception:
-            return False
-
-    return False
-
-# ==================== CONFIGURAÇÃO SQL SERVER ====================
-SERVER = r"DESKTOP-URUJPEC\SQLEXPRESS"
-DATABASE = "listadecompras"
-DRIVER = "ODBC Driver 17 for SQL Server"
-
-def get_connection():
-    return pyodbc.connect(
-        f"DRIVER={{{DRIVER}}};SERVER={SERVER};DATABASE={DATABASE};Trusted_Connection=yes;"
-    )
-
 # ==================== CHECAR PERMISSÃO ====================
 def tem_permissao(recurso: str) -> bool:
     """
     Verifica se o usuário logado tem permissão para acessar o recurso (tela).
-    Admin sempre tem acesso a tudo.
+    Admin sempre tem acesso a tudo. Consulta a matriz em memória
+    (permissoes.matriz); a sessão guarda só o perfil_id.
     """
-    if "user_id" not in session:
-        return False  # não logado
-
-    recurso = recurso.strip().lower()
-
-    # Perfil Admin
-    if session.get("perfil_id") == 1:
-        return True
-
-    # Checa se a tela está nas telas permitidas do perfil
-    return recurso in session.get("telas", [])
+    return pode_acessar(recurso)
 
 # ==================== LOGIN ====================
 @usuarios_bp.route("/login", methods=["GET", "POST"])
@@ -99,26 +38,40 @@ def login():
             """, (email,))
             user = cursor.fetchone()
 
-            if not user or user.ativo != 1 or not check_password_hash(user.senha_hash, senha):
-                flash("Usuário ou senha inválidos.", "danger")
-                return redirect(url_for("usuarios.login"))
-
-            # Limpa sessão e salva dados do usuário
-            session.clear()
-            session["user_id"] = user.id
-            session["user_nome"] = user.nome
-            session["perfil_id"] = int(user.perfil_id)
-
-            # Carrega telas permitidas para o perfil
-            cursor.execute("SELECT tela_nome FROM dbo.PerfilTelas WHERE perfil_id = ?", (user.perfil_id,))
-            telas = cursor.fetchall()
-            session["telas"] = [row[0].strip().lower() for row in telas] if telas else []
+        if not user or user.ativo != 1:
+            flash("Usuário ou senha inválidos.", "danger")
+            return redirect(url_for("usuarios.login"))
 
-            # Admin sempre tem todas as telas
-            if user.perfil_id == 1:
-                cursor.execute("SELECT DISTINCT tela_nome FROM dbo.PerfilTelas")
-                admin_telas = cursor.fetchall()
-                session["telas"] = [row[0].strip().lower() for row in admin_telas]
+        # Hash calculado no executor de senhas (limitado), já sem conexão
+        # do pool: a fila de logins é maior que o pool
+        try:
+            confere, novo_hash = verificar_senha(senha, user.senha_hash)
+        except SenhasOcupado:
+            flash("Muitos acessos no momento. Tente novamente em instantes.", "warning")
+            return redirect(url_for("usuarios.login"))
+
+        if not confere:
+            flash("Usuário ou senha inválidos.", "danger")
+            return redirect(url_for("usuarios.login"))
+
+        # Hash legado ou abaixo do custo alvo: atualiza com a senha já
+        # validada, se a senha não foi trocada enquanto o hash era calculado
+        if novo_hash:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE dbo.Usuarios
+                    SET senha_hash = ?
+                    WHERE id = ? AND senha_hash = ?
+                """, (novo_hash, user.id, user.senha_hash))
+                conn.commit()
+
+        # Limpa sessão e salva dados do usuário
+        # (as telas do perfil vêm da matriz de permissões em memória)
+        session.clear()
+        session["user_id"] = user.id
+        session["user_nome"] = user.nome
+        session["perfil_id"] = int(user.perfil_id)
 
         return redirect(url_for("dashboard.dashboard_home"))
 
@@ -144,7 +97,7 @@ def alterar_senha_usuario():
             flash("A senha deve ter no mínimo 6 caracteres.", "danger")
             return redirect(url_for("usuarios.alterar_senha_usuario"))
 
-        senha_hash = generate_password_hash(senha)
+        senha_hash = gerar_hash(senha)
 
         with get_connection() as conn:
             cursor = conn.cursor()
@@ -188,7 +141,7 @@ def alterar_senha_admin(id):
                 UPDATE dbo.Usuarios
                 SET senha_hash=?
                 WHERE id=?
-            """, (generate_password_hash(senha), id))
+            """, (gerar_hash(senha), id))
             conn.commit()
 
             flash("Senha alterada com sucesso.", "success")
@@ -247,7 +200,7 @@ def usuarios_novo():
             cursor.execute("""
                 INSERT INTO dbo.Usuarios (nome, email, senha_hash, ativo, perfil_id)
                 VALUES (?, ?, ?, 1, ?)
-            """, (nome, email, generate_password_hash(senha), perfil))
+            """, (nome, email, gerar_hash(senha), perfil))
             conn.commit()
 
         flash("Usuário criado com sucesso.", "success")
@@ -279,6 +232,9 @@ def usuarios_editar(id):
         perfis = cursor.fetchall()
 
         if request.method == "POST":
+            perfil_id = int(request.form["perfil_id"])
+            ativo = int(request.form["ativo"])
+
             cursor.execute("""
                 UPDATE dbo.Usuarios
                 SET nome=?, email=?, perfil_id=?, ativo=?
@@ -286,11 +242,15 @@ def usuarios_editar(id):
             """, (
                 request.form["nome"],
                 request.form["email"],
-                int(request.form["perfil_id"]),
-                int(request.form["ativo"]),
+                perfil_id,
+                ativo,
                 id
             ))
             conn.commit()
+
+            # Desativado ou com perfil trocado: derruba as sessões abertas
+            if ativo != 1 or perfil_id != usuario.perfil_id:
+                revogar_usuario(current_app, id)
             flash("Usuário atualizado.", "success")
             return redirect(url_for("usuarios.usuarios_listar"))
 
@@ -304,6 +264,8 @@ def usuarios_excluir(id):
         cursor.execute("DELETE FROM Usuarios WHERE id=?", (id,))
         conn.commit()
 
+    revogar_usuario(current_app, id)
+
     flash("Usuário excluído com sucesso!", "success")
     return redirect(url_for("usuarios.usuarios_listar"))
 
@@ -342,7 +304,7 @@ def primeiro_usuario():
             """, (
                 nome,
                 email,
-                generate_password_hash(senha),
+                gerar_hash(senha),
                 perfil))
             
             conn.commit()
@@ -351,3 +313,45 @@ def primeiro_usuario():
         return redirect(url_for("usuarios.login"))
 
     return render_template("usuarios/primeiro_usuario.html", perfis=perfis)
+
+# ==================== PERMISSÕES DOS PERFIS ====================
+@usuarios_bp.route("/perfis/permissoes", methods=["GET", "POST"])
+@admin_necessario
+def perfis_permissoes():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nome FROM dbo.Perfis ORDER BY id")
+        perfis = cursor.fetchall()
+
+        telas = matriz.telas()
+
+        if request.method == "POST":
+            # Admin sempre tem acesso total; só os demais perfis são editados
+            for perfil in perfis:
+                if perfil.id == PERFIL_ADMIN:
+                    continue
+
+                cursor.execute("DELETE FROM dbo.PerfilTelas WHERE perfil_id = ?", (perfil.id,))
+                for tela in telas:
+                    if request.form.get(f"perm_{perfil.id}_{tela}") == "1":
+                        cursor.execute("""
+                            INSERT INTO dbo.PerfilTelas (perfil_id, tela_nome)
+                            VALUES (?, ?)
+                        """, (perfil.id, tela))
+
+            incrementar_versao(cursor)
+            conn.commit()
+            matriz.invalidar()
+
+            flash("Permissões atualizadas.", "success")
+            return redirect(url_for("usuarios.perfis_permissoes"))
+
+    permitidas = {perfil.id: matriz.telas_do_perfil(perfil.id) for perfil in perfis}
+
+    return render_template(
+        "usuarios/perfis_permissoes.html",
+        perfis=perfis,
+        telas=telas,
+        permitidas=permitidas,
+        perfil_admin=PERFIL_ADMIN
+    )
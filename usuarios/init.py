@@ -1,9 +0,0 @@
-from flask import Blueprint
-
-usuarios_bp = Blueprint(
-    "usuarios",
-    __name__,
-    template_folder="templates"   # ← obrigatório
-)
-
-from . import routes
\ No newline at end of file